@@ -0,0 +1,125 @@
+"""
+Answers a file of saved queries, one per line, and writes the results as JSON lines in the same order:
+
+    python query_processing.py --batch queries.txt --workers 4 > results.jsonl
+
+Identical queries (after normalization) are only evaluated once. The distinct queries are split into chunks that are answered by a pool of
+processes, each with its own Searcher over the same memory mapped index files, so the operating system keeps a single copy of the index in
+memory. Within a chunk, the postings list of every term is fetched once and shared sub-expressions are computed once (see Searcher.batch_query()).
+The results are written as soon as every query before them has been answered, and the throughput is printed to stderr.
+"""
+
+import json
+import multiprocessing
+import sys
+import time
+from normalizer import query_word_terms
+from query_parser import canonical, parse_query
+from search_engine import Searcher
+from segments import INDEX_DIR
+
+CHUNK_SIZE = 256 # the most distinct queries sent to a worker at once, small enough for their sub-expressions to stay in its cache
+
+_searcher = None # the searcher of a worker process
+
+def init_worker(index_dir):
+    """
+    This function opens the index in a worker process, once for all the chunks it answers.
+    """
+
+    global _searcher
+    _searcher = Searcher(index_dir)
+
+def answer_chunk(queries):
+    """
+    This function answers a chunk of queries in a worker process.
+    """
+
+    return _searcher.batch_query(queries)
+
+def read_queries(path):
+    """
+    This function reads a file of queries, one per line, skipping blank lines.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        queries (list): The queries.
+    """
+
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def query_key(query):
+    """
+    This function returns the key identical queries share: the canonical form of the query tree, or the query itself if it is not valid.
+    """
+
+    try:
+        node = parse_query(query, query_word_terms)
+    except ValueError:
+        return 'INVALID ' + query # every invalid query is answered with its own error message
+    return canonical(node) if node is not None else ''
+
+def run_batch(queries, out, workers=1, index_dir=INDEX_DIR, chunk_size=CHUNK_SIZE):
+    """
+    This function answers a batch of queries and writes one JSON line per query to out, in the order of the queries.
+
+    Args:
+        queries (list): The queries.
+        out (file): Where the JSON lines are written.
+        workers (int): The number of processes the queries are answered by.
+        index_dir (str): The directory of the index.
+        chunk_size (int): The most distinct queries sent to a worker at once.
+
+    Returns:
+        qps (float): The number of queries answered per second.
+    """
+
+    start = time.perf_counter()
+    distinct = [] # the first query of every key, in the order they first appear
+    index = {} # the key of a query to its position in distinct
+    order = [] # the position in distinct of the answer to every query
+    for query in queries:
+        key = query_key(query)
+        if key not in index:
+            index[key] = len(distinct)
+            distinct.append(query)
+        order.append(index[key])
+
+    chunk_size = max(1, min(chunk_size, -(-len(distinct) // (workers * 4)))) # at least four chunks per worker, so the work is spread evenly
+    chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+    if workers > 1:
+        with multiprocessing.Pool(workers, init_worker, (index_dir,)) as pool:
+            write_results(pool.imap(answer_chunk, chunks), queries, order, out) # imap keeps the chunks in order
+    else:
+        init_worker(index_dir)
+        write_results(map(answer_chunk, chunks), queries, order, out)
+
+    elapsed = time.perf_counter() - start
+    qps = len(queries) / elapsed if elapsed > 0 else 0.0
+    print("Answered {} queries ({} distinct) in {:.3f} s, {:.1f} queries per second".format(len(queries), len(distinct), elapsed, qps), file=sys.stderr)
+    return qps
+
+def write_results(chunk_results, queries, order, out):
+    """
+    This function writes the answer to every query as soon as it and every query before it have been answered.
+
+    Args:
+        chunk_results (iterable): The answers to the chunks of distinct queries, in order.
+        queries (list): The queries.
+        order (list): The position of the answer to every query among the distinct queries.
+        out (file): Where the JSON lines are written.
+    """
+
+    answers = []
+    position = 0 # the next query to write
+    for results in chunk_results:
+        answers.extend(results)
+        while position < len(queries) and order[position] < len(answers):
+            result = dict(answers[order[position]])
+            result['query'] = queries[position] # a repeated query is written as it was given
+            out.write(json.dumps(result) + '\n')
+            position += 1
+        out.flush()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of the postings list operators in postings.py against the list based operators query_processing.py used before them.
+
+Run it from the root of the repository:
+
+    python benchmarks/bench_postings.py
+    python benchmarks/bench_postings.py --sizes 1000 10000 --repeat 5
+
+Every size is timed with two postings lists of that size (a balanced AND), and with a list of 100 docIDs against a list of that size (a rare
+term ANDed with a common one). The old operators are quadratic, so they are only timed up to --legacy-limit docIDs per list.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from postings import complement, intersect, union
+
+def legacy_intersection(p1, p2):
+    """
+    The INTERSECTION operator as it was before postings.py.
+    """
+
+    return [c for c in p1 if c in p2]
+
+def legacy_union(p1, p2):
+    """
+    The UNION operator as it was before postings.py (without modifying p1, so the inputs can be reused between runs).
+    """
+
+    result = list(p1)
+    result.extend(p2)
+    return list(set(result))
+
+def legacy_not(p1, doc):
+    """
+    The NOT operator as it was before postings.py, with the docIDs passed in instead of read from the ResearchPapers directory.
+    """
+
+    return [c for c in doc if c not in p1]
+
+def make_postings(rng, size, universe):
+    """
+    This function returns a random sorted postings list.
+
+    Args:
+        rng (random.Random): The seeded random generator.
+        size (int): The number of docIDs.
+        universe (int): DocIDs are drawn from 1 to universe.
+
+    Returns:
+        postings (list): The sorted docIDs.
+    """
+
+    return sorted(rng.sample(range(1, universe + 1), size))
+
+def best_time(function, args, repeat):
+    """
+    This function returns the fastest of several runs of a function, in milliseconds.
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the postings list operators.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], help='the postings list sizes to be timed')
+    parser.add_argument('--repeat', type=int, default=3, help='how many times every operation is run (the fastest run is reported)')
+    parser.add_argument('--legacy-limit', type=int, default=10 ** 4, help='the largest size the old operators are timed at')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random postings lists')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print('{:<10} {:<12} {:>12} {:>12} {:>10}'.format('size', 'operation', 'old (ms)', 'new (ms)', 'speedup'))
+    for size in args.sizes:
+        universe = 2 * size # every docID is in about half of the lists
+        p1 = make_postings(rng, size, universe)
+        p2 = make_postings(rng, size, universe)
+        rare = make_postings(rng, min(100, size), universe)
+        doc = list(range(1, universe + 1))
+
+        cases = [
+            ('AND', legacy_intersection, intersect, (p1, p2)),
+            ('rare AND', legacy_intersection, intersect, (rare, p2)),
+            ('OR', legacy_union, union, (p1, p2)),
+            ('rare OR', legacy_union, union, (rare, p2)),
+            ('NOT', legacy_not, complement, (p1, doc)),
+        ]
+        for name, legacy, new, operands in cases:
+            new_time = best_time(new, operands, args.repeat)
+            if size <= args.legacy_limit:
+                if sorted(legacy(*operands)) != new(*operands): # the old operators do not keep the order, so only compare the docIDs
+                    raise AssertionError('{} gives a different result at size {}'.format(name, size))
+                legacy_time = best_time(legacy, operands, args.repeat)
+                print('{:<10} {:<12} {:>12.2f} {:>12.2f} {:>9.1f}x'.format(size, name, legacy_time, new_time, legacy_time / new_time))
+            else:
+                print('{:<10} {:<12} {:>12} {:>12.2f} {:>10}'.format(size, name, 'skipped', new_time, '-'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+"""
+End to end benchmark of the indexing and query paths on synthetic corpora (see corpus.py).
+
+Run it from the root of the repository:
+
+    python benchmarks/bench_suite.py --sizes 100 1000 10000 --output results.json
+    python benchmarks/bench_suite.py --sizes 100 1000 10000 --baseline results.json
+
+Every corpus size is benchmarked in a process of its own, so its peak memory is measured on its own. The process generates the corpus in
+a temporary directory and times, in milliseconds:
+
+    preprocessing, create_inverted_index, create_positional_index, extract_indexes
+                    the in-memory functions, only up to --legacy-limit documents since they hold the whole corpus in memory
+    build_indexes   the streaming build of the binary index (index_creation.py --rebuild)
+    load            opening the index with a new Searcher
+    queries         the latency percentiles of AND, OR, AND NOT, proximity, wildcard and ranked queries on terms drawn from the vocabulary.
+                    The caches are emptied before every query, so every query is evaluated from the index
+
+along with the peak resident memory of the process (and of the worker processes of the build). The results are written as JSON, and
+with --baseline every timing and memory figure is compared to a previous run. The ones that got slower (or larger) by more than
+--threshold are flagged as regressions, and the exit status is 1 if there are any.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from corpus import generate_corpus
+from instrumentation import peak_rss_mb
+
+QUERY_KINDS = ['AND', 'OR', 'NOT', 'proximity', 'wildcard', 'ranked']
+NOISE_FLOOR_MS = 0.5 # timings that differ from the baseline by less than this are never flagged
+
+def timed(stages, name, function, *args):
+    """
+    This function runs a function, records how long it took in stages[name] (in milliseconds), and returns its result.
+    """
+
+    start = time.perf_counter()
+    result = function(*args)
+    stages[name] = (time.perf_counter() - start) * 1000
+    return result
+
+def percentiles(times):
+    """
+    This function summarizes a list of latencies, in milliseconds.
+
+    Returns:
+        summary (dict): The mean, the 50th, 90th and 99th percentiles, and the number of queries per second.
+    """
+
+    times = sorted(times)
+    if not times:
+        return {}
+    pick = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+    mean = sum(times) / len(times)
+    return {'mean_ms': mean, 'p50_ms': pick(0.50), 'p90_ms': pick(0.90), 'p99_ms': pick(0.99), 'qps': 1000 / mean if mean else 0.0}
+
+def make_queries(rng, vocabulary, stopword_count, count):
+    """
+    This function makes a seeded workload of every kind of query.
+
+    The terms are drawn from the words that are not stopwords, with the common words drawn more often (the ranks are spread evenly on a log scale), as in real query logs.
+
+    Args:
+        rng (random.Random): The seeded random generator.
+        vocabulary (list): The words of the corpus, from the most common, starting with the stopwords.
+        stopword_count (int): The number of stopwords at the start of the vocabulary.
+        count (int): The number of queries of every kind.
+
+    Returns:
+        queries (dict): The queries of every kind.
+    """
+
+    words = vocabulary[stopword_count:]
+    top = min(len(words), 5000) # beyond this the words only appear in a handful of documents
+    word = lambda: words[int(top ** rng.random()) - 1]
+    queries = {kind: [] for kind in QUERY_KINDS}
+    for _ in range(count):
+        a, b = word(), word()
+        queries['AND'].append('{} AND {}'.format(a, b))
+        queries['OR'].append('{} OR {}'.format(a, b))
+        queries['NOT'].append('{} AND NOT {}'.format(a, b))
+        queries['proximity'].append('{} {} /5'.format(a, b))
+        queries['wildcard'].append(a[:4] + '*')
+        queries['ranked'].append('{} {}'.format(a, b))
+    return queries
+
+def run_queries(searcher, kind, queries):
+    """
+    This function times every query of a workload on an empty cache.
+
+    Returns:
+        summary (dict): The latency percentiles (see percentiles()), and the number of queries that were rejected, e.g. a wildcard that matches too many terms.
+    """
+
+    times = []
+    errors = 0
+    for query in queries:
+        for cache in (searcher.result_cache, searcher.subexpression_cache, searcher.expansion_cache):
+            cache.clear()
+        start = time.perf_counter()
+        try:
+            if kind == 'ranked':
+                searcher.ranked_query(query, 10, free_text=True)
+            else:
+                searcher.boolean_query(query)
+        except ValueError:
+            errors += 1
+            continue
+        times.append((time.perf_counter() - start) * 1000)
+    return dict(percentiles(times), errors=errors)
+
+def run_size(num_docs, args):
+    """
+    This function benchmarks one corpus size. It is run in a process of its own, in a temporary directory that holds the corpus and the index.
+
+    Returns:
+        result (dict): The timings of every stage, the query latencies, the size of the index and the peak memory.
+    """
+
+    from index_creation import build_indexes, create_inverted_index, create_positional_index, get_docIDs, preprocessing, replace_index
+    from search_engine import Searcher, extract_indexes
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        vocabulary = timed(stages, 'generate', generate_corpus, workdir, num_docs, args.seed)
+        os.chdir(workdir) # the index creation reads and writes relative to the current directory
+        with open('Stopword-List.txt') as f:
+            stopword_count = sum(1 for line in f if line.strip())
+
+        if num_docs <= args.legacy_limit:
+            total_tokens = timed(stages, 'preprocessing', preprocessing)
+            timed(stages, 'create_inverted_index', create_inverted_index, total_tokens)
+            timed(stages, 'create_positional_index', create_positional_index, total_tokens)
+            del total_tokens
+        doc = get_docIDs()
+        timed(stages, 'build_indexes', replace_index, lambda prefix: build_indexes(doc, prefix, args.workers, args.memory_mb))
+        if num_docs <= args.legacy_limit:
+            timed(stages, 'extract_indexes', extract_indexes)
+        searcher = timed(stages, 'load', Searcher)
+        index_bytes = sum(os.path.getsize(os.path.join('index', name)) for name in os.listdir('index'))
+
+        queries = make_queries(random.Random(args.seed), vocabulary, stopword_count, args.queries)
+        latencies = {kind: run_queries(searcher, kind, queries[kind]) for kind in QUERY_KINDS}
+        searcher.index.close()
+        os.chdir(args.cwd)
+
+    return {
+        'docs': num_docs,
+        'vocabulary': len(vocabulary),
+        'index_bytes': index_bytes,
+        'stages_ms': stages,
+        'queries': latencies,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': peak_rss_mb(children=True),
+    }
+
+def metrics(results):
+    """
+    This function flattens the results of a run into the figures that are compared with a baseline, all of them better when lower.
+
+    Returns:
+        metrics (dict): A name like '1000/build_indexes' or '1000/AND/p90_ms' to its value.
+    """
+
+    flat = {}
+    for size, result in results['sizes'].items():
+        for stage, ms in result['stages_ms'].items():
+            if stage != 'generate': # not part of the code under test
+                flat['{}/{}'.format(size, stage)] = ms
+        for kind, summary in result['queries'].items():
+            for name in ('p50_ms', 'p90_ms', 'p99_ms'):
+                if name in summary:
+                    flat['{}/{}/{}'.format(size, kind, name)] = summary[name]
+        if result['peak_rss_mb'] is not None:
+            flat['{}/peak_rss_mb'.format(size)] = result['peak_rss_mb']
+    return flat
+
+def compare(results, baseline, threshold):
+    """
+    This function compares a run with a baseline and prints every figure that changed by more than the threshold.
+
+    Args:
+        results (dict): The results of this run.
+        baseline (dict): The results of the baseline run.
+        threshold (float): The relative change that is flagged, e.g. 0.25 for 25%.
+
+    Returns:
+        regressions (list): The names of the figures that got worse.
+    """
+
+    new, old = metrics(results), metrics(baseline)
+    regressions = []
+    print('{:<32} {:>12} {:>12} {:>8}'.format('figure', 'baseline', 'now', 'change'))
+    for name in sorted(new.keys() & old.keys(), key=lambda n: (int(n.split('/')[0]), n)):
+        before, after = old[name], new[name]
+        if before <= 0:
+            continue
+        change = after / before - 1
+        noise = not name.endswith('peak_rss_mb') and abs(after - before) < NOISE_FLOOR_MS
+        if change > threshold and not noise:
+            regressions.append(name)
+            flag = 'REGRESSION'
+        elif change < -threshold and not noise:
+            flag = 'improved'
+        else:
+            flag = ''
+        print('{:<32} {:>12.2f} {:>12.2f} {:>+7.0%} {}'.format(name, before, after, change, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark index creation and queries on synthetic corpora.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 2, 10 ** 3, 10 ** 4], help='the numbers of documents of the corpora (up to 10^6)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the corpora and of the queries')
+    parser.add_argument('--queries', type=int, default=200, help='the number of queries of every kind')
+    parser.add_argument('--workers', type=int, default=1, help='the number of processes the index is built with')
+    parser.add_argument('--memory-mb', type=int, default=256, help='the memory budget of the index build')
+    parser.add_argument('--legacy-limit', type=int, default=10 ** 4, help='the largest corpus the in-memory functions are timed on')
+    parser.add_argument('--output', help='the file the results are written to as JSON')
+    parser.add_argument('--baseline', help='the results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25, help='the relative slowdown flagged as a regression')
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS) # used internally to benchmark one size in a child process
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.cwd = os.getcwd()
+
+    if args.run_size is not None:
+        with contextlib.redirect_stdout(sys.stderr): # keep the progress messages of the index creation out of the way
+            result = run_size(args.run_size, args)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'queries': args.queries,
+        'workers': args.workers,
+        'sizes': {},
+    }
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            result_file = f.name
+        try:
+            command = [sys.executable, os.path.abspath(__file__), '--run-size', str(size), '--result-file', result_file,
+                       '--seed', str(args.seed), '--queries', str(args.queries), '--workers', str(args.workers),
+                       '--memory-mb', str(args.memory_mb), '--legacy-limit', str(args.legacy_limit)]
+            subprocess.run(command, check=True)
+            with open(result_file) as f:
+                result = json.load(f)
+        finally:
+            os.remove(result_file)
+        results['sizes'][str(size)] = result
+
+        stages = ', '.join('{} {:.1f} ms'.format(name, ms) for name, ms in result['stages_ms'].items())
+        print('{} docs: {}'.format(size, stages))
+        for kind, summary in result['queries'].items():
+            if 'p50_ms' in summary:
+                print('    {:<10} p50 {:8.3f} ms  p90 {:8.3f} ms  p99 {:8.3f} ms  {:8.0f} queries/s'.format(kind, summary['p50_ms'], summary['p90_ms'], summary['p99_ms'], summary['qps']))
+        if result['peak_rss_mb'] is not None:
+            print('    peak memory {:.1f} MB (build workers {:.1f} MB), index {:.1f} MB'.format(result['peak_rss_mb'], result['peak_rss_children_mb'], result['index_bytes'] / 2 ** 20))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print("Results saved to {}".format(args.output))
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("{} regressions".format(len(regressions)))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Seeded generator of synthetic corpora for the benchmarks, written in the layout index_creation.py reads: a 'ResearchPapers' directory
+with one '<docID>.txt' file per document, and a copy of 'Stopword-List.txt'.
+
+Word frequencies follow Zipf's law (the word of rank r appears about 1/r^s times as often as the most common one), with the stopwords
+taking the top ranks as they do in real text, and the size of the vocabulary grows with the size of the corpus following Heaps' law.
+The same arguments and seed always give the same corpus:
+
+    python benchmarks/corpus.py --docs 10000 --out /tmp/corpus10k
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from normalizer import STOPWORDS_FILE
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ZIPF_EXPONENT = 1.0
+MEAN_DOC_LENGTH = 150 # words per document, the lengths are log-normally distributed around it
+DOC_LENGTH_SIGMA = 0.5
+HEAPS_K = 30 # the vocabulary of a corpus of n words has about HEAPS_K * n^HEAPS_BETA distinct words
+HEAPS_BETA = 0.5
+WORDS_PER_LINE = 12
+
+def read_stopwords():
+    """
+    This function reads the stopwords of the repository, which take the most common ranks of the synthetic vocabulary.
+    """
+
+    with open(os.path.join(REPO_DIR, STOPWORDS_FILE)) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def make_vocabulary(rng, size, stopwords):
+    """
+    This function makes a vocabulary of distinct random lowercase words, in the order of their Zipf ranks.
+
+    Args:
+        rng (random.Random): The seeded random generator.
+        size (int): The number of words, besides the stopwords.
+        stopwords (list): The stopwords, which come first.
+
+    Returns:
+        vocabulary (list): The stopwords followed by the random words.
+    """
+
+    taken = set(stopwords)
+    words = []
+    while len(words) < size:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        if word not in taken:
+            taken.add(word)
+            words.append(word)
+    return list(stopwords) + words
+
+def vocabulary_size(num_docs):
+    """
+    This function returns the number of distinct words of a corpus of num_docs documents, following Heaps' law.
+    """
+
+    return max(1000, int(HEAPS_K * (num_docs * MEAN_DOC_LENGTH) ** HEAPS_BETA))
+
+def generate_corpus(directory, num_docs, seed=0, zipf_exponent=ZIPF_EXPONENT):
+    """
+    This function writes a synthetic corpus to a directory.
+
+    Args:
+        directory (str): The directory the corpus is written to. 'ResearchPapers' and 'Stopword-List.txt' are created in it.
+        num_docs (int): The number of documents.
+        seed (int): The seed of the random generator.
+        zipf_exponent (float): The exponent s of Zipf's law, larger values make the common words more common.
+
+    Returns:
+        vocabulary (list): The words of the corpus, from the most common to the least common. The stopwords come first.
+    """
+
+    rng = random.Random(seed)
+    stopwords = read_stopwords()
+    vocabulary = make_vocabulary(rng, vocabulary_size(num_docs), stopwords)
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1 / rank ** zipf_exponent
+        cum_weights.append(total)
+
+    papers = os.path.join(directory, 'ResearchPapers')
+    os.makedirs(papers, exist_ok=True)
+    shutil.copy(os.path.join(REPO_DIR, STOPWORDS_FILE), os.path.join(directory, STOPWORDS_FILE))
+    mu = math.log(MEAN_DOC_LENGTH) - DOC_LENGTH_SIGMA ** 2 / 2 # so the mean of the log-normal lengths is MEAN_DOC_LENGTH
+    for docID in range(1, num_docs + 1):
+        length = max(10, int(rng.lognormvariate(mu, DOC_LENGTH_SIGMA)))
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=length)
+        lines = [' '.join(words[i:i + WORDS_PER_LINE]) + '.' for i in range(0, length, WORDS_PER_LINE)] # a sentence per line
+        with open(os.path.join(papers, '{}.txt'.format(docID)), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    return vocabulary
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Zipf distributed corpus.')
+    parser.add_argument('--docs', type=int, default=1000, help='the number of documents')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random generator')
+    parser.add_argument('--zipf', type=float, default=ZIPF_EXPONENT, help='the exponent of Zipf\'s law')
+    parser.add_argument('--out', required=True, help='the directory the corpus is written to')
+    args = parser.parse_args()
+
+    vocabulary = generate_corpus(args.out, args.docs, args.seed, args.zipf)
+    print("Generated {} documents with a vocabulary of {} words in {}".format(args.docs, len(vocabulary), args.out))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Tests of the bitmap postings lists in bitmaps.py, checked against the same operations on sorted lists. They need NumPy.
+
+Run them from the root of the repository:
+
+    python -m pytest benchmarks
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+pytest.importorskip('numpy')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from bitmaps import DENSE_RATIO, Bitmap, DocSpace, decode_docs, hybrid_complement, hybrid_difference, hybrid_intersect, hybrid_union, read_bitmap, to_bitmap, to_list
+from index_format import encode_gaps
+
+def encoded(docs):
+    out = bytearray()
+    encode_gaps(docs, out)
+    return bytes(out)
+
+@pytest.fixture
+def space():
+    return DocSpace(sorted(random.Random(0).sample(range(1, 5000), 1000)))
+
+def test_decode_docs():
+    rng = random.Random(0)
+    for size in (0, 1, 10, 1000):
+        docs = sorted(rng.sample(range(1, 10 ** 6), size))
+        assert decode_docs(encoded(docs)).tolist() == docs
+    assert decode_docs(encoded([1, 2, 3])).tolist() == [1, 2, 3] # no byte with the continuation bit
+
+def test_bitmap_round_trip(space):
+    p = space.docIDs[::3]
+    bitmap = to_bitmap(p, space)
+    assert len(bitmap) == len(p)
+    assert bitmap.to_list() == p
+    assert to_bitmap(p + p[:10], space).to_list() == p # a docID given twice sets the same bit
+    assert to_bitmap([], space).to_list() == []
+
+def test_read_bitmap_drops_deleted_documents(space):
+    old, new = space.docIDs[::2], space.docIDs[1::4]
+    deleted = old[:50]
+    parts = [(encoded(old), deleted), (encoded(new), [])]
+    expected = sorted((set(old) - set(deleted)) | set(new))
+    assert read_bitmap(parts, space).to_list() == expected
+
+def test_hybrid_operators(space):
+    rng = random.Random(1)
+    dense = sorted(rng.sample(space.docIDs, 600))
+    other = sorted(rng.sample(space.docIDs, 500))
+    rare = sorted(rng.sample(space.docIDs, 20))
+    for p1 in (dense, rare):
+        for p2 in (other, rare):
+            for b1 in (p1, to_bitmap(p1, space)):
+                for b2 in (p2, to_bitmap(p2, space)):
+                    assert to_list(hybrid_intersect(b1, b2)) == sorted(set(p1) & set(p2))
+                    assert to_list(hybrid_union(b1, b2)) == sorted(set(p1) | set(p2))
+                    assert to_list(hybrid_difference(b1, b2)) == sorted(set(p1) - set(p2))
+        assert to_list(hybrid_complement(p1, space)) == sorted(set(space.docIDs) - set(p1))
+        assert to_list(hybrid_complement(to_bitmap(p1, space), space)) == sorted(set(space.docIDs) - set(p1))
+
+def test_is_dense(space):
+    smallest = -(-len(space.docIDs) // DENSE_RATIO) # the size of the shortest dense postings list, rounded up
+    assert space.is_dense(smallest)
+    assert not space.is_dense(smallest - 1)
+    assert isinstance(hybrid_complement([], space), Bitmap)
@@ -0,0 +1,114 @@
+"""
+Tests of the binary index format in index_format.py: the varint encoding and a round-trip of an index through write_index() and IndexReader.
+
+Run them from the root of the repository:
+
+    python -m pytest benchmarks
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from index_format import BLOCK_SIZE, IndexReader, decode_varints, encode_gaps, encode_varint, kgrams, read_varint, skip_varints, write_index
+
+VALUES = [0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 21, 2 ** 32 - 1, 2 ** 40]
+
+def encode(values):
+    out = bytearray()
+    for value in values:
+        encode_varint(value, out)
+    return bytes(out)
+
+def test_varint_sizes():
+    assert encode([127]) == b'\x7f'
+    assert encode([128]) == b'\x80\x01'
+    assert len(encode([16383])) == 2
+    assert len(encode([16384])) == 3
+
+def test_decode_varints():
+    assert decode_varints(encode(VALUES)) == VALUES
+    assert decode_varints(encode([1, 2, 3])) == [1, 2, 3] # every byte a value of its own
+    assert decode_varints(b'') == []
+
+def test_read_and_skip_varints():
+    data = encode(VALUES)
+    offset = 0
+    for value in VALUES:
+        decoded, offset = read_varint(data, offset)
+        assert decoded == value
+    assert offset == len(data)
+    for count in range(len(VALUES) + 1):
+        assert skip_varints(data, 0, count) == len(encode(VALUES[:count]))
+    with pytest.raises(ValueError):
+        skip_varints(data, 0, len(VALUES) + 1)
+
+def test_encode_gaps():
+    values = sorted(random.Random(0).sample(range(10 ** 6), 500))
+    out = bytearray()
+    encode_gaps(values, out)
+    gaps = decode_varints(bytes(out))
+    assert [sum(gaps[:i + 1]) for i in range(len(gaps))] == values
+
+def make_index(rng, num_docs, num_terms):
+    """
+    This function returns the (term, postings) pairs of a random positional index, in the form write_index() takes.
+    """
+
+    docIDs = sorted(rng.sample(range(1, 10 * num_docs), num_docs))
+    terms = sorted({''.join(rng.choice('abcdefgh') for _ in range(rng.randint(1, 8))) for _ in range(num_terms)})
+    term_postings = []
+    for term in terms:
+        docs = sorted(rng.sample(docIDs, rng.randint(1, num_docs)))
+        term_postings.append((term, [(doc, sorted(rng.sample(range(2000), rng.randint(1, 6)))) for doc in docs]))
+    return term_postings, docIDs
+
+@pytest.fixture
+def index(tmp_path):
+    term_postings, docIDs = make_index(random.Random(0), 40, 5 * BLOCK_SIZE) # several lexicon blocks
+    prefix = str(tmp_path / 'test')
+    write_index(term_postings, docIDs, prefix)
+    with IndexReader(prefix) as reader:
+        yield reader, dict(term_postings), docIDs
+
+def test_index_round_trip(index):
+    reader, expected, docIDs = index
+    assert reader.docIDs == docIDs
+    assert list(reader.terms()) == sorted(expected)
+    lengths = dict.fromkeys(docIDs, 0)
+    for term, postings in expected.items():
+        docs = [doc for doc, _ in postings]
+        assert reader.postings(term) == docs
+        assert reader.df(term) == len(docs)
+        assert reader.max_tf(term) == max(len(pos) for _, pos in postings)
+        assert reader.frequencies(term) == (docs, [len(pos) for _, pos in postings])
+        assert reader.positions(term) == dict(postings)
+        for doc, pos in postings:
+            lengths[doc] += len(pos)
+    assert reader.doc_lengths == [lengths[doc] for doc in docIDs]
+    assert [(term, positions) for term, positions in reader.items()] == [(term, dict(postings)) for term, postings in sorted(expected.items())]
+
+def test_missing_terms(index):
+    reader = index[0]
+    for term in ('', 'zzz', 'a' * 20, '0'):
+        assert term not in reader
+        assert reader.postings(term) == []
+        assert reader.df(term) == 0
+        assert reader.positions(term) == {}
+
+def test_positions_of_some_documents(index):
+    reader, expected, docIDs = index
+    rng = random.Random(1)
+    for term, postings in expected.items():
+        docs = sorted(rng.sample(docIDs, 10))
+        assert reader.positions(term, docs) == {doc: pos for doc, pos in postings if doc in docs}
+
+def test_prefix_and_kgram_terms(index):
+    reader, expected, _ = index
+    assert list(reader.prefix_terms('ab')) == sorted(t for t in expected if t.startswith('ab'))
+    grams = kgrams('abc')
+    assert reader.kgram_terms(grams) == sorted(t for t in expected if grams <= kgrams(t))
@@ -0,0 +1,77 @@
+"""
+Tests of the postings list operators in postings.py, checked against the same operations on Python sets.
+
+Run them from the root of the repository:
+
+    python -m pytest benchmarks
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from postings import complement, difference, gallop, intersect, intersect_many, union, union_many
+
+# the sizes of the pairs of lists, so both the merge and the galloping paths of every operator are taken
+SIZES = [(0, 0), (0, 50), (1, 1), (5, 5), (50, 60), (3, 500), (500, 3), (40, 5000), (2000, 2000)]
+
+def make_postings(rng, size, universe):
+    """
+    This function returns a random sorted postings list, see bench_postings.make_postings().
+    """
+
+    return sorted(rng.sample(range(1, universe + 1), size))
+
+@pytest.fixture
+def rng():
+    return random.Random(0)
+
+@pytest.mark.parametrize('n1, n2', SIZES)
+def test_intersect(rng, n1, n2):
+    p1 = make_postings(rng, n1, 2 * max(n1, n2, 1))
+    p2 = make_postings(rng, n2, 2 * max(n1, n2, 1))
+    assert intersect(p1, p2) == sorted(set(p1) & set(p2))
+
+@pytest.mark.parametrize('n1, n2', SIZES)
+def test_union(rng, n1, n2):
+    p1 = make_postings(rng, n1, 2 * max(n1, n2, 1))
+    p2 = make_postings(rng, n2, 2 * max(n1, n2, 1))
+    assert union(p1, p2) == sorted(set(p1) | set(p2))
+
+@pytest.mark.parametrize('n1, n2', SIZES)
+def test_difference(rng, n1, n2):
+    p1 = make_postings(rng, n1, 2 * max(n1, n2, 1))
+    p2 = make_postings(rng, n2, 2 * max(n1, n2, 1))
+    assert difference(p1, p2) == sorted(set(p1) - set(p2))
+
+def test_operators_do_not_modify_their_inputs(rng):
+    p1 = make_postings(rng, 30, 100)
+    p2 = make_postings(rng, 1000, 2000)
+    copies = (list(p1), list(p2))
+    for operator in (intersect, union, difference):
+        operator(p1, p2)
+        operator(p2, p1)
+    assert (p1, p2) == copies
+
+def test_complement(rng):
+    docIDs = list(range(1, 301))
+    p = make_postings(rng, 120, 300)
+    assert complement(p, docIDs) == sorted(set(docIDs) - set(p))
+    assert complement([], docIDs) == docIDs
+    assert complement(docIDs, docIDs) == []
+
+def test_intersect_many_and_union_many(rng):
+    lists = [make_postings(rng, size, 1000) for size in (400, 20, 700, 300)]
+    assert intersect_many(lists) == sorted(set.intersection(*map(set, lists)))
+    assert union_many(lists) == sorted(set.union(*map(set, lists)))
+    assert union_many([[1, 2]]) == [1, 2]
+
+def test_gallop():
+    p = [2, 4, 6, 8, 10]
+    assert [gallop(p, value) for value in (1, 2, 3, 10, 11)] == [0, 0, 1, 4, 5]
+    assert gallop(p, 9, 2) == 4 # the search starts at low
+    assert gallop(p, 9, 4) == 4
@@ -0,0 +1,100 @@
+"""
+Tests of the boolean query parser in query_parser.py.
+
+Run them from the root of the repository:
+
+    python -m pytest benchmarks
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # so the modules at the root of the repository can be imported
+
+from query_parser import And, Near, Not, Or, Phrase, Term, Wildcard, canonical, parse_query, query_patterns, query_terms
+
+def normalize(word):
+    """
+    A stand-in for normalizer.query_word_terms() that needs no NLTK: 'the' is a stopword, and words are split at '-' like the documents.
+    """
+
+    return [part.lower() for part in word.split('-') if part and part.lower() != 'the']
+
+def parse(query):
+    return parse_query(query, normalize)
+
+def test_precedence():
+    node = parse('a OR b AND NOT c')
+    assert isinstance(node, Or)
+    assert isinstance(node.children[1], And)
+    assert isinstance(node.children[1].children[1], Not)
+    assert canonical(node) == "OR('a' AND('b' NOT('c')))"
+
+def test_parentheses_and_flattening():
+    assert canonical(parse('(a AND b) AND c')) == "AND('a' 'b' 'c')"
+    assert canonical(parse('a AND (b OR c)')) == "AND('a' OR('b' 'c'))"
+    assert canonical(parse('(heart OR lung)')) == "OR('heart' 'lung')" # parentheses touching a term are tokens of their own
+
+def test_canonical_is_the_same_for_equivalent_queries():
+    assert canonical(parse('b AND a')) == canonical(parse('A AND B'))
+    assert canonical(parse('a AND b AND a')) == canonical(parse('b AND a'))
+    assert canonical(parse('x y /3')) == canonical(parse('y x /3'))
+    assert canonical(parse('x y +3')) != canonical(parse('y x +3')) # the order of an ordered window matters
+
+def test_phrase():
+    node = parse('"Heart the Failure"')
+    assert isinstance(node, Phrase)
+    assert node.terms == ['heart', 'failure'] # the stopword is dropped, as it is from the positions of the index
+    assert isinstance(parse('"heart"'), Term)
+
+def test_split_word_is_a_phrase():
+    node = parse('machine-learning')
+    assert isinstance(node, Phrase)
+    assert node.terms == ['machine', 'learning']
+
+def test_stopword_matches_nothing():
+    node = parse('the')
+    assert isinstance(node, Term)
+    assert node.term == ''
+
+def test_proximity():
+    node = parse('heart attack /3')
+    assert isinstance(node, Near)
+    assert (node.terms, node.k, node.ordered) == (['heart', 'attack'], 3, False)
+    node = parse('heart attack +2')
+    assert (node.k, node.ordered) == (2, True)
+    assert parse('heart the attack /3').terms == ['heart', '', 'attack'] # a stopword is kept as a term that matches nothing
+
+def test_wildcard():
+    node = parse('Retriev**al')
+    assert isinstance(node, Wildcard)
+    assert node.pattern == 'retriev*al'
+    assert query_patterns(parse('a AND NOT re*')) == {'re*'}
+    assert query_patterns(parse('a AND NOT re*'), negated=False) == set()
+
+def test_query_terms():
+    node = parse('a AND NOT b OR "c d" OR e*')
+    assert query_terms(node) == {'a', 'b', 'c', 'd'}
+    assert query_terms(node, negated=False) == {'a', 'c', 'd'}
+
+def test_empty_query():
+    assert parse('') is None
+    assert parse('   ') is None
+
+@pytest.mark.parametrize('query', [
+    'a AND',
+    'a b',
+    '(a OR b',
+    'a OR b)',
+    'AND a',
+    '"heart failure',
+    'heart /3',
+    '"heart fail*"',
+    'heart fail* /3',
+    '*',
+])
+def test_invalid_queries(query):
+    with pytest.raises(ValueError):
+        parse(query)
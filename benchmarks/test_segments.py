@@ -0,0 +1,99 @@
+"""
+Tests of the segmented index in segments.py: an index updated with a delta segment and tombstones, and the same index once its segments
+are merged, must both read exactly like an index rebuilt from scratch. They need NLTK for stemming.
+
+Run them from the root of the repository:
+
+    python -m pytest benchmarks
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+
+import pytest
+
+nltk_tokenize = pytest.importorskip('nltk.tokenize')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT) # so the modules at the root of the repository can be imported
+
+import index_creation
+from index_creation import build_indexes, get_docIDs, merge_segments, update_indexes
+from index_format import IndexReader
+from segments import MANIFEST, SegmentedIndex
+
+INDEX_DIR = 'index'
+WORDS = ['heart', 'attack', 'failure', 'lung', 'cancer', 'model', 'learning', 'retrieval', 'search', 'engine', 'query', 'index',
+         'network', 'neural', 'graph', 'data', 'vector', 'ranking', 'document', 'term']
+
+def write_document(doc, rng, length=60):
+    with open(os.path.join('ResearchPapers', '{}.txt'.format(doc)), 'w') as f:
+        f.write(' '.join(rng.choice(WORDS) for _ in range(length)) + '\n')
+
+def contents(index):
+    """
+    This function returns everything a query can read from an index: its docIDs and document lengths, and the postings, frequencies and positions of every term.
+    """
+
+    doc_lengths = index.doc_lengths
+    if isinstance(doc_lengths, list):
+        doc_lengths = dict(zip(index.docIDs, doc_lengths))
+    terms = {term: (index.postings(term), index.frequencies(term), positions) for term, positions in index.items()}
+    return index.docIDs, doc_lengths, terms
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """
+    A directory with the stopwords, 'ResearchPapers' and an index, as the modules expect to find them in the working directory.
+    """
+
+    monkeypatch.setattr(nltk_tokenize, 'word_tokenize', str.split) # the documents are words separated by spaces, so the punkt models are not needed
+    monkeypatch.setattr(index_creation, 'needs_merge', lambda *args: False) # the merge is run by the test, not on a background thread
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(ROOT, 'Stopword-List.txt'), 'Stopword-List.txt')
+    os.mkdir('ResearchPapers')
+    rng = random.Random(0)
+    for doc in range(1, 21):
+        write_document(doc, rng)
+    update_indexes(index_dir=INDEX_DIR)
+    return rng
+
+def update(rng):
+    """
+    This function changes, removes and adds documents, and updates the index with a delta segment.
+    """
+
+    write_document(2, rng, 10)
+    write_document(7, rng)
+    os.remove(os.path.join('ResearchPapers', '5.txt'))
+    write_document(21, rng)
+    update_indexes(index_dir=INDEX_DIR)
+
+def rebuilt():
+    build_indexes(get_docIDs(), 'rebuilt')
+    with IndexReader('rebuilt') as reader:
+        return contents(reader)
+
+def test_update_reads_like_a_rebuild(corpus):
+    update(corpus)
+    with open(os.path.join(INDEX_DIR, MANIFEST)) as f:
+        segments = json.load(f)['segments']
+    assert len(segments) == 2
+    assert segments[0]['deleted'] == [2, 5, 7]
+    with SegmentedIndex(INDEX_DIR) as index:
+        assert contents(index) == rebuilt()
+
+def test_merge_reads_like_a_rebuild(corpus):
+    update(corpus)
+    merge_segments(INDEX_DIR)
+    with open(os.path.join(INDEX_DIR, MANIFEST)) as f:
+        segments = json.load(f)['segments']
+    assert len(segments) == 1
+    assert segments[0]['deleted'] == []
+    with SegmentedIndex(INDEX_DIR) as index:
+        assert contents(index) == rebuilt()
+        assert index.document(2)[0] == open(os.path.join('ResearchPapers', '2.txt'), 'rb').read() # the document store was merged too
+        assert index.document(5) == (None, [], [])
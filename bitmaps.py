@@ -0,0 +1,246 @@
+from postings import complement, difference, intersect, union
+
+try:
+    import numpy as np
+except ImportError: # postings lists are then always kept as sorted lists, see DocSpace.is_dense()
+    np = None
+
+DENSE_RATIO = 32 # a postings list is kept as a bitmap when it holds at least one in DENSE_RATIO of the documents
+
+# Postings lists of common terms are stored as bitmaps, with one bit per document of the index, instead of sorted lists of docIDs.
+# A bitmap is a Python int, so AND, OR and AND NOT of two bitmaps are single bitwise operations that CPython runs a machine word at a time,
+# and the complement is a bitwise NOT masked by the bits of the live documents. The functions below take either representation and pick
+# the cheapest way to combine them.
+#
+# The bitmap of a common term is read straight from the docs sections of the index with NumPy (see read_bitmap()): the varints are decoded
+# in bulk, the bits of the docIDs are looked up in a table and packed with packbits, so no list of the docIDs is ever built. A bitmap is
+# turned back into a list with unpackbits. Done with a Python loop over the docIDs, these conversions cost more than the bitwise operations
+# save, so without NumPy no postings list is dense and the lists are merged as before.
+
+class DocSpace:
+    """
+    This class numbers the live documents of an index, so a document can be given a bit in a bitmap.
+
+    Bit i of a bitmap stands for docIDs[i].
+    """
+
+    def __init__(self, docIDs):
+        self.docIDs = docIDs
+        self._array = None # built on first use, so opening an index does not pay for it
+        self._table = None
+        self.nbytes = (len(docIDs) + 7) // 8 # the size of a bitmap in bytes
+        self.live = (1 << len(docIDs)) - 1 # a bitmap with the bit of every live document set
+
+    @property
+    def array(self):
+        """
+        The docIDs as a NumPy array.
+        """
+
+        if self._array is None:
+            self._array = np.array(self.docIDs, dtype=np.int64)
+        return self._array
+
+    @property
+    def table(self):
+        """
+        A NumPy array that holds the bit of every live docID at the index of the docID. DocIDs are the numbers of the files, so it is small.
+        """
+
+        if self._table is None:
+            self._table = np.zeros(self.docIDs[-1] + 1 if self.docIDs else 1, dtype=np.int64)
+            self._table[self.array] = np.arange(len(self.docIDs))
+        return self._table
+
+    def ordinals(self, p):
+        """
+        This function returns the bit of every docID of a postings list, looked up in the table.
+
+        Args:
+            p (list or numpy.ndarray): DocIDs of live documents.
+
+        Returns:
+            ordinals (numpy.ndarray): The bits of the docIDs, in the same order.
+        """
+
+        return self.table[np.asarray(p, dtype=np.int64)]
+
+    def is_dense(self, size):
+        """
+        This function decides whether a postings list of a given size is better kept as a bitmap.
+        """
+
+        return np is not None and size * DENSE_RATIO >= len(self.docIDs)
+
+class Bitmap:
+    """
+    A postings list stored as a bitmap over the documents of a DocSpace.
+    """
+
+    __slots__ = ('bits', 'space')
+
+    def __init__(self, bits, space):
+        self.bits = bits
+        self.space = space
+
+    def __len__(self):
+        return self.bits.bit_count() # the number of documents in the postings list
+
+    def to_bytes(self):
+        """
+        This function returns the bitmap as little endian bytes, so bit i of the bitmap is bit i % 8 of byte i // 8.
+        """
+
+        return self.bits.to_bytes(self.space.nbytes, 'little')
+
+    def mask(self):
+        """
+        This function returns the bitmap as a NumPy array of booleans, one for every document of the DocSpace.
+        """
+
+        data = np.frombuffer(self.to_bytes(), dtype=np.uint8)
+        return np.unpackbits(data, count=len(self.space.docIDs), bitorder='little').view(bool)
+
+    def to_list(self):
+        """
+        This function returns the docIDs of the bitmap as a sorted list.
+        """
+
+        return self.space.array[np.flatnonzero(self.mask())].tolist()
+
+def pack(mask, space):
+    """
+    This function packs a NumPy array of booleans, one for every document of a DocSpace, into a bitmap.
+    """
+
+    return Bitmap(int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little'), space)
+
+def decode_docs(data):
+    """
+    This function decodes a docs section of the index (the delta encoded varints of a sorted list of docIDs) with NumPy.
+
+    Every varint ends at its only byte without the continuation bit. The lower seven bits of every byte are shifted by seven times the
+    place of the byte in its varint and summed per varint with add.reduceat(), and the gaps are added up with cumsum().
+
+    Args:
+        data (bytes or mmap slice): The encoded bytes.
+
+    Returns:
+        docIDs (numpy.ndarray): The sorted docIDs.
+    """
+
+    data = np.frombuffer(data, dtype=np.uint8)
+    if not len(data) or data.max() < 0x80: # if no byte has the continuation bit set, every byte is a gap of its own
+        return np.cumsum(data, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    place = np.arange(len(data)) - np.repeat(starts, ends - starts + 1) # the place of every byte in its varint
+    gaps = np.add.reduceat((data & 0x7f).astype(np.int64) << (7 * place), starts)
+    return np.cumsum(gaps)
+
+def read_bitmap(parts, space):
+    """
+    This function builds the bitmap of a term from its encoded docs sections, without decoding them to lists.
+
+    Args:
+        parts (list): (docs section, sorted deleted docIDs) pairs, one for every segment (see SegmentedIndex.encoded_postings()).
+        space (DocSpace): The documents of the index.
+
+    Returns:
+        bitmap (Bitmap): The live documents the term appears in, as a bitmap.
+    """
+
+    mask = np.zeros(space.nbytes * 8, dtype=bool)
+    for data, deleted in parts:
+        docs = decode_docs(data)
+        if deleted: # the documents deleted from a segment are not in the DocSpace, so they are dropped before looking up their bits
+            docs = docs[np.isin(docs, deleted, invert=True)]
+        mask[space.ordinals(docs)] = True
+    return pack(mask, space)
+
+def to_bitmap(p, space):
+    """
+    This function converts a postings list to a bitmap.
+
+    Args:
+        p (list or Bitmap): The postings list. A list may hold a docID more than once.
+        space (DocSpace): The documents of the index.
+
+    Returns:
+        bitmap (Bitmap): The postings list as a bitmap.
+    """
+
+    if isinstance(p, Bitmap):
+        return p
+    mask = np.zeros(space.nbytes * 8, dtype=bool)
+    mask[space.ordinals(p)] = True
+    return pack(mask, space)
+
+def to_list(p):
+    """
+    This function converts a postings list to a sorted list of docIDs.
+    """
+
+    return p.to_list() if isinstance(p, Bitmap) else p
+
+def filter_list(p, bitmap, keep):
+    """
+    This function keeps the docIDs of a list whose bit in a bitmap is set (keep=True) or not set (keep=False).
+    """
+
+    if not p:
+        return []
+    docs = np.asarray(p, dtype=np.int64)
+    found = bitmap.mask()[bitmap.space.ordinals(docs)]
+    return docs[found if keep else ~found].tolist()
+
+def hybrid_intersect(p1, p2):
+    """
+    This function returns the intersection of two postings lists, each a sorted list or a bitmap.
+
+    Two bitmaps are ANDed. A list and a bitmap give a list, since the result can not be longer than the list.
+    """
+
+    if isinstance(p1, Bitmap) and isinstance(p2, Bitmap):
+        return Bitmap(p1.bits & p2.bits, p1.space)
+    if isinstance(p1, Bitmap):
+        return filter_list(p2, p1, True)
+    if isinstance(p2, Bitmap):
+        return filter_list(p1, p2, True)
+    return intersect(p1, p2)
+
+def hybrid_union(p1, p2):
+    """
+    This function returns the union of two postings lists, each a sorted list or a bitmap.
+
+    If either is a bitmap, the other is converted and the two are ORed.
+    """
+
+    if isinstance(p1, Bitmap) or isinstance(p2, Bitmap):
+        space = p1.space if isinstance(p1, Bitmap) else p2.space
+        return Bitmap(to_bitmap(p1, space).bits | to_bitmap(p2, space).bits, space)
+    return union(p1, p2)
+
+def hybrid_difference(p1, p2):
+    """
+    This function returns the docIDs of p1 that are not in p2, each a sorted list or a bitmap (AND NOT).
+    """
+
+    if isinstance(p1, Bitmap):
+        return Bitmap(p1.bits & ~to_bitmap(p2, p1.space).bits, p1.space)
+    if isinstance(p2, Bitmap):
+        return filter_list(p1, p2, False)
+    return difference(p1, p2)
+
+def hybrid_complement(p, space):
+    """
+    This function returns the live documents that are not in a postings list.
+
+    The complement of all but the rarest terms is dense, so it is returned as a bitmap: a bitwise NOT masked by the live documents.
+    """
+
+    if isinstance(p, Bitmap) or space.is_dense(len(space.docIDs) - len(p)):
+        return Bitmap(space.live & ~to_bitmap(p, space).bits, space)
+    return complement(p, space.docIDs)
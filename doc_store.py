@@ -0,0 +1,250 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from index_format import decode_varints, encode_varint, map_file, read_varint
+from normalizer import MAX_WORD_LENGTH, stopwords
+
+# layout of the document store file '<prefix>.docs', saved with every segment and holding the text of its documents:
+#   header  : magic, number of documents
+#   docIDs  : one unsigned 32 bit integer per document, sorted
+#   offsets : for every document, where its record starts in the records area (unsigned 64 bit integers)
+#   records : for every document, a varint of the length of its text in utf-8 bytes, the text itself, a varint of the number of its
+#             positions, and for every position (every term indexed in the document, in order) the varints of how many bytes its term
+#             starts after the term of the previous position, and of the length of its term in bytes
+# the spans let a snippet around a position of the positional index be cut straight from the mapped text, without tokenizing it again
+DOCS_MAGIC = b'BRMDOC1\0'
+DOCS_HEADER = struct.Struct('<8sI')
+SNIPPET_RADIUS = 80 # the number of bytes of text shown on each side of the first match of a snippet
+HIGHLIGHT = ('[', ']') # what the matched terms of a snippet are wrapped in
+
+def term_spans(text, words):
+    """
+    This function finds where the indexed terms of a document are in its text.
+
+    The words are found one after the other in the lowercased text, so every word is matched after the previous one. The stopwords and
+    the words longer than 45 characters are skipped the same way index_terms() skips them, so the span of position p is the span of the
+    p-th term of the positional index.
+
+    Args:
+        text (str): The text of the document.
+        words (list): The cleaned words of the text, as returned by tokenize().
+
+    Returns:
+        spans (list): A (start, length) pair, in utf-8 bytes, for every position of the document.
+    """
+
+    lowered = text.lower()
+    if len(lowered) != len(text): # a few characters change length when lowercased, the offsets would no longer match
+        lowered = text
+    byte_offsets = None if text.isascii() else list(accumulate((len(c.encode('utf-8')) for c in text), initial=0)) # character to byte offset
+
+    stop = stopwords()
+    spans = []
+    cursor = 0
+    for word in words:
+        start = lowered.find(word, cursor)
+        if start == -1: # the tokenizer changed the word (e.g. its quotes), it is kept in order with an empty span
+            start, end = cursor, cursor
+        else:
+            end = start + len(word)
+            cursor = end
+        if word not in stop and len(word) <= MAX_WORD_LENGTH:
+            if byte_offsets is not None:
+                start, end = byte_offsets[start], byte_offsets[end]
+            spans.append((start, end - start))
+    return spans
+
+def encode_document(text, spans):
+    """
+    This function encodes the record of a document.
+
+    Args:
+        text (str): The text of the document.
+        spans (list): The (start, length) pairs of its positions, see term_spans().
+
+    Returns:
+        record (bytearray): The encoded record.
+    """
+
+    data = text.encode('utf-8')
+    record = bytearray()
+    encode_varint(len(data), record)
+    record += data
+    encode_varint(len(spans), record)
+    previous = 0
+    for start, length in spans:
+        encode_varint(start - previous, record)
+        encode_varint(length, record)
+        previous = start
+    return record
+
+def write_doc_store(documents, path):
+    """
+    This function writes a document store.
+
+    Args:
+        documents (list): (docID, record) pairs sorted by docID, where record is the encoded record of the document (see encode_document()).
+        path (str): The path of the file.
+    """
+
+    offsets = array('Q')
+    offset = 0
+    for _, record in documents:
+        offsets.append(offset)
+        offset += len(record)
+    docIDs = array('I', [doc for doc, _ in documents])
+    if sys.byteorder == 'big': # the tables are little endian, like the rest of the index
+        docIDs.byteswap()
+        offsets.byteswap()
+
+    with open(path, 'wb') as f:
+        f.write(DOCS_HEADER.pack(DOCS_MAGIC, len(documents)))
+        f.write(docIDs.tobytes())
+        f.write(offsets.tobytes())
+        for _, record in documents:
+            f.write(record)
+
+def merge_doc_stores(parts, path):
+    """
+    This function merges the document stores of several segments into one, leaving out the deleted documents. The records are copied as they are.
+
+    Args:
+        parts (list): (DocStore, deleted docIDs) pairs, one for every segment. Every live document must be in a single one of them.
+        path (str): The path of the merged file.
+    """
+
+    live = []
+    for store, deleted in parts:
+        deleted = set(deleted)
+        live.extend((doc, store) for doc in store.docIDs if doc not in deleted)
+    live.sort(key=lambda item: item[0])
+    write_doc_store([(doc, store.record(doc)) for doc, store in live], path)
+
+class DocStore:
+    """
+    This class reads a document store saved by write_doc_store() through a memory map.
+
+    Opening a store only reads its docIDs and offsets. The text of a document is sliced from the map when it is asked for, so a snippet
+    never reads the other documents.
+    """
+
+    def __init__(self, path):
+        self._file, self._data = map_file(path)
+        magic, num_docs = DOCS_HEADER.unpack_from(self._data, 0)
+        if magic != DOCS_MAGIC:
+            raise ValueError("'{}' is not a document store".format(path))
+
+        start = DOCS_HEADER.size
+        docIDs = array('I')
+        docIDs.frombytes(self._data[start:start + 4 * num_docs])
+        self._offsets = array('Q')
+        self._offsets.frombytes(self._data[start + 4 * num_docs:start + 12 * num_docs])
+        if sys.byteorder == 'big':
+            docIDs.byteswap()
+            self._offsets.byteswap()
+        self.docIDs = docIDs.tolist() # the sorted docIDs of the documents in the store
+        self._records = start + 12 * num_docs # where the records start
+
+    def close(self):
+        """
+        This function closes the memory map and the file.
+        """
+
+        if not isinstance(self._data, bytes):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _find(self, doc):
+        """
+        This function returns the number of a document in the store, or None if it is not in it.
+        """
+
+        i = bisect_left(self.docIDs, doc)
+        return i if i < len(self.docIDs) and self.docIDs[i] == doc else None
+
+    def __contains__(self, doc):
+        return self._find(doc) is not None
+
+    def record(self, doc):
+        """
+        This function returns the encoded record of a document, as a slice of the map.
+        """
+
+        i = self._find(doc)
+        if i is None:
+            return None
+        start = self._records + self._offsets[i]
+        end = self._records + self._offsets[i + 1] if i + 1 < len(self._offsets) else len(self._data)
+        return self._data[start:end]
+
+    def document(self, doc):
+        """
+        This function decodes the record of a document.
+
+        Args:
+            doc (int): The docID.
+
+        Returns:
+            text (bytes): The text of the document in utf-8, or None if the document is not in the store.
+            starts (list): Where the term of every position starts in the text, in bytes.
+            lengths (list): The length of the term of every position, in bytes.
+        """
+
+        record = self.record(doc)
+        if record is None:
+            return None, [], []
+        length, offset = read_varint(record, 0)
+        text = record[offset:offset + length]
+        values = decode_varints(record[offset + length:])[1:] # the number of positions comes first
+        return text, list(accumulate(values[0::2])), values[1::2]
+
+def snippet(text, starts, lengths, positions, radius=SNIPPET_RADIUS, highlight=HIGHLIGHT):
+    """
+    This function cuts a snippet of a document around the first of some positions, with the terms at the positions highlighted.
+
+    The snippet starts and ends at a space, so no word is cut, and its whitespace is collapsed to single spaces. '...' marks where text was left out.
+
+    Args:
+        text (bytes): The text of the document in utf-8.
+        starts (list): Where the term of every position starts in the text, in bytes.
+        lengths (list): The length of the term of every position, in bytes.
+        positions (list): The sorted positions to highlight, e.g. the positions of the query terms in the document.
+        radius (int): The number of bytes shown on each side of the first position.
+        highlight (tuple): The strings written before and after every highlighted term.
+
+    Returns:
+        snippet (str): The snippet, or the start of the document if there are no positions.
+    """
+
+    positions = [p for p in positions if p < len(starts)]
+    first = starts[positions[0]] if positions else 0
+    first_end = first + lengths[positions[0]] if positions else 0
+    low = max(0, first - radius)
+    high = min(len(text), first_end + radius)
+    if low > 0:
+        space = text.find(b' ', low, first)
+        low = space + 1 if space != -1 else low
+    if high < len(text):
+        space = text.rfind(b' ', first_end, high)
+        high = space if space != -1 else high
+
+    pieces = ['... '] if low > 0 else []
+    cursor = low
+    for p in positions:
+        start, end = starts[p], starts[p] + lengths[p]
+        if start < cursor or end > high or start == end: # outside the snippet, or a term that was not found in the text
+            continue
+        pieces += [bytes(text[cursor:start]).decode('utf-8', 'ignore'), highlight[0], bytes(text[start:end]).decode('utf-8', 'ignore'), highlight[1]]
+        cursor = end
+    pieces.append(bytes(text[cursor:high]).decode('utf-8', 'ignore'))
+    if high < len(text):
+        pieces.append(' ...')
+    return ' '.join(''.join(pieces).split())
@@ -1,28 +1,29 @@
+import argparse
+import instrumentation
+import heapq
+import io
+import multiprocessing
 import os
-from nltk.stem import PorterStemmer
-from nltk.tokenize import word_tokenize
-
-def get_stopwords():
-    """
-    This function is used to extract stopwords from 'Stopword-List.txt' file.
-
-    It reads each line from the file, and if the line is not empty, it appends the line to the stopwords list.
-    The function continues this process until it reaches the end of the file. Assumes the file is in your current working directory.
-
-    Returns:
-        stopwords (list): A list of stopwords extracted from the file.
-    """
-
-    stopwords = []
-    with open('Stopword-List.txt', 'r') as f: # the 'Stopword-List.txt' file is opened in read mode
-        while True:
-            text = f.readline() # each line from the file is read one by one
-            if not text: # if the line read is empty (which means end of file), the loop is broken
-                break
-            stopwords.append(text) # else append the read line to the stopwords list
-
-    stopwords = [c.rstrip(' \n') for c in stopwords if c != '\n'] # a new list is created from stopwords, excluding any newline characters. Newline characters are also removed from the strings.
-    return stopwords
+import tempfile
+import threading
+from itertools import count, groupby
+from doc_store import DocStore, encode_document, merge_doc_stores, term_spans, write_doc_store
+from index_format import IndexReader, decode_varints, encode_varint, read_varint, write_index, write_sections
+from normalizer import MAX_WORD_LENGTH, get_stopwords, index_terms, stem, stopwords, tokenize
+from segments import INDEX_DIR, SegmentedIndex, collect_garbage, empty_manifest, fingerprint, load_manifest, needs_merge, new_segment, remove_segment, save_manifest, writer_lock
+
+try:
+    import numpy as np
+except ImportError: # the vectorized build (--vectorized) is then not available
+    np = None
+
+MEMORY_BUDGET_MB = 256 # the default number of megabytes the in-memory postings may take while building the indexes
+
+# rough sizes, in bytes, of what a block of postings holds in memory, used to decide when the block is full
+TERM_BYTES = 120 # a dictionary entry, the term string and its list of postings
+POSTING_BYTES = 130 # a (docID, positions) tuple, its docID and its list of positions
+POSITION_BYTES = 36 # a position and its slot in the list of positions
+VECTOR_TOKEN_BYTES = 80 # a token of a vectorized block: its term ID, its term, docID and position in the arrays the block is sorted in, and its gap and varint bytes
 
 def get_docIDs():
     """
@@ -37,7 +38,7 @@ def get_docIDs():
     """
 
     curr_dir = os.getcwd() # get the current directory
-    docID = [int(c.rstrip('.txt')) for c in os.listdir(curr_dir + '\ResearchPapers')] # extract the docIDs from the names of the files in the ResearchPapers directory
+    docID = [int(c.rstrip('.txt')) for c in os.listdir(os.path.join(curr_dir, 'ResearchPapers'))] # extract the docIDs from the names of the files in the ResearchPapers directory
     docID.sort()
     return docID
 
@@ -53,18 +54,15 @@ def create_positional_index(total_tokens):
     """
 
     terms = {} # declare an empty dictionary for the positional index
-    porter_stemmer = PorterStemmer() # initialize the stemmer
 
     # get the stopwords. Although stopwords is not going to be inserted in the positional index, we still need them to find the correct positions of the rest of the words
-    stopwords = get_stopwords()
+    stop = stopwords()
     doc = get_docIDs() # get the docIDs
 
     for i, tokens in enumerate(total_tokens): # loop through each token in total_tokens, and then loop through each word in the token
         for j, word in enumerate(tokens):
-            if word not in stopwords and len(word) <= 45: # filter the stopwords
-                word = porter_stemmer.stem(word) # Stem the word
-                if word[-1] == "'": # if the word ends with an apostrophe, remove it
-                    word = word.rstrip("'")
+            if word not in stop and len(word) <= MAX_WORD_LENGTH: # filter the stopwords
+                word = stem(word) # stem the word (and remove a trailing apostrophe), repeated words come from the stem cache
                 if word in terms: # if the word is already in the positional index, add the docID to the index
                     if doc[i] in terms[word]: # if the docID is already in the index for that word, add the position
                         terms[word][doc[i]].append(j)
@@ -87,18 +85,15 @@ def create_inverted_index(total_tokens):
     """
 
     terms = {} # an empty dictionary for the inverted index
-    porter_stemmer = PorterStemmer() # initialize the stemmer
-    stopwords = get_stopwords() # get the stopwords
+    stop = stopwords() # get the stopwords
     doc = get_docIDs() # get the docIDs
 
     for i, tokens in enumerate(total_tokens): # loop through each token in total_tokens and remove the stopwords
-        total_tokens[i] = [c for c in tokens if c not in stopwords and len(c) <= 45]
+        total_tokens[i] = [c for c in tokens if c not in stop and len(c) <= MAX_WORD_LENGTH]
 
     for i, tokens in enumerate(total_tokens): # loop through each token in total_tokens again
         for word in tokens: # loop through each word in tokens
-            word = porter_stemmer.stem(word) # stem the word
-            if word[-1] == "'": # remove the apostrophe
-                word = word.rstrip("'")
+            word = stem(word) # stem the word (and remove a trailing apostrophe)
             if word in terms: # if the word is already in the inverted index
                 if doc[i] not in terms[word]: # append the docID if it isn't in the index
                     terms[word].append(doc[i])
@@ -107,12 +102,56 @@ def create_inverted_index(total_tokens):
     print("Inverted Index created")
     return terms    
 
+def document_path(docID):
+    """
+    This function returns the path of a document in the 'ResearchPapers' directory.
+
+    Args:
+        docID (int): The docID of the document.
+
+    Returns:
+        path (str): The path of the document.
+    """
+
+    return 'ResearchPapers/' + str(docID) + '.txt'
+
+def read_tokens(docID):
+    """
+    This function reads and preprocesses a single document from the 'ResearchPapers' directory.
+
+    It tokenizes the text, removes punctuation and converts the text to lowercase. It also splits the tokens at '.' and '-' (see normalizer.py).
+
+    Args:
+        docID (int): The docID of the document.
+
+    Returns:
+        tokens (list): The preprocessed tokens of the document.
+    """
+
+    with open(document_path(docID), 'r') as f: # open the file corresponding to the document ID
+        return tokenize(f) # tokenize the file line by line
+
+def read_document(docID):
+    """
+    This function reads a single document and preprocesses it like read_tokens(), also returning its text for the document store.
+
+    Args:
+        docID (int): The docID of the document.
+
+    Returns:
+        text (str): The text of the document.
+        tokens (list): The preprocessed tokens of the document.
+    """
+
+    with open(document_path(docID), 'r') as f:
+        text = f.read()
+    return text, tokenize(io.StringIO(text)) # split into the same lines as reading the file line by line
+
 def preprocessing():
     """
     This function is used to preprocess the text files in the 'ResearchPapers' directory.
 
-    It reads each file, tokenizes the text, removes punctuation and converts the text to lowercase. 
-    It also splits the tokens at '.' and '-'. Assumes the 'ResearchPapers' folder is in your current working directory.
+    It reads each file and preprocesses it with read_tokens(). Assumes the 'ResearchPapers' folder is in your current working directory.
 
     Returns:
         total_tokens (list): A list of preprocessed tokens from all the files.
@@ -122,68 +161,550 @@ def preprocessing():
     doc = get_docIDs() # get the docIDs
 
     for i in doc: # iterate through each doc
-        tokens = []
-        with open('ResearchPapers/' + str(i) +'.txt', 'r') as f: # open the file corresponding to the current document ID
-            while True:
-                text = f.readline() # read a line from the file
-                if not text: # if the line is empty (which means end of file), break the loop
-                    break
-                tokens += word_tokenize(text) # tokenize the line and add the tokens to the list
-
-        j = 0
-        while j < len(tokens): # loop through each token
-            # remove symbols and numbers from the start and end of the token and convert it to lowercase (case folding)
-            tokens[j] = tokens[j].lstrip('0123456789!@#$%^&*()-_=+[{]}\|;:\'",<.>/?`~').rstrip('0123456789!@#$%^&*()-_=+[{]}\|;:\'",<.>/?`~').lower()
-            if '.' in tokens[j]: # if '.' exists in a word, split the word at that point and add the splitted words at the end of the tokens list while removing the original word
-                word = tokens[j].split('.')
-                del tokens[j]
-                tokens.extend(word)
-            elif '-' in tokens[j]: # do the same for words with '-'
-                word = tokens[j].split('-')
-                del tokens[j]
-                tokens.extend(word)
-            j += 1 # move the index forward
-        tokens = [c for c in tokens if c.isalpha()] # filter out any strings that contain symbols, numbers, etc.
-        total_tokens.append(tokens) # add the processed tokens as a seperate list. Did this to keep track of which tokens appear in which docs (needed to construct indexes). List at index 0 indicate tokens found in doc 1 and so on.
+        total_tokens.append(read_tokens(i)) # add the processed tokens as a seperate list. Did this to keep track of which tokens appear in which docs (needed to construct indexes). List at index 0 indicate tokens found in doc 1 and so on.
     print("Preprocessing done")
     return total_tokens
 
 def save_indexes():
     """
-    This function preprocesses the data to generate tokens, creates an inverted index and a positional index from these tokens, and then saves these indexes to 'inverted_index.txt' and 'positional_index.txt' respectively.
+    This function preprocesses the data to generate tokens, creates an inverted index and a positional index from these tokens, and then saves them in the binary index format as a new index in the 'index' directory, replacing the old one.
 
     The preprocessing function is expected to return a list of tokens.
     The create_inverted_index function takes the tokens as input and returns a dictionary where the keys are the unique tokens and the values are the documents in which they appear.
     The create_positional_index function also takes the tokens as input and returns a dictionary where the keys are the unique tokens and the values are the positions in which they appear in the document.
 
-    The output files 'inverted_index.txt' and 'positional_index.txt' contain the string representation of the respective dictionaries, with each key-value pair on a new line.
-    """
-
-    tokens = preprocessing() # preprocessing function is called
-    inverted_index = create_inverted_index(tokens) # create_inverted_index function is called
-    positional_index = create_positional_index(tokens) # create_positional_index function is called
-
-    with open('inverted_index.txt', 'w') as f: # the inverted index is written to 'inverted_index.txt'
-        for key, value in inverted_index.items(): # loop through each key-value pair in the inverted index and output it to the file
-            f.write('{}:'.format(key))
-            for i in value:
-                f.write('{} '.format(i))
-            f.write('\n')
-    print("Inverted Index saved")
-    with open('positional_index.txt', 'w') as f: # do the same for positional index
-        for key, value in positional_index.items():
-            for k, v in value.items():
-                f.write('{}:{}.'.format(key, k))
-                for i in v:
-                    f.write('{} '.format(i))
-                f.write('\n')
-    print("Positional Index saved")
+    The index is saved as a single segment, where '.lex' holds the sorted terms (the lexicon) along with where their postings start in '.post', and '.post' holds the delta and varint encoded docIDs and positions (see index_format.py and segments.py).
+    The text of every document is saved in the document store '.docs' of the segment, for snippets (see doc_store.py).
+    """
+
+    with instrumentation.stage('preprocessing'):
+        tokens = preprocessing() # preprocessing function is called
+    words = list(tokens) # create_inverted_index() replaces the tokens of every document with the ones left once the stopwords are removed, the document store needs them all
+    with instrumentation.stage('create_inverted_index'):
+        inverted_index = create_inverted_index(tokens) # create_inverted_index function is called
+    with instrumentation.stage('create_positional_index'):
+        positional_index = create_positional_index(tokens) # create_positional_index function is called
+
+    # pair every term, in sorted order, with its docs and the positions of the term in each of them
+    term_postings = ((term, [(doc, positional_index[term][doc]) for doc in inverted_index[term]]) for term in sorted(inverted_index))
+    docIDs = get_docIDs()
+
+    def write(prefix): # the document store is saved with the segment, like build_indexes() does, so snippets work on this index too
+        write_index(term_postings, docIDs, prefix)
+        records = []
+        for doc, document_words in zip(docIDs, words): # the words of the i-th document are at index i
+            with open(document_path(doc), 'r') as f:
+                text = f.read()
+            records.append((doc, encode_document(text, term_spans(text, document_words))))
+        write_doc_store(records, prefix + '.docs')
+
+    with instrumentation.stage('write_index'):
+        replace_index(write)
+    print("Indexes saved")
+
+def document_postings(tokens):
+    """
+    This function turns the tokens of a single document into its postings, the same way create_inverted_index() and create_positional_index() do for the whole collection.
+
+    Stopwords and words longer than 45 characters are removed first, and the positions are counted over the words that are left.
+
+    Args:
+        tokens (list): The preprocessed tokens of the document.
+
+    Returns:
+        terms (dict): A dictionary of every term of the document to the positions it appears at.
+    """
+
+    terms = {}
+    for j, term in enumerate(index_terms(tokens)):
+        if term in terms:
+            terms[term].append(j)
+        else:
+            terms[term] = [j]
+    return terms
+
+def index_documents(docIDs, prefix, memory_budget):
+    """
+    This function indexes a range of documents in a single streaming pass (single-pass in-memory indexing, SPIMI).
+
+    The documents are read one at a time and their postings are added to an in-memory block, which gives both the inverted and the
+    positional index from one pass over every document. When the estimated size of the block reaches the memory budget, the block is
+    saved, sorted by term, as a partial index and a new block is started. The partial indexes are merged with merge_indexes().
+    The text of every document and the span of every position are saved along with the block, as its document store (see doc_store.py).
+
+    Args:
+        docIDs (list): The sorted docIDs of the documents to be indexed.
+        prefix (str): The prefix the partial indexes are saved under, followed by the number of the block.
+        memory_budget (int): The number of bytes a block may take before it is saved.
+
+    Returns:
+        prefixes (list): The prefixes of the saved partial indexes, in docID order.
+    """
+
+    prefixes = []
+
+    def save_block(terms, block_docIDs, records): # save a block as the next partial index
+        block_prefix = '{}.{}'.format(prefix, len(prefixes))
+        write_index(((term, terms[term]) for term in sorted(terms)), block_docIDs, block_prefix, kgram_index=False) # only merged, never searched
+        write_doc_store(records, block_prefix + '.docs')
+        prefixes.append(block_prefix)
+
+    terms = {} # every term of the block to its (docID, positions) pairs
+    block_docIDs = []
+    records = [] # the (docID, document store record) of every document of the block
+    size = 0 # the estimated number of bytes the block takes
+    for doc in docIDs: # the docIDs are sorted, so every postings list is built in docID order
+        text, tokens = read_document(doc)
+        for term, positions in document_postings(tokens).items():
+            if term in terms:
+                terms[term].append((doc, positions))
+            else:
+                terms[term] = [(doc, positions)]
+                size += TERM_BYTES + len(term)
+            size += POSTING_BYTES + POSITION_BYTES * len(positions)
+        block_docIDs.append(doc)
+        records.append((doc, encode_document(text, term_spans(text, tokens))))
+        size += len(records[-1][1])
+
+        if size >= memory_budget: # the block is full, save it and start a new one
+            save_block(terms, block_docIDs, records)
+            terms = {}
+            block_docIDs = []
+            records = []
+            size = 0
+
+    if block_docIDs or not prefixes: # save what is left (an empty range still gets an empty partial index)
+        save_block(terms, block_docIDs, records)
+    return prefixes
+
+def index_documents_vectorized(docIDs, prefix, memory_budget):
+    """
+    This function indexes a range of documents in streaming blocks like index_documents(), but turns every block into postings with NumPy array operations.
+
+    While a block is read, every term is mapped to an integer ID through the vocabulary of the block, and each document only adds an array
+    of term IDs, so no per-term lists are built. When the block is saved, vectorized_sections() sorts the tokens by term and encodes their postings.
+
+    Args:
+        docIDs (list): The sorted docIDs of the documents to be indexed.
+        prefix (str): The prefix the partial indexes are saved under, followed by the number of the block.
+        memory_budget (int): The number of bytes a block may take before it is saved.
+
+    Returns:
+        prefixes (list): The prefixes of the saved partial indexes, in docID order.
+    """
+
+    prefixes = []
+
+    def save_block(vocabulary, ids, lengths, block_docIDs, records): # save a block as the next partial index
+        block_prefix = '{}.{}'.format(prefix, len(prefixes))
+        write_sections(vectorized_sections(vocabulary, ids, lengths, block_docIDs), block_docIDs, lengths, block_prefix, kgram_index=False) # only merged, never searched
+        write_doc_store(records, block_prefix + '.docs')
+        prefixes.append(block_prefix)
+
+    vocabulary = {} # every term of the block to its ID, the number of the token of the block it first appeared at
+    ids = [] # the term IDs of every document of the block, one array per document
+    lengths = [] # the number of tokens of every document of the block
+    block_docIDs = []
+    records = [] # the (docID, document store record) of every document of the block
+    tokens = 0 # the number of tokens of the block
+    size = 0 # the estimated number of bytes the block takes
+    for doc in docIDs:
+        text, words = read_document(doc)
+        records.append((doc, encode_document(text, term_spans(text, words))))
+        size += len(records[-1][1])
+        terms = index_terms(words)
+        new_terms = len(vocabulary)
+        ids.append(np.fromiter(map(vocabulary.setdefault, terms, count(tokens)), np.int64, len(terms))) # a term already seen keeps its ID, without a Python loop
+        new_terms = len(vocabulary) - new_terms
+        lengths.append(len(terms))
+        block_docIDs.append(doc)
+        tokens += len(terms)
+        size += TERM_BYTES * new_terms + VECTOR_TOKEN_BYTES * len(terms)
+
+        if size >= memory_budget: # the block is full, save it and start a new one
+            save_block(vocabulary, ids, lengths, block_docIDs, records)
+            vocabulary, ids, lengths, block_docIDs, records = {}, [], [], [], []
+            tokens = size = 0
+
+    if block_docIDs or not prefixes: # save what is left (an empty range still gets an empty partial index)
+        save_block(vocabulary, ids, lengths, block_docIDs, records)
+    return prefixes
+
+def varint_array(values):
+    """
+    This function varint encodes an array of non-negative integers with NumPy array operations, the same way encode_varint() encodes each of them.
+
+    The number of bytes of every value is counted first, which gives where its bytes start in the output, and then the k-th seven bits
+    of every value that has at least k + 1 bytes are written at once, with the continuation bit set on all but the last byte.
+
+    Args:
+        values (ndarray): The integers, as an int64 array.
+
+    Returns:
+        data (ndarray): The encoded bytes, as a uint8 array.
+        sizes (ndarray): The number of bytes of every value.
+    """
+
+    sizes = np.ones(len(values), np.int64)
+    shift = 7
+    while True:
+        longer = values >= (1 << shift)
+        if not longer.any():
+            break
+        sizes += longer
+        shift += 7
+    starts = np.cumsum(sizes) - sizes
+    data = np.empty(int(sizes.sum()), np.uint8)
+    for k in range(shift // 7):
+        has = np.flatnonzero(sizes > k) # the values with a k-th byte
+        data[starts[has] + k] = ((values[has] >> (7 * k)) & 0x7f) | ((sizes[has] > k + 1) << 7)
+    return data, sizes
+
+def vectorized_sections(vocabulary, ids, lengths, docIDs):
+    """
+    This function turns the term IDs of a block of documents into the encoded postings sections of every term, with NumPy array operations.
+
+    The term IDs are replaced by the rank of their term in sorted order, and the docID and position of every token are derived from the
+    lengths of the documents. A stable sort by term keeps the tokens of a term in docID and then position order, so the sorted arrays are
+    split into postings wherever the term or the docID changes. The gaps between the docIDs of a term and between the positions of a
+    posting are then taken with np.diff() and varint encoded with varint_array(), so no Python object is made per posting or per position.
+
+    Args:
+        vocabulary (dict): Every term of the block to its ID.
+        ids (list): The term IDs of every document of the block, one array per document.
+        lengths (list): The number of tokens of every document.
+        docIDs (list): The sorted docIDs of the documents.
+
+    Yields:
+        term (str): The term, in sorted order.
+        df (int): The number of documents of the block it appears in.
+        max_tf (int): Its largest frequency in a single document.
+        docs, frequencies, positions (memoryview): Its encoded sections, as written by write_index().
+    """
+
+    total = sum(lengths)
+    if not total:
+        return
+    names = list(vocabulary)
+    order = sorted(range(len(names)), key=names.__getitem__) # the terms in sorted order, as indexes into names
+    rank = np.empty(total, np.int64)
+    rank[np.fromiter(vocabulary.values(), np.int64, len(names))[order]] = np.arange(len(names)) # the ID of a term to its rank
+    lengths = np.array(lengths, np.int64)
+
+    terms = rank[np.concatenate(ids)]
+    docs = np.repeat(np.array(docIDs, np.int64), lengths)
+    positions = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) # the number of every token within its document
+
+    by_term = np.argsort(terms, kind='stable')
+    terms, docs, positions = terms[by_term], docs[by_term], positions[by_term]
+    starts = np.flatnonzero(np.concatenate(([True], (terms[1:] != terms[:-1]) | (docs[1:] != docs[:-1])))) # where every posting starts
+    posting_terms = terms[starts]
+    term_starts = np.flatnonzero(np.concatenate(([True], posting_terms[1:] != posting_terms[:-1]))) # where the postings of every term start
+
+    posting_docs = docs[starts]
+    doc_gaps = np.diff(posting_docs, prepend=0)
+    doc_gaps[term_starts] = posting_docs[term_starts] # the first gap of a term is its first docID
+    frequencies = np.diff(starts, append=total)
+    position_gaps = np.diff(positions, prepend=0)
+    position_gaps[starts] = positions[starts] # the positions of every posting are delta encoded from 0
+
+    doc_data, doc_sizes = varint_array(doc_gaps)
+    frequency_data, frequency_sizes = varint_array(frequencies)
+    position_data, position_sizes = varint_array(position_gaps)
+    doc_ends = np.cumsum(np.add.reduceat(doc_sizes, term_starts)).tolist() # where the sections of every term end in the encoded arrays
+    frequency_ends = np.cumsum(np.add.reduceat(frequency_sizes, term_starts)).tolist()
+    position_ends = np.cumsum(np.add.reduceat(position_sizes, starts[term_starts])).tolist()
+    dfs = np.diff(term_starts, append=len(starts)).tolist()
+    max_tfs = np.maximum.reduceat(frequencies, term_starts).tolist()
+
+    doc_data, frequency_data, position_data = memoryview(doc_data), memoryview(frequency_data), memoryview(position_data)
+    doc_end = frequency_end = position_end = 0
+    for k in range(len(dfs)): # every term of the vocabulary has tokens, so the ranks come out as 0, 1, 2, ...
+        doc_start, frequency_start, position_start = doc_end, frequency_end, position_end
+        doc_end, frequency_end, position_end = doc_ends[k], frequency_ends[k], position_ends[k]
+        yield (names[order[k]], dfs[k], max_tfs[k], doc_data[doc_start:doc_end], frequency_data[frequency_start:frequency_end], position_data[position_start:position_end])
+
+def build_partial_index(args):
+    """
+    This function is run by every worker of a parallel build. It indexes a range of documents with index_documents(), or with index_documents_vectorized().
+
+    Args:
+        args (tuple): The sorted docIDs of the range, the prefix its partial indexes are saved under, the memory budget of the worker, and whether the build is vectorized.
+
+    Returns:
+        prefixes (list): The prefixes of the saved partial indexes.
+    """
+
+    *args, vectorized = args
+    return (index_documents_vectorized if vectorized else index_documents)(*args)
+
+def merge_sections(group):
+    """
+    This function joins the encoded sections of a term from several partial indexes, without decoding its positions.
+
+    The frequencies and positions sections are copied as they are. The docs sections are too, except for their first gap, which is the
+    first docID of the partial index and is encoded again as the gap from the last docID of the partial indexes before it.
+
+    Args:
+        group (iterable): The (term, df, max tf, docs, frequencies, positions) tuples of the term (see IndexReader.sections()), in docID order.
+
+    Returns:
+        sections (tuple): The (term, df, max tf, docs, frequencies, positions) tuple of the merged term.
+    """
+
+    df = max_tf = last = 0
+    docs, frequencies, positions = bytearray(), bytearray(), bytearray()
+    for term, part_df, part_max_tf, part_docs, part_frequencies, part_positions in group:
+        first, offset = read_varint(part_docs, 0)
+        encode_varint(first - last, docs)
+        docs += part_docs[offset:]
+        last = sum(decode_varints(part_docs)) # the gaps add up to the last docID of the term
+        frequencies += part_frequencies
+        positions += part_positions
+        df += part_df
+        max_tf = max(max_tf, part_max_tf)
+    return term, df, max_tf, docs, frequencies, positions
+
+def merge_indexes(prefixes, docIDs, prefix):
+    """
+    This function merges partial indexes into a single index, reading every partial index term by term (a k-way merge) so only one term of each is in memory at a time.
+    The sections of a term are joined with merge_sections(), so its postings are never decoded. Their document stores are merged into '<prefix>.docs'.
+
+    Args:
+        prefixes (list): The prefixes of the partial indexes, in docID order (every docID of a partial index is smaller than those of the next one).
+        docIDs (list): The sorted docIDs of every document.
+        prefix (str): The prefix the merged index is saved under.
+    """
+
+    readers = [IndexReader(p) for p in prefixes]
+    try:
+        ordinals = {doc: i for i, doc in enumerate(docIDs)}
+        lengths = [0] * len(docIDs)
+        for r in readers:
+            for doc, length in zip(r.docIDs, r.doc_lengths):
+                lengths[ordinals[doc]] = length
+        merged = heapq.merge(*[r.sections() for r in readers], key=lambda item: item[0]) # equal terms come out in the order of the readers, so in docID order
+        write_sections((merge_sections(group) for _, group in groupby(merged, key=lambda item: item[0])), docIDs, lengths, prefix)
+    finally:
+        for r in readers:
+            r.close()
+
+    stores = [DocStore(p + '.docs') for p in prefixes]
+    try:
+        merge_doc_stores([(store, []) for store in stores], prefix + '.docs')
+    finally:
+        for store in stores:
+            store.close()
+
+def build_indexes(docIDs, prefix, workers=1, memory_mb=MEMORY_BUDGET_MB, vectorized=False):
+    """
+    This function builds the index of a set of documents with a bounded amount of memory and saves it in the binary index format.
+
+    The documents are indexed in streaming blocks by index_documents(), and the blocks are then merged into '<prefix>.lex' and '<prefix>.post'.
+    With more than one worker, the documents are split into contiguous ranges of docIDs that are indexed on a pool of processes, and the
+    memory budget is shared between the workers.
+
+    Args:
+        docIDs (list): The sorted docIDs of the documents to be indexed.
+        prefix (str): The prefix the index is saved under.
+        workers (int): The number of worker processes.
+        memory_mb (int): The number of megabytes the in-memory blocks may take, across all the workers.
+        vectorized (bool): Whether the blocks are indexed with index_documents_vectorized(), which needs NumPy.
+    """
+
+    memory_budget = memory_mb * 1024 * 1024 // workers
+    with tempfile.TemporaryDirectory(dir='.') as tmp, instrumentation.stage('build_partial'):
+        if workers > 1:
+            chunks = workers * 4 # a few ranges per worker, so a worker that finishes early can pick up another range
+            size = max(1, -(-len(docIDs) // chunks)) # the number of docs per range, rounded up
+            ranges = [(docIDs[i:i + size], os.path.join(tmp, 'part{}'.format(i // size)), memory_budget, vectorized) for i in range(0, len(docIDs), size)]
+            with multiprocessing.Pool(workers) as pool:
+                prefixes = [p for block in pool.imap(build_partial_index, ranges) for p in block] # imap keeps the ranges in order
+        else:
+            prefixes = build_partial_index((docIDs, os.path.join(tmp, 'part'), memory_budget, vectorized))
+        print("Partial indexes created")
+        instrumentation.inc('build_partial_indexes_total', len(prefixes), 'Partial indexes written by the streaming build')
+        instrumentation.inc('build_documents_total', len(docIDs), 'Documents indexed')
+        with instrumentation.stage('build_merge'):
+            merge_indexes(prefixes, docIDs, prefix)
+    if instrumentation.ENABLED:
+        record_index_stats(prefix)
+
+def record_index_stats(prefix):
+    """
+    This function records the size of a newly built index: its documents, terms, indexed tokens and bytes.
+
+    The figures are read back from the saved index rather than counted while building it, so they are right even when the documents were
+    indexed by worker processes, whose counters are not seen by this process.
+
+    Args:
+        prefix (str): The prefix of the index files.
+    """
+
+    with IndexReader(prefix) as reader:
+        instrumentation.set_gauge('index_documents', len(reader.docIDs), 'Documents in the last index built')
+        instrumentation.set_gauge('index_terms', reader.num_terms, 'Distinct terms in the last index built')
+        instrumentation.set_gauge('index_tokens', sum(reader.doc_lengths), 'Tokens indexed in the last index built')
+    size = sum(os.path.getsize(prefix + extension) for extension in ('.lex', '.post', '.kgram', '.docs') if os.path.exists(prefix + extension))
+    instrumentation.set_gauge('index_bytes', size, 'Size of the files of the last index built')
+
+def replace_index(write, index_dir=INDEX_DIR, docIDs=None):
+    """
+    This function saves a new index of every document as a single segment, replacing every segment of the current index.
+
+    The new index is published as a new generation, and the old segments are only removed once no searcher reads them (see segments.py),
+    so queries keep being answered while the index is rebuilt.
+
+    Args:
+        write (function): The function that saves the new index, given the prefix to save it under.
+        index_dir (str): The directory of the index.
+        docIDs (list): The docIDs of the documents the new index holds, if not every document (e.g. a shard, see sharding.py).
+    """
+
+    with writer_lock(index_dir): # an update or a merge that is running would otherwise save its manifest over the new index
+        old = load_manifest(index_dir) or empty_manifest()
+        manifest = empty_manifest()
+        manifest['generation'] = old['generation'] + 1
+        manifest['next_segment'] = old['next_segment'] # segment names are never reused
+        name, prefix = new_segment(manifest, index_dir)
+        documents = {str(i): dict(fingerprint(document_path(i)), segment=name) for i in (get_docIDs() if docIDs is None else docIDs)} # fingerprint the documents before they are read
+
+        write(prefix)
+        manifest['segments'] = [{'name': name, 'deleted': []}]
+        manifest['documents'] = documents
+        save_manifest(manifest, index_dir)
+        collect_garbage(index_dir) # the old segments, unless a searcher still reads them
+
+def update_indexes(workers=1, memory_mb=MEMORY_BUDGET_MB, index_dir=INDEX_DIR, vectorized=False):
+    """
+    This function brings the index up to date with the 'ResearchPapers' directory, indexing only the documents that were added or changed since the last run.
+
+    Every document is fingerprinted and compared with the fingerprint saved in the manifest. The new and changed documents are indexed into
+    a new delta segment. The changed and removed documents are added to the tombstones of the segment that held them, so queries skip them.
+    When the delta segments have grown large enough, they are merged with the base segment on a background thread.
+
+    Args:
+        workers (int): The number of worker processes used to index the new and changed documents.
+        memory_mb (int): The number of megabytes the in-memory blocks may take, across all the workers.
+        index_dir (str): The directory of the index.
+        vectorized (bool): Whether the documents are indexed with NumPy array operations (see index_documents_vectorized()).
+    """
+
+    with writer_lock(index_dir): # a merge or another update would otherwise start from the same manifest, and one of them lose the changes of the other
+        manifest = load_manifest(index_dir) or empty_manifest()
+        documents = manifest['documents']
+        doc = get_docIDs() # get the docIDs
+
+        changed = [] # the docIDs of the new and changed documents
+        fingerprints = {}
+        with instrumentation.stage('update_fingerprint'):
+            for i in doc:
+                previous = documents.get(str(i))
+                fingerprints[i] = fingerprint(document_path(i), previous)
+                if previous is None or fingerprints[i]['sha1'] != previous['sha1']:
+                    changed.append(i)
+        removed = [int(c) for c in documents if int(c) not in fingerprints] # the docIDs of the documents that no longer exist
+
+        touched = False # whether the manifest has to be saved, e.g. a document was touched without its contents changing
+        for i in doc:
+            previous = documents.get(str(i))
+            if previous is not None and i not in changed and (previous['mtime'], previous['size']) != (fingerprints[i]['mtime'], fingerprints[i]['size']):
+                documents[str(i)] = dict(fingerprints[i], segment=previous['segment'])
+                touched = True
+
+        if not changed and not removed and not touched:
+            print("Indexes are up to date")
+            return
+
+        deleted = {segment['name']: set(segment['deleted']) for segment in manifest['segments']}
+        for i in removed + [c for c in changed if str(c) in documents]: # the old version of these documents is in an older segment
+            deleted[documents[str(i)]['segment']].add(i)
+        for i in removed:
+            del documents[str(i)]
+
+        if changed:
+            name, prefix = new_segment(manifest, index_dir)
+            build_indexes(changed, prefix, workers, memory_mb, vectorized)
+            manifest['segments'].append({'name': name, 'deleted': []})
+            deleted[name] = set()
+            for i in changed:
+                documents[str(i)] = dict(fingerprints[i], segment=name)
+
+        live = {entry['segment'] for entry in documents.values()} # segments whose documents were all deleted are left out
+        manifest['segments'] = [{'name': segment['name'], 'deleted': sorted(deleted[segment['name']])} for segment in manifest['segments'] if segment['name'] in live]
+        manifest['generation'] += 1
+        save_manifest(manifest, index_dir)
+        collect_garbage(index_dir)
+        print("Indexes updated: {} added or changed, {} removed".format(len(changed), len(removed)))
+        instrumentation.inc('update_changed_documents_total', len(changed), 'Documents added or changed by incremental updates')
+        instrumentation.inc('update_removed_documents_total', len(removed), 'Documents removed by incremental updates')
+        merge = needs_merge(manifest, index_dir)
+
+    if merge: # the query side already reads the new segment, so the merge does not have to hold up this run (it waits for the writer lock until then)
+        print("Merging segments in the background")
+        threading.Thread(target=merge_segments, args=(index_dir,)).start()
+
+def merge_segments(index_dir=INDEX_DIR):
+    """
+    This function merges every segment of the index into a single new segment, leaving out the deleted documents.
+
+    The merge holds the writer lock, so the manifest it reads is the one of the generation it merges, and no update saves a generation
+    while it runs. The generation is still checked again before the merged segment is published, and the merge is given up if it changed.
+
+    Args:
+        index_dir (str): The directory of the index.
+    """
+
+    with writer_lock(index_dir):
+        with SegmentedIndex(index_dir) as index, instrumentation.stage('merge_segments'):
+            manifest = load_manifest(index_dir)
+            if manifest['generation'] != index.generation: # only possible if a writer runs without the writer lock
+                print("Index changed before the merge started, segments not merged")
+                return
+            name, prefix = new_segment(manifest, index_dir)
+            write_index(((term, list(positions.items())) for term, positions in index.items()), index.docIDs, prefix)
+            parts = index.doc_stores()
+            if all(store is not None for store, _ in parts): # segments built before the document store have none
+                merge_doc_stores(parts, prefix + '.docs')
+
+        current = load_manifest(index_dir)
+        if current is None or current['generation'] != manifest['generation']: # saving now would drop the generation saved in the meantime
+            remove_segment(name, index_dir)
+            print("Index changed during the merge, segments not merged")
+            return
+        manifest['segments'] = [{'name': name, 'deleted': []}]
+        for entry in manifest['documents'].values():
+            entry['segment'] = name
+        manifest['generation'] += 1
+        save_manifest(manifest, index_dir)
+        collect_garbage(index_dir)
+    print("Segments merged")
 
 def main():
-    if (not os.path.isfile('inverted_index.txt') and not os.path.isfile('positional_index,txt')): # check if the indexes already exist, if they don't, call the save_indexes function
-        save_indexes()
-    else:
-        print("Indexes already exist")
+    parser = argparse.ArgumentParser(description='Create and save the indexes of the documents in the ResearchPapers directory.')
+    parser.add_argument('--workers', type=int, default=1, help='the number of processes used to build the indexes')
+    parser.add_argument('--memory-mb', type=int, default=MEMORY_BUDGET_MB, help='the number of megabytes of postings kept in memory before they are written to disk')
+    parser.add_argument('--rebuild', action='store_true', help='index every document again instead of only the added and changed ones')
+    parser.add_argument('--vectorized', action='store_true', help='turn the tokens into encoded postings with NumPy array operations, about 6x faster than the default at that step, which makes a whole build about 15%% faster (see the README)')
+    parser.add_argument('--profile', action='store_true', help='print the time of every stage, the size of the index and the peak memory at the end')
+    parser.add_argument('--metrics-json', help='write the timings and counters to this file as JSON')
+    args = parser.parse_args()
+    if args.vectorized and np is None:
+        parser.error('--vectorized needs NumPy, install it with pip install numpy')
+    if args.profile or args.metrics_json:
+        instrumentation.enable()
+
+    if args.rebuild:
+        doc = get_docIDs()
+        replace_index(lambda prefix: build_indexes(doc, prefix, args.workers, args.memory_mb, args.vectorized))
+        print("Indexes saved")
+    else: # index only what changed since the last run (everything, the first time)
+        update_indexes(args.workers, args.memory_mb, vectorized=args.vectorized)
+
+    if args.profile:
+        instrumentation.report()
+    if args.metrics_json:
+        instrumentation.dump_json(args.metrics_json)
 
 if __name__ == '__main__':
     main() # execute the main function
\ No newline at end of file
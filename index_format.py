@@ -0,0 +1,697 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from postings import intersect_many
+
+# layout of the lexicon file:
+#   header      : magic, number of terms, number of docs, number of blocks
+#   docIDs      : one unsigned 32 bit integer per document, sorted
+#   doc lengths : one unsigned 32 bit integer per document, the number of terms indexed in it, in the order of the docIDs
+#   block index : for every block, where the block starts in the blocks area and where the postings of its first term start
+#   blocks      : the sorted terms, BLOCK_SIZE at a time
+# inside a block every term is stored as varints of how many leading bytes it shares with the previous term (front coding), the length of
+# the rest of the term, the rest of the term itself, then varints of its document frequency, of its largest frequency in a single document,
+# and of the sizes of its docs, frequencies and positions sections
+MAGIC = b'BRMLEX2\0'
+OLD_MAGICS = [b'BRMLEX1\0'] # formats that can no longer be read, the index has to be rebuilt
+HEADER = struct.Struct('<8sIII')
+BLOCK = struct.Struct('<IQ') # block offset, postings offset of the first term of the block
+BLOCK_SIZE = 16
+
+# layout of the k-gram file, which finds the terms that contain given k-grams for wildcard queries:
+#   header  : magic, number of k-grams
+#   offsets : for every k-gram, where its entry starts in the entries area (unsigned 64 bit integers)
+#   entries : the sorted k-grams, each stored as a varint of its length in utf-8 bytes, the k-gram itself, and the delta encoded numbers
+#             of the terms that contain it (the position of the term in the sorted lexicon)
+# the k-grams of a term are taken from the term with '$' added at both ends, so '$ab' only matches terms that start with 'ab'
+KGRAM_MAGIC = b'BRMKGR1\0'
+KGRAM_HEADER = struct.Struct('<8sI')
+KGRAM_OFFSET = struct.Struct('<Q')
+K = 3
+
+CONTINUATION_BYTES = bytes(range(0x80, 0x100)) # the bytes of a varint that more bytes follow, see skip_varints()
+
+def encode_varint(value, out):
+    """
+    This function appends the variable length (varint) encoding of a non-negative integer to a bytearray.
+
+    Seven bits of the value are stored in each byte, and the high bit of a byte is set when more bytes follow.
+    Small numbers (such as the gaps between sorted docIDs or positions) therefore take a single byte.
+
+    Args:
+        value (int): The integer to be encoded.
+        out (bytearray): The bytearray the encoded bytes are appended to.
+    """
+
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80) # the lower seven bits, with the continuation bit set
+        value >>= 7
+    out.append(value)
+
+def decode_varints(data):
+    """
+    This function decodes every varint in a bytes object.
+
+    Args:
+        data (bytes): The encoded bytes.
+
+    Returns:
+        values (list): The decoded integers.
+    """
+
+    if not data or max(data) < 0x80: # if no byte has the continuation bit set, every byte is a value of its own
+        return list(data)
+
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80: # the last byte of the current value
+            values.append(value)
+            value = 0
+            shift = 0
+        else:
+            shift += 7
+    return values
+
+def encode_gaps(values, out):
+    """
+    This function encodes a sorted list of integers as the varints of the differences between consecutive values (delta encoding).
+
+    Args:
+        values (list): The sorted integers.
+        out (bytearray): The bytearray the encoded bytes are appended to.
+    """
+
+    previous = 0
+    for value in values:
+        encode_varint(value - previous, out)
+        previous = value
+
+def read_varint(data, offset):
+    """
+    This function decodes a single varint.
+
+    Args:
+        data (bytes or mmap): The encoded bytes.
+        offset (int): Where the varint starts.
+
+    Returns:
+        value (int): The decoded integer.
+        offset (int): Where the next value starts.
+    """
+
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def skip_varints(data, offset, count):
+    """
+    This function skips over a number of varints without decoding them.
+
+    The last byte of every varint is its only byte without the continuation bit. A varint takes at least one byte, so the next count
+    bytes are taken at once, and the varints that end in them are counted by deleting their continuation bytes with bytes.translate().
+    This is repeated for the varints that are left, so the bytes are only scanned in C.
+
+    Args:
+        data (bytes or mmap): The encoded bytes.
+        offset (int): Where the first varint starts.
+        count (int): The number of varints to skip.
+
+    Returns:
+        offset (int): Where the varint after them starts.
+    """
+
+    while count:
+        chunk = data[offset:offset + count]
+        if not chunk:
+            raise ValueError('not enough varints to skip')
+        offset += len(chunk)
+        count -= len(chunk.translate(None, CONTINUATION_BYTES))
+    return offset
+
+def kgrams(word):
+    """
+    This function returns the k-grams of a word, with '$' marking its start and its end.
+
+    Args:
+        word (str): The word.
+
+    Returns:
+        grams (set): The k-grams, e.g. {'$he', 'hea', 'ear', 'art', 'rt$'} for 'heart'.
+    """
+
+    marked = '$' + word + '$'
+    return {marked[i:i + K] for i in range(len(marked) - K + 1)}
+
+def write_kgrams(terms, path):
+    """
+    This function writes the k-gram file of a lexicon.
+
+    Args:
+        terms (list): The sorted terms of the lexicon.
+        path (str): The path of the file.
+    """
+
+    grams = {} # every k-gram to the numbers of the terms that contain it, in increasing order
+    for number, term in enumerate(terms):
+        for gram in kgrams(term):
+            if gram in grams:
+                grams[gram].append(number)
+            else:
+                grams[gram] = [number]
+
+    offsets = array('Q')
+    entries = bytearray()
+    for gram in sorted(grams, key=lambda g: g.encode('utf-8')): # sorted as bytes, the order the reader binary searches in
+        offsets.append(len(entries))
+        encoded = gram.encode('utf-8')
+        encode_varint(len(encoded), entries)
+        entries += encoded
+        encode_gaps(grams[gram], entries)
+    if sys.byteorder == 'big': # the file is always little endian
+        offsets.byteswap()
+
+    with open(path, 'wb') as f:
+        f.write(KGRAM_HEADER.pack(KGRAM_MAGIC, len(offsets)))
+        f.write(offsets.tobytes())
+        f.write(entries)
+
+def write_index(term_postings, docIDs, prefix, kgram_index=True):
+    """
+    This function writes an index in the binary format to '<prefix>.lex' and '<prefix>.post', and its k-gram file to '<prefix>.kgram'.
+
+    The postings of every term are stored as three sections in the postings file. The docs section holds the delta encoded docIDs, the
+    frequencies section holds the number of times the term appears in each of those docs, and the positions section holds the delta
+    encoded positions of each doc. Boolean queries only need to decode the docs section, ranked queries also decode the frequencies,
+    and proximity queries decode all three.
+
+    The length of every document (the number of terms indexed in it) is counted from the postings and stored in the lexicon file, for ranking.
+
+    Args:
+        term_postings (iterable): (term, postings) pairs sorted by term, where postings is a list of (docID, positions) pairs sorted by docID.
+        docIDs (list): The sorted docIDs of every document in the index.
+        prefix (str): The path of the index files without their extension.
+        kgram_index (bool): Whether the k-gram file is written. Partial indexes that are only merged do not need one.
+    """
+
+    ordinals = {doc: i for i, doc in enumerate(docIDs)}
+    lengths = [0] * len(docIDs) # the number of terms indexed in every document, counted while the sections are encoded
+
+    def sections():
+        for term, postings in term_postings:
+            docs = bytearray()
+            encode_gaps([doc for doc, _ in postings], docs)
+            frequencies = bytearray()
+            positions = bytearray()
+            max_tf = 0
+            for doc, pos in postings:
+                encode_varint(len(pos), frequencies)
+                encode_gaps(pos, positions)
+                lengths[ordinals[doc]] += len(pos)
+                max_tf = max(max_tf, len(pos))
+            yield term, len(postings), max_tf, docs, frequencies, positions
+
+    write_sections(sections(), docIDs, lengths, prefix, kgram_index)
+
+def write_sections(term_sections, docIDs, lengths, prefix, kgram_index=True):
+    """
+    This function writes an index whose postings are already encoded, in the format of write_index().
+
+    Args:
+        term_sections (iterable): (term, df, max tf, docs, frequencies, positions) tuples sorted by term, where the last three are the encoded sections of the term (bytes-like objects).
+        docIDs (list): The sorted docIDs of every document in the index.
+        lengths (list): The number of terms indexed in every document, in the order of the docIDs. It is only read once every section has been written.
+        prefix (str): The path of the index files without their extension.
+        kgram_index (bool): Whether the k-gram file is written.
+    """
+
+    block_index = bytearray()
+    blocks = bytearray()
+    num_terms = 0
+    offset = 0 # the current size of the postings file
+    previous = b''
+    terms = [] # the terms, in order, for the k-gram file
+
+    with open(prefix + '.post', 'wb') as f:
+        for term, df, max_tf, docs, frequencies, positions in term_sections:
+            encoded = term.encode('utf-8')
+            if num_terms % BLOCK_SIZE == 0: # the first term of a block is stored whole, so the block can be decoded on its own
+                block_index += BLOCK.pack(len(blocks), offset)
+                previous = b''
+            shared = 0
+            while shared < min(len(encoded), len(previous)) and encoded[shared] == previous[shared]:
+                shared += 1
+            encode_varint(shared, blocks)
+            encode_varint(len(encoded) - shared, blocks)
+            blocks += encoded[shared:]
+            encode_varint(df, blocks)
+            encode_varint(max_tf, blocks)
+            encode_varint(len(docs), blocks)
+            encode_varint(len(frequencies), blocks)
+            encode_varint(len(positions), blocks)
+
+            f.write(docs)
+            f.write(frequencies)
+            f.write(positions)
+            offset += len(docs) + len(frequencies) + len(positions)
+            previous = encoded
+            num_terms += 1
+            if kgram_index:
+                terms.append(term)
+
+    doc_table = array('I', docIDs)
+    length_table = array('I', lengths)
+    if sys.byteorder == 'big': # the file is always little endian
+        doc_table.byteswap()
+        length_table.byteswap()
+
+    with open(prefix + '.lex', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, num_terms, len(doc_table), len(block_index) // BLOCK.size))
+        f.write(doc_table.tobytes())
+        f.write(length_table.tobytes())
+        f.write(block_index)
+        f.write(blocks)
+
+    if kgram_index:
+        write_kgrams(terms, prefix + '.kgram')
+
+def map_file(path):
+    """
+    This function opens a file and memory maps it for reading.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        f (file): The open file, which has to be closed once the map is no longer needed.
+        data (mmap or bytes): The mapped contents of the file (empty bytes if the file is empty, since an empty file cannot be mapped).
+    """
+
+    f = open(path, 'rb')
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError: # the file is empty
+        data = b''
+    return f, data
+
+class IndexReader:
+    """
+    This class reads an index saved by write_index() through memory maps.
+
+    Opening an index only reads the header, the docIDs and the document lengths. The lexicon is binary searched in place, and the postings of a term are only
+    decoded when a query asks for them, so the cost of a query depends on the terms it uses and not on the size of the vocabulary.
+    """
+
+    def __init__(self, prefix):
+        self._lex_file, self._lex = map_file(prefix + '.lex')
+        self._post_file, self._post = map_file(prefix + '.post')
+
+        magic, self.num_terms, num_docs, self._num_blocks = HEADER.unpack_from(self._lex, 0)
+        if magic in OLD_MAGICS:
+            raise ValueError("'{}.lex' was written in an older format, run index_creation.py --rebuild".format(prefix))
+        if magic != MAGIC:
+            raise ValueError("'{}.lex' is not an index file".format(prefix))
+
+        doc_start = HEADER.size
+        doc_table = array('I')
+        doc_table.frombytes(self._lex[doc_start:doc_start + 4 * num_docs])
+        length_table = array('I')
+        length_table.frombytes(self._lex[doc_start + 4 * num_docs:doc_start + 8 * num_docs])
+        if sys.byteorder == 'big':
+            doc_table.byteswap()
+            length_table.byteswap()
+        self.docIDs = doc_table.tolist() # the sorted docIDs of every document in the index
+        self.doc_lengths = length_table.tolist() # the number of terms indexed in every document, in the order of the docIDs
+
+        self._block_index = doc_start + 8 * num_docs # where the block index starts
+        self._blocks = self._block_index + BLOCK.size * self._num_blocks # where the blocks start
+
+        self._kgram_path = prefix + '.kgram'
+        self._kgram_file, self._kgram = None, b'' # mapped by the first wildcard query, most processes never need it
+        self._num_kgrams = 0
+
+    def close(self):
+        """
+        This function releases the memory maps and closes the index files.
+        """
+
+        for data in (self._lex, self._post, self._kgram):
+            if isinstance(data, mmap.mmap):
+                data.close()
+        self._lex_file.close()
+        self._post_file.close()
+        if self._kgram_file is not None:
+            self._kgram_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _first_term(self, b):
+        """
+        This function returns the utf-8 bytes of the first term of a block, without decoding the rest of the block.
+        """
+
+        offset = self._blocks + BLOCK.unpack_from(self._lex, self._block_index + BLOCK.size * b)[0]
+        _, offset = read_varint(self._lex, offset) # the first term of a block shares nothing with the previous term
+        length, offset = read_varint(self._lex, offset)
+        return self._lex[offset:offset + length]
+
+    def _block(self, b):
+        """
+        This function decodes every lexicon entry of a block.
+
+        Args:
+            b (int): The number of the block.
+
+        Returns:
+            entries (list): (term, df, max tf, docs offset, frequencies offset, positions offset, end offset) tuples, where term is in utf-8 bytes and the offsets are in the postings file.
+        """
+
+        offset, postings = BLOCK.unpack_from(self._lex, self._block_index + BLOCK.size * b)
+        offset += self._blocks
+        entries = []
+        term = b''
+        for _ in range(min(BLOCK_SIZE, self.num_terms - b * BLOCK_SIZE)):
+            shared, offset = read_varint(self._lex, offset)
+            length, offset = read_varint(self._lex, offset)
+            term = term[:shared] + self._lex[offset:offset + length] # rebuild the term from the bytes it shares with the previous term
+            offset += length
+            df, offset = read_varint(self._lex, offset)
+            max_tf, offset = read_varint(self._lex, offset)
+            docs_length, offset = read_varint(self._lex, offset)
+            frequencies_length, offset = read_varint(self._lex, offset)
+            positions_length, offset = read_varint(self._lex, offset)
+            frequencies = postings + docs_length
+            positions = frequencies + frequencies_length
+            entries.append((term, df, max_tf, postings, frequencies, positions, positions + positions_length))
+            postings = positions + positions_length
+        return entries
+
+    def find(self, term):
+        """
+        This function looks a term up in the lexicon. The blocks are binary searched on their first terms, and then the one block that can hold the term is scanned.
+
+        Args:
+            term (str): The term to be searched.
+
+        Returns:
+            entry (tuple): The lexicon entry of the term (see _block()), or None if the term is not in the index.
+        """
+
+        key = term.encode('utf-8')
+        low, high = 0, self._num_blocks
+        while low < high: # find the first block whose first term is greater than the key
+            mid = (low + high) // 2
+            if self._first_term(mid) <= key:
+                low = mid + 1
+            else:
+                high = mid
+        if low == 0: # the key comes before every term
+            return None
+        for entry in self._block(low - 1):
+            if entry[0] == key:
+                return entry
+        return None
+
+    def __contains__(self, term):
+        return self.find(term) is not None
+
+    def df(self, term):
+        """
+        This function returns the document frequency of a term, without decoding its postings.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            df (int): The number of documents the term appears in (0 if the term is not in the index).
+        """
+
+        entry = self.find(term)
+        return entry[1] if entry is not None else 0
+
+    def max_tf(self, term):
+        """
+        This function returns the largest number of times a term appears in a single document, without decoding its postings.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            max_tf (int): The largest frequency of the term in a document (0 if the term is not in the index).
+        """
+
+        entry = self.find(term)
+        return entry[2] if entry is not None else 0
+
+    def _docs(self, entry):
+        """
+        This function decodes the docs section of a lexicon entry.
+        """
+
+        return list(accumulate(decode_varints(self._post[entry[3]:entry[4]])))
+
+    def _frequencies(self, entry):
+        """
+        This function decodes the frequencies section of a lexicon entry.
+        """
+
+        return decode_varints(self._post[entry[4]:entry[5]])
+
+    def _positions(self, entry):
+        """
+        This function decodes the docs, frequencies and positions sections of a lexicon entry into a dictionary of docID to positions.
+        """
+
+        docs = self._docs(entry)
+        values = decode_varints(self._post[entry[5]:entry[6]])
+        positions = {}
+        j = 0
+        for doc, count in zip(docs, self._frequencies(entry)): # count is the number of positions stored for this doc
+            positions[doc] = list(accumulate(values[j:j + count]))
+            j += count
+        return positions
+
+    def _doc_positions(self, entry, docs):
+        """
+        This function decodes the positions of a lexicon entry in some documents only.
+
+        The docs and frequencies sections give where the positions of every document start, counted in varints. The positions of the
+        documents in between are skipped over with skip_varints(), so only the positions of the asked documents are decoded.
+        """
+
+        term_docs = self._docs(entry)
+        frequencies = self._frequencies(entry)
+        positions = {}
+        offset = entry[5]
+        i = 0 # the number of the first posting whose positions start at offset
+        for doc in docs:
+            j = bisect_left(term_docs, doc, i)
+            if j == len(term_docs):
+                break
+            if term_docs[j] != doc:
+                continue
+            offset = skip_varints(self._post, offset, sum(frequencies[i:j]))
+            end = skip_varints(self._post, offset, frequencies[j])
+            positions[doc] = list(accumulate(decode_varints(self._post[offset:end])))
+            offset = end
+            i = j + 1
+        return positions
+
+    def postings(self, term):
+        """
+        This function returns the postings list of a term.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            postings (list): The sorted docIDs the term appears in (an empty list if the term is not in the index).
+        """
+
+        entry = self.find(term)
+        return self._docs(entry) if entry is not None else []
+
+    def encoded_postings(self, term):
+        """
+        This function returns the docs section of a term as it is stored, without decoding it, for the readers that decode it in bulk (see bitmaps.read_bitmap()).
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            data (bytes): The delta encoded varints of the sorted docIDs the term appears in (empty if the term is not in the index).
+        """
+
+        entry = self.find(term)
+        return self._post[entry[3]:entry[4]] if entry is not None else b''
+
+    def frequencies(self, term):
+        """
+        This function returns the postings list of a term along with the number of times the term appears in each document.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            postings (list): The sorted docIDs the term appears in.
+            frequencies (list): The frequency of the term in each of those documents.
+        """
+
+        entry = self.find(term)
+        return (self._docs(entry), self._frequencies(entry)) if entry is not None else ([], [])
+
+    def positions(self, term, docs=None):
+        """
+        This function returns the positions of a term in every document it appears in, or only in some of them.
+
+        Args:
+            term (str): The term.
+            docs (list): The sorted docIDs whose positions are wanted, or None for every document. The positions of the other documents are not decoded.
+
+        Returns:
+            positions (dict): A dictionary of docID to the sorted positions of the term in that document (empty if the term is not in the index).
+        """
+
+        entry = self.find(term)
+        if entry is None:
+            return {}
+        return self._positions(entry) if docs is None else self._doc_positions(entry, docs)
+
+    def terms(self):
+        """
+        This function iterates over every term of the index in sorted order, without decoding any postings.
+        """
+
+        for b in range(self._num_blocks):
+            for entry in self._block(b):
+                yield entry[0].decode('utf-8')
+
+    def prefix_terms(self, prefix):
+        """
+        This function iterates over the terms that start with a prefix, in sorted order.
+
+        The terms that share a prefix are next to each other in the sorted lexicon, so the first block that can hold them is binary searched
+        and the blocks are scanned from there until a term no longer has the prefix. The cost depends on the number of matching terms and
+        not on the size of the vocabulary.
+
+        Args:
+            prefix (str): The prefix.
+
+        Yields:
+            term (str): A term that starts with the prefix.
+        """
+
+        key = prefix.encode('utf-8')
+        low, high = 0, self._num_blocks
+        while low < high: # find the first block whose first term is not smaller than the key
+            mid = (low + high) // 2
+            if self._first_term(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        for b in range(max(low - 1, 0), self._num_blocks): # the block before it may end with terms that have the prefix
+            for entry in self._block(b):
+                if entry[0] < key:
+                    continue
+                if not entry[0].startswith(key): # past the last term with the prefix
+                    return
+                yield entry[0].decode('utf-8')
+
+    def has_kgrams(self):
+        """
+        This function tells whether the index has a k-gram file, memory mapping it the first time it is asked.
+        """
+
+        if self._kgram_file is None and os.path.exists(self._kgram_path):
+            self._kgram_file, self._kgram = map_file(self._kgram_path)
+            self._num_kgrams = KGRAM_HEADER.unpack_from(self._kgram, 0)[1]
+        return self._kgram_file is not None
+
+    def _kgram_numbers(self, gram):
+        """
+        This function returns the sorted numbers of the terms that contain a k-gram, binary searching the k-gram file.
+        """
+
+        key = gram.encode('utf-8')
+        start = KGRAM_HEADER.size + KGRAM_OFFSET.size * self._num_kgrams # where the entries start
+        low, high = 0, self._num_kgrams
+        while low < high:
+            mid = (low + high) // 2
+            offset = start + KGRAM_OFFSET.unpack_from(self._kgram, KGRAM_HEADER.size + KGRAM_OFFSET.size * mid)[0]
+            length, offset = read_varint(self._kgram, offset)
+            found = self._kgram[offset:offset + length]
+            if found == key:
+                end = start + KGRAM_OFFSET.unpack_from(self._kgram, KGRAM_HEADER.size + KGRAM_OFFSET.size * (mid + 1))[0] if mid + 1 < self._num_kgrams else len(self._kgram)
+                return list(accumulate(decode_varints(self._kgram[offset + length:end])))
+            if found < key:
+                low = mid + 1
+            else:
+                high = mid
+        return []
+
+    def kgram_terms(self, grams):
+        """
+        This function returns the terms that contain every one of a set of k-grams.
+
+        The term numbers of every k-gram are intersected from the shortest list, and only the terms left are decoded from the lexicon.
+
+        Args:
+            grams (set): The k-grams.
+
+        Returns:
+            terms (list): The sorted terms.
+        """
+
+        numbers = intersect_many([self._kgram_numbers(gram) for gram in grams]) # the numbers are sorted, so they intersect like postings lists
+        terms = []
+        block = None
+        for number in numbers: # the numbers are sorted, so every block is decoded at most once
+            if block is None or number // BLOCK_SIZE != block:
+                block = number // BLOCK_SIZE
+                entries = self._block(block)
+            terms.append(entries[number % BLOCK_SIZE][0].decode('utf-8'))
+        return terms
+
+    def sections(self):
+        """
+        This function iterates over every term of the index in sorted order, without decoding its postings.
+
+        Yields:
+            term (str): The term.
+            df (int): Its document frequency.
+            max_tf (int): Its largest frequency in a single document.
+            docs, frequencies, positions (bytes): Its encoded sections (see write_index()).
+        """
+
+        for b in range(self._num_blocks):
+            for term, df, max_tf, docs, frequencies, positions, end in self._block(b):
+                yield term.decode('utf-8'), df, max_tf, self._post[docs:frequencies], self._post[frequencies:positions], self._post[positions:end]
+
+    def items(self):
+        """
+        This function iterates over every term of the index in sorted order, decoding its postings.
+
+        Yields:
+            term (str): The term.
+            positions (dict): A dictionary of docID to the positions of the term in that document.
+        """
+
+        for b in range(self._num_blocks):
+            for entry in self._block(b):
+                yield entry[0].decode('utf-8'), self._positions(entry)
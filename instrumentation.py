@@ -0,0 +1,223 @@
+"""
+Counters, gauges, histograms and stage timers for the index build and the queries.
+
+Instrumentation is off unless enable() is called (index_creation.py --profile, query_server.py --metrics) or the environment variable
+BRM_INSTRUMENTATION is set to 1. While it is off, every function returns at its first line and stage() returns a shared context
+manager that does nothing, so the instrumented code runs at its normal speed. Code that has to do extra work to compute a figure checks
+instrumentation.ENABLED first.
+
+The figures can be dumped as JSON (snapshot(), dump_json()), in the Prometheus text format (prometheus(), served at /metrics by
+query_server.py), or printed as a report (report()).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError: # not available on Windows, the peak memory is then not reported
+    resource = None
+
+ENABLED = os.environ.get('BRM_INSTRUMENTATION', '') == '1'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0) # upper bounds in seconds
+NULL_STAGE = nullcontext() # what stage() returns while instrumentation is off
+
+_lock = threading.Lock()
+_counters = {} # name to [help, value]
+_gauges = {} # name to [help, value]
+_histograms = {} # name to Histogram
+
+class Histogram:
+    """
+    This class counts observations in buckets, the way Prometheus histograms do: every bucket counts the observations up to its upper bound.
+    """
+
+    def __init__(self, help, buckets):
+        self.help = help
+        self.buckets = buckets
+        self.counts = [0] * len(buckets) # the observations that fall in each bucket (not cumulative)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+class Stage:
+    """
+    A context manager that times a stage and records its duration in the '<name>_seconds' histogram.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name + '_seconds', time.perf_counter() - self.start, 'Time spent in {}'.format(self.name))
+
+def enable(on=True):
+    """
+    This function turns instrumentation on or off.
+    """
+
+    global ENABLED
+    ENABLED = on
+
+def reset():
+    """
+    This function forgets every figure recorded so far.
+    """
+
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+def inc(name, value=1, help=''):
+    """
+    This function adds to a counter, creating it at 0 the first time.
+
+    Args:
+        name (str): The name of the counter, by convention ending in '_total'.
+        value (int): How much to add.
+        help (str): What the counter counts.
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        entry = _counters.setdefault(name, [help, 0])
+        entry[1] += value
+
+def set_gauge(name, value, help=''):
+    """
+    This function sets a gauge, a figure that can go up and down, e.g. the number of terms of the index.
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[name] = [help, value]
+
+def observe(name, value, help='', buckets=DEFAULT_BUCKETS):
+    """
+    This function adds an observation to a histogram, creating it the first time.
+
+    Args:
+        name (str): The name of the histogram, by convention ending in the unit, e.g. '_seconds'.
+        value (float): The observation.
+        help (str): What the histogram measures.
+        buckets (tuple): The upper bounds of the buckets, used when the histogram is created.
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(help, buckets)
+        histogram.observe(value)
+
+def stage(name):
+    """
+    This function returns a context manager that times a stage, e.g. 'with stage("build_merge"): ...'.
+    """
+
+    return Stage(name) if ENABLED else NULL_STAGE
+
+def peak_rss_mb(children=False):
+    """
+    This function returns the peak resident memory of this process, or of the largest of its finished child processes (e.g. the workers
+    of a parallel build), in megabytes. It returns None where the memory can not be measured.
+    """
+
+    if resource is None:
+        return None
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024 # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss / scale
+
+def snapshot():
+    """
+    This function returns every figure recorded so far.
+
+    Returns:
+        figures (dict): The counters and gauges by name, and for every histogram its count, sum and cumulative bucket counts.
+    """
+
+    with _lock:
+        histograms = {}
+        for name, h in _histograms.items():
+            cumulative = []
+            total = 0
+            for bound, count in zip(h.buckets, h.counts):
+                total += count
+                cumulative.append([bound, total])
+            histograms[name] = {'count': h.count, 'sum': h.sum, 'buckets': cumulative}
+        return {
+            'counters': {name: value for name, (_, value) in _counters.items()},
+            'gauges': {name: value for name, (_, value) in _gauges.items()},
+            'histograms': histograms,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_children_mb': peak_rss_mb(children=True),
+        }
+
+def dump_json(path=None):
+    """
+    This function returns the figures as JSON, and writes them to a file if a path is given.
+    """
+
+    data = json.dumps(snapshot(), indent=2)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(data)
+    return data
+
+def prometheus():
+    """
+    This function returns the figures in the Prometheus text exposition format.
+    """
+
+    lines = []
+    with _lock:
+        for name, (help, value) in sorted(_counters.items()):
+            lines += ['# HELP {} {}'.format(name, help), '# TYPE {} counter'.format(name), '{} {}'.format(name, value)]
+        for name, (help, value) in sorted(_gauges.items()):
+            lines += ['# HELP {} {}'.format(name, help), '# TYPE {} gauge'.format(name), '{} {}'.format(name, value)]
+        for name, h in sorted(_histograms.items()):
+            lines += ['# HELP {} {}'.format(name, h.help), '# TYPE {} histogram'.format(name)]
+            total = 0
+            for bound, count in zip(h.buckets, h.counts):
+                total += count
+                lines.append('{}_bucket{{le="{}"}} {}'.format(name, bound, total))
+            lines += ['{}_bucket{{le="+Inf"}} {}'.format(name, h.count), '{}_sum {}'.format(name, h.sum), '{}_count {}'.format(name, h.count)]
+    rss = peak_rss_mb()
+    if rss is not None:
+        lines += ['# HELP process_peak_rss_megabytes Peak resident memory of the process', '# TYPE process_peak_rss_megabytes gauge', 'process_peak_rss_megabytes {}'.format(rss)]
+    return '\n'.join(lines) + '\n'
+
+def report(out=sys.stdout):
+    """
+    This function prints the figures in a readable form: the total time of every stage, then the counters and gauges.
+    """
+
+    figures = snapshot()
+    for name, h in sorted(figures['histograms'].items()):
+        if name.endswith('_seconds'):
+            print("{:<28} {:>6} run(s) {:>10.3f} s".format(name[:-len('_seconds')], h['count'], h['sum']), file=out)
+    for name, value in sorted(list(figures['counters'].items()) + list(figures['gauges'].items())):
+        print("{:<28} {:>17}".format(name, value), file=out)
+    if figures['peak_rss_mb'] is not None:
+        print("{:<28} {:>14.1f} MB".format('peak memory', figures['peak_rss_mb']), file=out)
+        if figures['peak_rss_children_mb']:
+            print("{:<28} {:>14.1f} MB".format('peak memory of a worker', figures['peak_rss_children_mb']), file=out)
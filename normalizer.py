@@ -0,0 +1,144 @@
+import re
+from functools import lru_cache
+
+STOPWORDS_FILE = 'Stopword-List.txt'
+STRIP_CHARS = '0123456789!@#$%^&*()-_=+[{]}\\|;:\'",<.>/?`~' # the symbols and numbers removed from the start and end of every token
+SPLIT = re.compile(r'[.\-]') # tokens are split at '.' and '-'
+MAX_WORD_LENGTH = 45 # longer words are not indexed
+STEM_CACHE_SIZE = 65536 # the number of distinct words whose stems are remembered
+
+# NLTK takes a noticeable part of a second to import, so it is only imported when a word is first stemmed or a document first tokenized.
+# A searcher that only answers cached queries, or a tool that only reads the index, never imports it.
+
+@lru_cache(maxsize=1)
+def porter_stemmer():
+    """
+    This function returns the Porter stemmer, importing NLTK the first time it is called.
+    """
+
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+def get_stopwords():
+    """
+    This function is used to extract stopwords from 'Stopword-List.txt' file.
+
+    It reads each line from the file, and if the line is not empty, it appends the line to the stopwords list.
+    The function continues this process until it reaches the end of the file. Assumes the file is in your current working directory.
+
+    Returns:
+        stopwords (list): A list of stopwords extracted from the file.
+    """
+
+    stopwords = []
+    with open(STOPWORDS_FILE, 'r') as f: # the 'Stopword-List.txt' file is opened in read mode
+        while True:
+            text = f.readline() # each line from the file is read one by one
+            if not text: # if the line read is empty (which means end of file), the loop is broken
+                break
+            stopwords.append(text) # else append the read line to the stopwords list
+
+    stopwords = [c.rstrip(' \n') for c in stopwords if c != '\n'] # a new list is created from stopwords, excluding any newline characters. Newline characters are also removed from the strings.
+    return stopwords
+
+@lru_cache(maxsize=1)
+def stopwords():
+    """
+    This function returns the stopwords as a frozenset, reading the file only the first time it is called.
+
+    Returns:
+        stopwords (frozenset): The stopwords.
+    """
+
+    return frozenset(get_stopwords())
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """
+    This function stems a word and removes a trailing apostrophe. The stems of the most recently used words are cached, so a word that repeats is only stemmed once.
+
+    Args:
+        word (str): The word.
+
+    Returns:
+        term (str): The stemmed word.
+    """
+
+    word = porter_stemmer().stem(word) # stem the word
+    if word and word[-1] == "'": # remove the apostrophe
+        word = word.rstrip("'")
+    return word
+
+def clean_tokens(tokens):
+    """
+    This function removes symbols and numbers from the start and end of every token, converts it to lowercase, splits it at '.' and '-',
+    and keeps only the parts made of letters.
+
+    Args:
+        tokens (list): The tokens returned by the tokenizer.
+
+    Returns:
+        words (list): The cleaned words, in the order they appear in.
+    """
+
+    words = []
+    for token in tokens:
+        token = token.strip(STRIP_CHARS).lower() # case folding
+        if '.' in token or '-' in token: # the parts of the token take its place, so the positions of the words that follow stay in order
+            for part in SPLIT.split(token):
+                part = part.strip(STRIP_CHARS)
+                if part.isalpha():
+                    words.append(part)
+        elif token.isalpha(): # filter out any strings that contain symbols, numbers, etc.
+            words.append(token)
+    return words
+
+def tokenize(lines):
+    """
+    This function tokenizes text line by line and cleans the tokens with clean_tokens().
+
+    Args:
+        lines (iterable): The lines of the text, e.g. an open file.
+
+    Returns:
+        words (list): The cleaned words of the text.
+    """
+
+    from nltk.tokenize import word_tokenize # imported on first use, see porter_stemmer()
+
+    words = []
+    for line in lines:
+        words.extend(clean_tokens(word_tokenize(line)))
+    return words
+
+def index_terms(words):
+    """
+    This function turns the cleaned words of a document into the terms that are indexed. Stopwords and words longer than 45 characters are removed and the rest are stemmed.
+
+    The position of a term in the returned list is its position in the positional index.
+
+    Args:
+        words (list): The cleaned words of the document.
+
+    Returns:
+        terms (list): The terms of the document, in order.
+    """
+
+    stop = stopwords()
+    return [stem(word) for word in words if word not in stop and len(word) <= MAX_WORD_LENGTH]
+
+def query_word_terms(word):
+    """
+    This function normalizes a word of a query the same way the words of the documents were normalized, so it matches the indexed terms.
+
+    The word goes through tokenize() and index_terms() like the text of a document, so a word such as 'machine-learning' or 'e.g.' is
+    split into the same terms the documents were, stopwords and long words are dropped, and every term is stemmed.
+
+    Args:
+        word (str): The word as typed in the query.
+
+    Returns:
+        terms (list): The terms to look up in the index, in order. A word such as a stopword that is not indexed gives no terms.
+    """
+
+    return index_terms(tokenize([word]))
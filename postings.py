@@ -0,0 +1,181 @@
+from bisect import bisect_left
+
+def gallop(p, value, low=0):
+    """
+    This function finds the first position at or after 'low' where a value could be inserted in a sorted list while keeping it sorted.
+
+    Instead of scanning, it jumps ahead 1, 2, 4, 8, ... places until it passes the value and then binary searches the last jump (galloping search).
+    Finding a value k places ahead therefore costs O(log k), which is what lets a short postings list skip over the long stretches of a long one.
+
+    Args:
+        p (list): The sorted list.
+        value (int): The value to be searched.
+        low (int): The position the search starts from. Every element before it must be smaller than the value.
+
+    Returns:
+        low (int): The position of the first element of p at or after 'low' that is not smaller than the value (len(p) if there is none).
+    """
+
+    n = len(p)
+    step = 1
+    high = low
+    while high < n and p[high] < value: # jump ahead until an element is not smaller than the value
+        low = high + 1
+        high = low + step
+        step *= 2
+    return bisect_left(p, value, low, min(high + 1, n)) # the value lies between the last two jumps
+
+GALLOP_RATIO = 8 # galloping is used when one list is at least this many times longer than the other
+UNION_MERGE_RATIO = 32 # union() merges the shorter list into the longer one when the longer one is at least this many times longer
+
+def intersect(p1, p2):
+    """
+    This function returns the intersection of two sorted postings lists.
+
+    When one list is much longer than the other, every docID of the shorter list is galloped for in the longer list, so a rare term ANDed
+    with a common one costs close to the length of the rare list. Otherwise the shorter list is filtered against a set of the longer one,
+    which is linear in both lengths.
+
+    Args:
+        p1 (list): The first sorted postings list.
+        p2 (list): The second sorted postings list.
+
+    Returns:
+        result (list): The sorted docIDs found in both lists.
+    """
+
+    if len(p1) > len(p2): # always walk the shorter list
+        p1, p2 = p2, p1
+
+    if len(p1) * GALLOP_RATIO >= len(p2): # the lists are about the same size, so every docID of p2 would be visited anyway
+        members = set(p2)
+        return [doc for doc in p1 if doc in members]
+
+    result = []
+    n = len(p2)
+    j = 0
+    for doc in p1:
+        j = gallop(p2, doc, j)
+        if j == n: # every remaining docID of p1 is larger than the last docID of p2
+            break
+        if p2[j] == doc:
+            result.append(doc)
+            j += 1
+    return result
+
+def intersect_many(lists):
+    """
+    This function returns the intersection of any number of sorted postings lists, starting from the shortest so that every intermediate result stays small.
+
+    Args:
+        lists (list): The sorted postings lists.
+
+    Returns:
+        result (list): The sorted docIDs found in every list.
+    """
+
+    if not lists:
+        return []
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    for p in lists[1:]:
+        if not result: # nothing can be added back once the result is empty
+            break
+        result = intersect(result, p)
+    return list(result)
+
+def union(p1, p2):
+    """
+    This function returns the union of two sorted postings lists.
+
+    When one list is much longer than the other, the shorter list is merged into it: the next docID of the short list is binary searched
+    in the long one, the docIDs of the long list before it are copied as one slice, and a docID found in both lists is only added once.
+    That costs a binary search per docID of the short list plus copying the long list, instead of visiting every docID in Python.
+    Otherwise both lists are put in a set and sorted, which runs entirely in C. The docIDs of a set of small integers mostly come out
+    already in order, so the sort is a single pass in practice.
+
+    Args:
+        p1 (list): The first sorted postings list.
+        p2 (list): The second sorted postings list.
+
+    Returns:
+        result (list): The sorted docIDs found in either list, without duplicates. Neither input is modified.
+    """
+
+    if len(p1) > len(p2): # always merge the shorter list into the longer one
+        p1, p2 = p2, p1
+
+    if len(p1) * UNION_MERGE_RATIO >= len(p2):
+        members = set(p1)
+        members.update(p2)
+        return sorted(members)
+
+    result = []
+    n = len(p2)
+    j = 0
+    for doc in p1:
+        k = bisect_left(p2, doc, j)
+        result += p2[j:k] # the docIDs of p2 smaller than doc
+        result.append(doc)
+        j = k + 1 if k < n and p2[k] == doc else k # skip doc in p2 if both lists have it
+    result += p2[j:]
+    return result
+
+def union_many(lists):
+    """
+    This function returns the union of any number of sorted postings lists at once, e.g. the postings of every term a wildcard expands to.
+
+    Merging the lists two at a time would copy the growing result once per list, so the docIDs are collected in a set and sorted once instead.
+
+    Args:
+        lists (list): The sorted postings lists.
+
+    Returns:
+        result (list): The sorted docIDs found in any of the lists.
+    """
+
+    if len(lists) == 1:
+        return list(lists[0])
+    return sorted(set().union(*lists))
+
+def difference(p1, p2):
+    """
+    This function returns the docIDs of one sorted postings list that are not in another.
+
+    Args:
+        p1 (list): The sorted postings list to keep docIDs from.
+        p2 (list): The sorted postings list of the docIDs to be removed.
+
+    Returns:
+        result (list): The sorted docIDs found in p1 but not in p2.
+    """
+
+    if len(p1) * GALLOP_RATIO >= len(p2): # p2 is not much longer than p1, so build a set of it once
+        members = set(p2)
+        return [doc for doc in p1 if doc not in members]
+
+    result = []
+    n = len(p2)
+    j = 0
+    for i, doc in enumerate(p1): # p1 is short, so gallop over p2 instead of visiting all of it
+        j = gallop(p2, doc, j)
+        if j == n: # nothing left to remove, the rest of p1 can be copied as is
+            result.extend(p1[i:])
+            break
+        if p2[j] != doc:
+            result.append(doc)
+    return result
+
+def complement(p, docIDs):
+    """
+    This function returns the docIDs that are not in a sorted postings list.
+
+    Args:
+        p (list): The sorted postings list.
+        docIDs (list): The sorted docIDs of every document.
+
+    Returns:
+        result (list): The sorted docIDs found in docIDs but not in p.
+    """
+
+    return difference(docIDs, p)
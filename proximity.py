@@ -0,0 +1,98 @@
+import heapq
+from bisect import bisect_right
+
+def phrase_match(position_lists):
+    """
+    This function checks whether the terms of a phrase appear one right after the other in a document.
+
+    The shortest list of positions is walked, and for every position it could start the phrase at, the other lists are checked with pointers
+    that only move forward, so the cost is linear in the number of positions. It stops at the first match.
+
+    Args:
+        position_lists (list): The sorted positions of every term of the phrase in the document, in the order of the phrase.
+
+    Returns:
+        match (bool): True if the phrase appears in the document.
+    """
+
+    anchor = min(range(len(position_lists)), key=lambda i: len(position_lists[i])) # the rarest term limits where the phrase can start
+    pointers = [0] * len(position_lists)
+    for p in position_lists[anchor]:
+        start = p - anchor # where the phrase would start if this occurrence of the rarest term is part of it
+        found = True
+        for i, positions in enumerate(position_lists):
+            if i == anchor:
+                continue
+            want = start + i
+            j = pointers[i]
+            while j < len(positions) and positions[j] < want: # the starts only increase, so the pointer never has to move back
+                j += 1
+            pointers[i] = j
+            if j == len(positions): # this term has no occurrence left, so no later start can match either
+                return False
+            if positions[j] != want:
+                found = False
+                break
+        if found:
+            return True
+    return False
+
+def unordered_window_match(position_lists, k):
+    """
+    This function checks whether one occurrence of every term can be found within a window of k positions, in any order.
+
+    The smallest window holding one position from each list is found with a sliding window over the merged positions: the window always
+    holds the current position of every list, and the list with the smallest position is moved forward. It stops at the first match.
+
+    Args:
+        position_lists (list): The sorted positions of every term in the document.
+        k (int): The largest allowed distance between the first and the last term of the window.
+
+    Returns:
+        match (bool): True if the terms are within k positions of each other.
+    """
+
+    heap = [(positions[0], i, 0) for i, positions in enumerate(position_lists)] # the current position of every list
+    high = max(h[0] for h in heap) # the last position of the window
+    heapq.heapify(heap)
+    while True:
+        low, i, j = heap[0] # the first position of the window
+        if high - low <= k:
+            return True
+        j += 1
+        if j == len(position_lists[i]): # the term with the smallest position has no occurrence left
+            return False
+        p = position_lists[i][j]
+        high = max(high, p)
+        heapq.heapreplace(heap, (p, i, j))
+
+def ordered_window_match(position_lists, k):
+    """
+    This function checks whether the terms appear in the given order within a window of k positions.
+
+    For every occurrence of the first term, each following term takes its first occurrence after the previous term, which gives the
+    shortest ordered window starting there. The starts only increase, so every pointer only moves forward. It stops at the first match.
+
+    Args:
+        position_lists (list): The sorted positions of every term in the document, in the order they have to appear in.
+        k (int): The largest allowed distance between the first and the last term.
+
+    Returns:
+        match (bool): True if the terms appear in order within k positions.
+    """
+
+    pointers = [0] * len(position_lists)
+    for start in position_lists[0]:
+        previous = start
+        for i in range(1, len(position_lists)):
+            positions = position_lists[i]
+            j = bisect_right(positions, previous, pointers[i]) # the first occurrence after the previous term
+            pointers[i] = j
+            if j == len(positions): # no occurrence left after this start, so no later start can match either
+                return False
+            previous = positions[j]
+            if previous - start > k: # this start is too far away, try the next one
+                break
+        else:
+            return True
+    return False
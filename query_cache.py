@@ -0,0 +1,158 @@
+import threading
+from bitmaps import Bitmap
+from collections import OrderedDict
+
+# default limits of the caches of a Searcher
+RESULT_CACHE_ENTRIES = 1024
+RESULT_CACHE_BYTES = 32 * 1024 * 1024
+SUBEXPRESSION_CACHE_ENTRIES = 4096
+SUBEXPRESSION_CACHE_BYTES = 64 * 1024 * 1024
+EXPANSION_CACHE_ENTRIES = 4096
+EXPANSION_CACHE_BYTES = 16 * 1024 * 1024
+DOCUMENT_CACHE_ENTRIES = 1024
+DOCUMENT_CACHE_BYTES = 64 * 1024 * 1024
+
+def postings_size(p):
+    """
+    This function estimates how many bytes a cached postings list takes: the list itself and a pointer per docID (small docIDs are shared ints),
+    or the int of a bitmap, one bit per document of the index.
+
+    Args:
+        p (list or Bitmap): The postings list.
+
+    Returns:
+        size (int): The estimated number of bytes.
+    """
+
+    if isinstance(p, Bitmap):
+        return 56 + p.space.nbytes
+    return 56 + 8 * len(p)
+
+def document_size(document):
+    """
+    This function estimates how many bytes a cached document takes: its text, and a pointer and a small int for the start and length of every position.
+
+    Args:
+        document (tuple): The text, starts and lengths of the document (see SegmentedIndex.document()).
+
+    Returns:
+        size (int): The estimated number of bytes.
+    """
+
+    text, starts, lengths = document
+    return 200 + len(text or b'') + 16 * (len(starts) + len(lengths))
+
+class LRUCache:
+    """
+    This class is a cache bounded by a number of entries and a number of bytes. When either limit is passed, the least recently used entries are evicted.
+
+    The cache is tagged with the generation of the index its entries were computed on. Looking up or adding an entry with a newer generation
+    clears the cache first, and a query still running on an older generation neither finds nor adds entries, so results computed on an
+    older index are never returned. Hits, misses and evictions are counted so the limits
+    can be sized from real traffic. The cache can be shared by several threads.
+    """
+
+    def __init__(self, max_entries, max_bytes, size=postings_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = size # the function that estimates the bytes of a value
+        self.entries = OrderedDict() # key to (value, bytes), from the least to the most recently used
+        self.bytes = 0
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def _check_generation(self, generation):
+        """
+        This function clears the cache if the index has moved to a newer generation. The lock must be held.
+
+        Returns:
+            current (bool): False if the generation is older than the one of the cache, whose entries must then be left alone.
+        """
+
+        if self.generation is not None and generation < self.generation:
+            return False
+        if generation != self.generation:
+            self.entries.clear()
+            self.bytes = 0
+            self.generation = generation
+        return True
+
+    def get(self, key, generation):
+        """
+        This function looks an entry up and marks it as the most recently used.
+
+        Args:
+            key (str): The key of the entry.
+            generation (int): The generation of the index the caller is using.
+
+        Returns:
+            value: The cached value, or None if the key is not in the cache.
+        """
+
+        with self.lock:
+            entry = self.entries.get(key) if self._check_generation(generation) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, generation):
+        """
+        This function adds an entry as the most recently used one, evicting the least recently used entries if the cache is full.
+
+        A value larger than the whole byte limit is not cached.
+
+        Args:
+            key (str): The key of the entry.
+            value: The value to be cached.
+            generation (int): The generation of the index the value was computed on.
+        """
+
+        size = self.size(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if not self._check_generation(generation):
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        """
+        This function removes every entry, keeping the counters.
+        """
+
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        This function returns the counters of the cache.
+
+        Returns:
+            stats (dict): The hits, misses, hit rate, evictions, and the number of entries and bytes held.
+        """
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+            }
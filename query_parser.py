@@ -0,0 +1,342 @@
+import re
+
+OPERATORS = ['AND', 'OR', 'NOT']
+TOKEN = re.compile(r'"[^"]*"?|\(|\)|[^\s()"]+') # a quoted phrase is a single token, and parentheses are tokens of their own even when they touch a term, e.g. '(heart'
+WINDOW = re.compile(r'([/+])(\d+)$') # '/k' (within k positions, in any order) or '+k' (within k positions, in the given order)
+
+class Term:
+    """
+    A single (already normalized) query term.
+    """
+
+    def __init__(self, term):
+        self.term = term
+
+    def __repr__(self):
+        return self.term
+
+class Wildcard:
+    """
+    A term with '*' in it, which matches any number of characters. It matches the documents of every term of the index that fits the pattern.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __repr__(self):
+        return self.pattern
+
+class Not:
+    """
+    The documents that do not match the child expression.
+    """
+
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return 'NOT {!r}'.format(self.child)
+
+class Phrase:
+    """
+    The documents where the terms appear one right after the other, in the given order.
+    """
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def __repr__(self):
+        return '"' + ' '.join(self.terms) + '"'
+
+class Near:
+    """
+    The documents where the terms appear within k positions of each other, in any order or, if ordered is True, in the given order.
+    """
+
+    def __init__(self, terms, k, ordered=False):
+        self.terms = terms
+        self.k = k
+        self.ordered = ordered
+
+    def __repr__(self):
+        return '({} {}{})'.format(' '.join(self.terms), '+' if self.ordered else '/', self.k)
+
+class And:
+    """
+    The documents that match every child expression. Nested ANDs are flattened into a single node, so the evaluator can order all the operands together.
+    """
+
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return '(' + ' AND '.join(repr(c) for c in self.children) + ')'
+
+class Or:
+    """
+    The documents that match at least one child expression. Nested ORs are flattened into a single node.
+    """
+
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return '(' + ' OR '.join(repr(c) for c in self.children) + ')'
+
+def tokenize(query):
+    """
+    This function splits a query into terms, operators and parentheses.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        tokens (list): The tokens of the query.
+    """
+
+    return TOKEN.findall(query)
+
+class Parser:
+    """
+    This class is a recursive descent parser for boolean queries. NOT binds tighter than AND, which binds tighter than OR, and parentheses group as usual.
+    A phrase in double quotes, or two or more terms followed by a window ('/k' or '+k'), can be used wherever a term can:
+
+        expression := and_expr ('OR' and_expr)*
+        and_expr   := not_expr ('AND' not_expr)*
+        not_expr   := 'NOT' not_expr | '(' expression ')' | phrase | term+ window?
+
+    A single term with '*' in it is a wildcard, e.g. 'retriev*' or '*ization'. Its pattern is lowercased but not stemmed, since the stem of
+    a part of a word is not the part of its stem. Wildcards can not be used in phrases or proximity clauses.
+    """
+
+    def __init__(self, tokens, normalize):
+        self.tokens = tokens
+        self.normalize = normalize
+        self.i = 0
+
+    def peek(self):
+        """
+        This function returns the next token without consuming it (None at the end of the query).
+        """
+
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def next(self):
+        """
+        This function consumes and returns the next token.
+        """
+
+        token = self.peek()
+        if token is None:
+            raise ValueError('Query ends unexpectedly')
+        self.i += 1
+        return token
+
+    def parse(self):
+        """
+        This function parses the whole query and returns the root of the tree.
+        """
+
+        node = self.expression()
+        if self.peek() is not None: # something is left over, e.g. two terms with no operator between them
+            raise ValueError("Unexpected '{}' in query".format(self.peek()))
+        return node
+
+    def expression(self):
+        """
+        This function parses the ORs of one or more and_expr.
+        """
+
+        children = [self.and_expr()]
+        while self.peek() == 'OR':
+            self.next()
+            children.append(self.and_expr())
+        return flatten(Or, children)
+
+    def and_expr(self):
+        """
+        This function parses the ANDs of one or more not_expr.
+        """
+
+        children = [self.not_expr()]
+        while self.peek() == 'AND':
+            self.next()
+            children.append(self.not_expr())
+        return flatten(And, children)
+
+    def not_expr(self):
+        """
+        This function parses a negation, a parenthesized expression, a phrase, a proximity clause or a single term.
+        """
+
+        token = self.next()
+        if token == 'NOT':
+            return Not(self.not_expr())
+        if token == '(':
+            node = self.expression()
+            if self.next() != ')':
+                raise ValueError("Missing ')' in query")
+            return node
+        if token.startswith('"'):
+            if len(token) < 2 or not token.endswith('"'):
+                raise ValueError('Missing \'"\' in query')
+            if '*' in token:
+                raise ValueError("Wildcards can not be used in a phrase: {}".format(token))
+            terms = [term for word in token[1:-1].split() for term in self.normalize(word)] # stopwords are not indexed, and the positions of the index are counted without them
+            if len(terms) <= 1: # a phrase of a single term (or only stopwords, which matches nothing)
+                return Term(terms[0] if terms else '')
+            return Phrase(terms)
+        if token == ')' or token in OPERATORS or WINDOW.match(token):
+            raise ValueError("Unexpected '{}' in query".format(token))
+
+        words = [token]
+        while self.peek() is not None and self.peek() not in OPERATORS and self.peek() not in ('(', ')') and not self.peek().startswith('"') and not WINDOW.match(self.peek()):
+            words.append(self.next()) # the terms of a proximity clause
+        window = WINDOW.match(self.peek() or '')
+        if window is None:
+            if len(words) > 1: # two terms with no operator or window between them
+                raise ValueError("Unexpected '{}' in query".format(words[1]))
+            if '*' in token:
+                return wildcard(token)
+            terms = self.normalize(token)
+            if len(terms) > 1: # a word the documents were split at, e.g. 'machine-learning', is indexed as terms in a row
+                return Phrase(terms)
+            return Term(terms[0] if terms else '') # a stopword matches nothing
+        self.next()
+        if len(words) == 1:
+            raise ValueError("'{}' needs at least two terms".format(window.group(0)))
+        if any('*' in word for word in words):
+            raise ValueError("Wildcards can not be used in a proximity clause: {}".format(' '.join(words)))
+        terms = [term for word in words for term in (self.normalize(word) or [''])] # a stopword is kept as a term that matches nothing
+        return Near(terms, int(window.group(2)), window.group(1) == '+')
+
+def wildcard(token):
+    """
+    This function turns a query word with '*' in it into a Wildcard node.
+
+    Args:
+        token (str): The word, e.g. 'Retriev*'.
+
+    Returns:
+        node (Wildcard): The wildcard, with its pattern lowercased and runs of '*' merged.
+
+    Raises:
+        ValueError: If the word is only made of '*', which would match every term.
+    """
+
+    pattern = re.sub(r'\*+', '*', token.lower())
+    if pattern == '*':
+        raise ValueError("'{}' matches every term, add some letters to it".format(token))
+    return Wildcard(pattern)
+
+def flatten(kind, children):
+    """
+    This function joins children with an AND or an OR, merging in the children that are themselves of the same kind.
+
+    Args:
+        kind (type): And or Or.
+        children (list): The child expressions.
+
+    Returns:
+        node: The single child if there is only one, otherwise a node of the given kind.
+    """
+
+    if len(children) == 1:
+        return children[0]
+    flat = []
+    for child in children:
+        if isinstance(child, kind): # (a AND b) AND c is the same as a AND b AND c
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+    return kind(flat)
+
+def parse_query(query, normalize=lambda word: [word]):
+    """
+    This function parses a boolean query into a tree of Term, Phrase, Near, Not, And and Or nodes.
+
+    Args:
+        query (str): The query, e.g. 'heart AND (attack OR failure) AND NOT disease' or '"heart failure" OR (heart attack /3)'.
+        normalize (function): The function that turns a word of the query into the list of terms it stands for, e.g. normalizer.query_word_terms().
+
+    Returns:
+        node: The root of the tree, or None if the query is empty.
+
+    Raises:
+        ValueError: If the query is not a valid boolean query.
+    """
+
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    return Parser(tokens, normalize).parse()
+
+def canonical(node):
+    """
+    This function returns a canonical string for a query tree, which is the same for every query that is bound to match the same documents.
+
+    The terms are already normalized, and the operands of AND, OR and of an unordered proximity clause are sorted, so 'b AND a' and 'A AND B' give the same string.
+
+    Args:
+        node: The root of the tree.
+
+    Returns:
+        key (str): The canonical string.
+    """
+
+    if isinstance(node, Term):
+        return repr(node.term)
+    if isinstance(node, Wildcard):
+        return 'WILDCARD(' + repr(node.pattern) + ')'
+    if isinstance(node, Phrase):
+        return 'PHRASE(' + ' '.join(repr(t) for t in node.terms) + ')'
+    if isinstance(node, Near):
+        terms = node.terms if node.ordered else sorted(set(node.terms)) # in an unordered window neither the order nor a repeated term matter
+        return '{}{}('.format('ORDERED' if node.ordered else 'NEAR', node.k) + ' '.join(repr(t) for t in terms) + ')'
+    if isinstance(node, Not):
+        return 'NOT(' + canonical(node.child) + ')'
+    keys = sorted(set(canonical(c) for c in node.children)) # 'a AND a' is the same as 'a'
+    return ('AND(' if isinstance(node, And) else 'OR(') + ' '.join(keys) + ')'
+
+def query_terms(node, negated=True):
+    """
+    This function returns every term used by a query tree, including the terms of its phrases and proximity clauses. Wildcards are left
+    out, since their terms depend on the index (see query_patterns()).
+
+    Args:
+        node: The root of the tree.
+        negated (bool): Whether the terms under a NOT are included.
+
+    Returns:
+        terms (set): The terms.
+    """
+
+    if isinstance(node, Term):
+        return {node.term}
+    if isinstance(node, (Phrase, Near)):
+        return set(node.terms)
+    if isinstance(node, Wildcard):
+        return set()
+    if isinstance(node, Not):
+        return query_terms(node.child) if negated else set()
+    return set().union(*(query_terms(c, negated) for c in node.children))
+
+def query_patterns(node, negated=True):
+    """
+    This function returns the pattern of every wildcard in a query tree.
+
+    Args:
+        node: The root of the tree.
+        negated (bool): Whether the wildcards under a NOT are included.
+
+    Returns:
+        patterns (set): The patterns.
+    """
+
+    if isinstance(node, Wildcard):
+        return {node.pattern}
+    if isinstance(node, Not):
+        return query_patterns(node.child) if negated else set()
+    if isinstance(node, (And, Or)):
+        return set().union(*(query_patterns(c, negated) for c in node.children))
+    return set()
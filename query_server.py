@@ -0,0 +1,329 @@
+"""
+A headless HTTP/JSON server for the search engine.
+
+The index is loaded once when the server starts, and every request is answered on a pool of threads so the server keeps accepting
+connections while queries run. Start it from the directory that holds the index:
+
+    python query_server.py --port 8080
+
+Endpoints:
+    GET  /health                  {"status": "ok", "generation": 3}
+    GET  /stats                   the hit and miss counters of the query caches
+    GET  /query?q=heart+AND+attack
+    POST /query  {"query": "heart AND attack"}                 {"query": "heart AND attack", "docs": [1, 7], "count": 2}
+    POST /batch  {"queries": ["heart AND attack", "(a b /3"]}  {"results": [{"query": ..., "docs": [...], "count": 2}, {"query": ..., "error": "..."}]}
+    GET  /rank?q=heart+OR+attack&k=10
+    POST /rank   {"query": "heart attack", "k": 10, "free_text": true}  {"query": "heart attack", "results": [{"doc": 7, "score": 3.1}, ...], "count": 10}
+    GET  /snippets?q=heart+AND+attack&docs=1,7
+    POST /snippets {"query": "heart AND attack", "docs": [1, 7]}  {"query": ..., "snippets": [{"doc": 1, "snippet": "... a [heart] [attack] is ..."}, ...]}
+    GET  /explain?q=heart+AND+attack   how the query was evaluated: every node of the query tree with its sizes and time (see Searcher.explain())
+    GET  /metrics                 counters and histograms in the Prometheus text format (started with --metrics)
+
+Boolean, phrase and proximity queries all use the same syntax as the GUI (see query_parser.py). /rank returns the k documents that match
+a boolean query best, or with free_text the k best documents for a list of words, ranked by BM25. /snippets returns the text around the
+query terms in every given document, e.g. the documents of a result page, cut from the document store of the index.
+"""
+
+import argparse
+import asyncio
+import json
+import instrumentation
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from search_engine import Searcher
+
+MAX_BODY = 16 * 1024 * 1024 # the largest request body accepted, in bytes
+TRUE_WORDS = ('1', 'true', 'yes') # the strings a yes/no parameter such as free_text accepts, see read_flag()
+FALSE_WORDS = ('0', 'false', 'no', '')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+class HTTPError(Exception):
+    """
+    An error that is sent back to the client with the given status code.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class QueryServer:
+    """
+    This class answers HTTP requests with a single shared Searcher.
+
+    Every query pins the generation of the index it started on (see Searcher.pin()), so the searcher can be shared by the threads of a pool.
+    The CPU bound evaluation is handed to the pool and the event loop only parses requests and writes responses.
+    """
+
+    def __init__(self, searcher, threads):
+        self.searcher = searcher
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def run_query(self, query):
+        """
+        This function answers a single query.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            result (dict): The query with its sorted docIDs and their count, or with the error if the query is not valid.
+        """
+
+        try:
+            docs = self.searcher.boolean_query(query)
+        except ValueError as e:
+            return {'query': query, 'error': str(e)}
+        return {'query': query, 'docs': docs, 'count': len(docs)}
+
+    def run_ranked(self, query, k, free_text):
+        """
+        This function answers a ranked query.
+
+        Args:
+            query (str): The query.
+            k (int): The number of documents to be returned.
+            free_text (bool): Whether the query is a list of words rather than a boolean query.
+
+        Returns:
+            result (dict): The query with its best documents and their scores, or with the error if the query is not valid.
+        """
+
+        try:
+            ranked = self.searcher.ranked_query(query, k, free_text)
+        except ValueError as e:
+            return {'query': query, 'error': str(e)}
+        return {'query': query, 'results': [{'doc': doc, 'score': score} for doc, score in ranked], 'count': len(ranked)}
+
+    def run_snippets(self, query, docs, free_text):
+        """
+        This function returns the snippets of some documents for a query (see Searcher.snippets()).
+        """
+
+        try:
+            return {'query': query, 'snippets': self.searcher.snippets(query, docs, free_text)}
+        except ValueError as e:
+            return {'query': query, 'error': str(e)}
+
+    def run_explain(self, query):
+        """
+        This function explains how a query is evaluated (see Searcher.explain()).
+        """
+
+        try:
+            return self.searcher.explain(query)
+        except ValueError as e:
+            return {'query': query, 'error': str(e)}
+
+    def run_batch(self, queries):
+        """
+        This function answers several queries, in order. The batch is evaluated together, so the terms and sub-expressions the queries share are only computed once.
+        """
+
+        return {'results': self.searcher.batch_query(queries)}
+
+    async def handle(self, method, target, body):
+        """
+        This function routes a request to its endpoint.
+
+        Args:
+            method (str): The HTTP method.
+            target (str): The path and query string of the request.
+            body (bytes): The body of the request.
+
+        Returns:
+            status (int): The HTTP status code.
+            payload (dict or str): The JSON response, or a plain text one.
+        """
+
+        url = urlsplit(target)
+        loop = asyncio.get_running_loop()
+
+        if url.path == '/health':
+            return 200, {'status': 'ok', 'generation': self.searcher.generation}
+        if url.path == '/stats':
+            return 200, self.searcher.cache_stats()
+        if url.path == '/metrics':
+            for cache, stats in self.searcher.cache_stats().items(): # the caches keep their own counters, they are copied in when scraped
+                for name in ('hits', 'misses', 'evictions', 'entries', 'bytes'):
+                    instrumentation.set_gauge('cache_{}_{}'.format(cache, name), stats[name], 'The {} of the {} cache'.format(name, cache))
+            return 200, instrumentation.prometheus()
+        if url.path == '/explain':
+            if method == 'GET':
+                query = parse_qs(url.query).get('q', [''])[0]
+            elif method == 'POST':
+                query = read_json(body).get('query')
+            else:
+                raise HTTPError(405, 'Use GET or POST')
+            if not isinstance(query, str):
+                raise HTTPError(400, "'query' must be a string")
+            result = await loop.run_in_executor(self.executor, self.run_explain, query)
+            return (400 if 'error' in result else 200), result
+        if url.path == '/query':
+            if method == 'GET':
+                query = parse_qs(url.query).get('q', [''])[0]
+            elif method == 'POST':
+                query = read_json(body).get('query')
+            else:
+                raise HTTPError(405, 'Use GET or POST')
+            if not isinstance(query, str):
+                raise HTTPError(400, "'query' must be a string")
+            result = await loop.run_in_executor(self.executor, self.run_query, query)
+            return (400 if 'error' in result else 200), result
+        if url.path == '/rank':
+            if method == 'GET':
+                params = parse_qs(url.query)
+                query = params.get('q', [''])[0]
+                k = params.get('k', ['10'])[0]
+                free_text = params.get('free_text', ['false'])[0]
+            elif method == 'POST':
+                data = read_json(body)
+                query, k, free_text = data.get('query'), data.get('k', 10), data.get('free_text', False)
+            else:
+                raise HTTPError(405, 'Use GET or POST')
+            if not isinstance(query, str):
+                raise HTTPError(400, "'query' must be a string")
+            try:
+                k = int(k)
+            except (TypeError, ValueError, OverflowError): # OverflowError for a k such as 1e400, which JSON decodes to inf
+                raise HTTPError(400, "'k' must be an integer")
+            if k < 1:
+                raise HTTPError(400, "'k' must be at least 1")
+            result = await loop.run_in_executor(self.executor, self.run_ranked, query, k, read_flag(free_text, 'free_text'))
+            return (400 if 'error' in result else 200), result
+        if url.path == '/snippets':
+            if method == 'GET':
+                params = parse_qs(url.query)
+                query = params.get('q', [''])[0]
+                docs = [d for d in params.get('docs', [''])[0].split(',') if d]
+                free_text = params.get('free_text', ['false'])[0]
+            elif method == 'POST':
+                data = read_json(body)
+                query, docs, free_text = data.get('query'), data.get('docs'), data.get('free_text', False)
+            else:
+                raise HTTPError(405, 'Use GET or POST')
+            if not isinstance(query, str):
+                raise HTTPError(400, "'query' must be a string")
+            try:
+                docs = [int(d) for d in docs]
+            except (TypeError, ValueError, OverflowError):
+                raise HTTPError(400, "'docs' must be a list of docIDs")
+            result = await loop.run_in_executor(self.executor, self.run_snippets, query, docs, read_flag(free_text, 'free_text'))
+            return (400 if 'error' in result else 200), result
+        if url.path == '/batch':
+            if method != 'POST':
+                raise HTTPError(405, 'Use POST')
+            queries = read_json(body).get('queries')
+            if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                raise HTTPError(400, "'queries' must be a list of strings")
+            return 200, await loop.run_in_executor(self.executor, self.run_batch, queries)
+        raise HTTPError(404, 'Unknown path {}'.format(url.path))
+
+    async def serve_connection(self, reader, writer):
+        """
+        This function reads requests from a connection and writes back their responses until the client closes it (keep-alive is supported).
+        """
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip(): # the client closed the connection
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    method, target, _ = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY:
+                        keep_alive = False # the body is not read, so the connection can not be reused
+                        raise HTTPError(413, 'Request body too large')
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError:
+                    status, payload = 400, {'error': 'Malformed request'}
+                    keep_alive = False
+
+                if isinstance(payload, str):
+                    data, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4' # the Prometheus text format
+                else:
+                    data, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+                    status, REASONS.get(status, ''), content_type, len(data), 'keep-alive' if keep_alive else 'close').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+def read_json(body):
+    """
+    This function decodes a JSON object from a request body.
+
+    Raises:
+        HTTPError: If the body is not a JSON object.
+    """
+
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, 'The body must be JSON')
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'The body must be a JSON object')
+    return data
+
+def read_flag(value, name):
+    """
+    This function reads a yes/no parameter, given as a JSON boolean or as a string such as the value of a query string parameter.
+
+    Raises:
+        HTTPError: If the value is neither.
+    """
+
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in TRUE_WORDS + FALSE_WORDS:
+        return value.lower() in TRUE_WORDS
+    raise HTTPError(400, "'{}' must be true or false".format(name))
+
+async def serve(host, port, threads):
+    """
+    This function loads the index and serves requests until the process is stopped.
+
+    Args:
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+        threads (int): The number of threads queries are evaluated on.
+    """
+
+    app = QueryServer(Searcher(), threads)
+    server = await asyncio.start_server(app.serve_connection, host, port)
+    print("Serving on http://{}:{}".format(host, port))
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve boolean and proximity queries over HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='the port to listen on')
+    parser.add_argument('--threads', type=int, default=4, help='the number of threads queries are evaluated on')
+    parser.add_argument('--metrics', action='store_true', help='record query counters and timings, served at /metrics')
+    args = parser.parse_args()
+    if args.metrics:
+        instrumentation.enable()
+    try:
+        asyncio.run(serve(args.host, args.port, args.threads))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
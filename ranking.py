@@ -0,0 +1,128 @@
+import heapq
+import math
+from itertools import accumulate
+from postings import gallop
+
+# BM25 parameters: K1 limits how much repeating a term keeps adding to the score, B is how much longer documents are penalized
+K1 = 1.2
+B = 0.75
+
+def idf(num_docs, df):
+    """
+    This function returns the BM25 inverse document frequency of a term, which is larger for rarer terms and never negative.
+
+    Args:
+        num_docs (int): The number of documents in the index.
+        df (int): The number of documents the term appears in.
+
+    Returns:
+        idf (float): The weight of the term.
+    """
+
+    return math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+
+def length_stats(doc_lengths):
+    """
+    This function returns the shortest and the average document length, which the BM25 scores and their upper bounds depend on.
+
+    Args:
+        doc_lengths (dict): The number of terms indexed in every document.
+
+    Returns:
+        min_length (int): The length of the shortest document.
+        average_length (float): The average length of a document (1 if there are no terms at all, so it can be divided by).
+    """
+
+    if not doc_lengths:
+        return 0, 1.0
+    total = sum(doc_lengths.values())
+    return min(doc_lengths.values()), (total / len(doc_lengths)) or 1.0
+
+class TermScorer:
+    """
+    This class holds what is needed to score the documents of one query term: its postings list, its frequency in each document, its idf,
+    and the upper bound of its score, which is what a document with the largest frequency of the term and the shortest length would get.
+    """
+
+    def __init__(self, docs, tfs, weight, max_tf, min_length, average_length):
+        self.docs = docs
+        self.tfs = tfs
+        self.weight = weight # the idf of the term
+        self.average_length = average_length
+        self.upper_bound = self.score(max_tf, min_length) # the score grows with the frequency and shrinks with the length
+
+    def score(self, tf, length):
+        """
+        This function returns the BM25 score the term gives a document.
+
+        Args:
+            tf (int): The number of times the term appears in the document.
+            length (int): The number of terms indexed in the document.
+
+        Returns:
+            score (float): The score.
+        """
+
+        return self.weight * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self.average_length))
+
+def top_k(scorers, doc_lengths, k, accept=None):
+    """
+    This function returns the k documents with the highest BM25 scores, without scoring every document that has a query term (MaxScore).
+
+    The terms are sorted by the upper bounds of their scores. Once k documents have been found, the k-th best score is a threshold that a
+    document has to beat. The terms whose upper bounds add up to no more than the threshold are non-essential: a document that only has
+    those terms can not make it into the top k, so candidates are only taken from the postings lists of the essential terms. The
+    non-essential lists are then only searched (galloping forward) while the score of the candidate can still reach the threshold.
+    As the threshold grows, more terms become non-essential and more of the long postings lists of common terms are skipped.
+
+    Args:
+        scorers (list): The TermScorer of every query term.
+        doc_lengths (dict): The number of terms indexed in every document.
+        k (int): The number of documents to be returned.
+        accept (function): If given, only the documents it returns True for are ranked, e.g. the documents that match a boolean query.
+
+    Returns:
+        results (list): (docID, score) pairs, from the highest score to the lowest, ties broken by the smaller docID.
+    """
+
+    scorers = sorted((s for s in scorers if s.docs), key=lambda s: s.upper_bound)
+    n = len(scorers)
+    bounds = list(accumulate(s.upper_bound for s in scorers)) # bounds[i] is the most the terms 0 to i can add to a score together
+    pointers = [0] * n # the next document of every postings list
+    heap = [] # (score, -docID) of the best documents so far, the worst one first
+    threshold = 0.0 # the score a document has to beat once the heap is full
+    first = 0 # scorers[first:] are the essential terms
+
+    while first < n and k > 0:
+        doc = min((scorers[i].docs[pointers[i]] for i in range(first, n) if pointers[i] < len(scorers[i].docs)), default=None)
+        if doc is None: # every essential list is exhausted
+            break
+        length = doc_lengths[doc]
+        score = 0.0
+        for i in range(first, n): # the candidate is taken from the essential lists, so they are all moved past it
+            s = scorers[i]
+            j = pointers[i]
+            if j < len(s.docs) and s.docs[j] == doc:
+                score += s.score(s.tfs[j], length)
+                pointers[i] = j + 1
+        if accept is not None and not accept(doc):
+            continue
+        for i in range(first - 1, -1, -1): # the non-essential terms, from the largest bound to the smallest
+            if score + bounds[i] < threshold: # even with every remaining term the candidate can not beat the threshold
+                break
+            s = scorers[i]
+            j = gallop(s.docs, doc, pointers[i])
+            pointers[i] = j
+            if j < len(s.docs) and s.docs[j] == doc:
+                score += s.score(s.tfs[j], length)
+
+        if len(heap) < k:
+            heapq.heappush(heap, (score, -doc))
+        elif (score, -doc) > heap[0]:
+            heapq.heapreplace(heap, (score, -doc))
+        if len(heap) == k:
+            threshold = heap[0][0]
+            while first < n and bounds[first] < threshold: # the terms that can no longer lift a document into the top k on their own
+                first += 1
+
+    return [(-doc, score) for score, doc in sorted(heap, reverse=True)]
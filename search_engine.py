@@ -0,0 +1,800 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import instrumentation
+from bitmaps import Bitmap, DocSpace, hybrid_complement, hybrid_difference, hybrid_intersect, hybrid_union, read_bitmap, to_list
+from doc_store import SNIPPET_RADIUS, snippet
+from normalizer import query_word_terms, stopwords
+from postings import complement, intersect, union, union_many
+from proximity import ordered_window_match, phrase_match, unordered_window_match
+from query_cache import DOCUMENT_CACHE_BYTES, DOCUMENT_CACHE_ENTRIES, EXPANSION_CACHE_BYTES, EXPANSION_CACHE_ENTRIES, LRUCache, RESULT_CACHE_BYTES, RESULT_CACHE_ENTRIES, SUBEXPRESSION_CACHE_BYTES, SUBEXPRESSION_CACHE_ENTRIES, document_size
+from ranking import TermScorer, idf, length_stats, top_k
+from query_parser import And, Near, Not, Or, Phrase, Term, Wildcard, canonical, parse_query, query_patterns, query_terms
+from segments import INDEX_DIR, MANIFEST, SegmentedIndex, collect_garbage, load_manifest
+from wildcards import MAX_EXPANSIONS
+
+def extract_indexes():
+    """
+    This function is used to extract the inverted index and the positional index from the index segments.
+
+    Every term is decoded, so this is only meant for tools that need the whole index in memory. Queries go through the Searcher, which decodes only the terms they use.
+
+    Returns:
+        inverted_index (dict): The extracted inverted index.
+        positional_index (dict): The extracted positional index.
+    """
+
+    inverted_index = {}
+    positional_index = {}
+    with SegmentedIndex(INDEX_DIR) as index:
+        for term, positions in index.items(): # loop through every term along with its positions in each doc
+            inverted_index[term] = list(positions) # the docIDs of the term, in sorted order
+            positional_index[term] = positions
+    return inverted_index, positional_index
+
+def get_docIDs():
+    """
+    This function is used to extract document IDs based on the names of the files in the 'ResearchPapers' directory.
+
+    It gets the current working directory and lists all the files in the 'ResearchPapers' directory. 
+    It then extracts the document IDs from the names of these files, sorts them, and returns the sorted list.
+    Assumes the 'ResearchPapers' folder is in your current working directory.
+
+    Returns:
+        docID (list): A sorted list of document IDs extracted from the file names in the 'ResearchPapers' directory.
+    """
+
+    curr_dir = os.getcwd() # get the current directory
+    docID = [int(c.rstrip('.txt')) for c in os.listdir(os.path.join(curr_dir, 'ResearchPapers'))] # extract the docIDs from the names of the files in the ResearchPapers directory
+    docID.sort()
+    return docID
+
+def INTERSECTION(p1, p2):
+    """
+    This function returns the intersection of two lists.
+
+    Args:
+        p1 (list): The first sorted list.
+        p2 (list): The second sorted list.
+
+    Returns:
+        result (list): A list containing the elements common to p1 and p2.
+    """
+
+    return intersect(p1, p2) # both lists are sorted, so they can be merged instead of searching p2 for every element of p1
+
+def UNION(p1, p2):
+    """
+    This function returns the union of two lists.
+
+    Args:
+        p1 (list): The first sorted list.
+        p2 (list): The second sorted list.
+
+    Returns:
+        result (list): A list containing the elements from both p1 and p2, without duplicates.
+    """
+
+    return union(p1, p2) # merge the two sorted lists into a new one, leaving both inputs untouched
+
+def NOT(p1):
+    """
+    This function returns the elements that are in a predefined list but not in the input list.
+
+    Args:
+        p1 (list): The input sorted list.
+
+    Returns:
+        result (list): A list containing the elements that are in 'doc' but not in p1.
+    """
+
+    doc = get_docIDs() # get the docIDs
+    return complement(p1, doc) # walk doc and p1 together, keeping the docIDs missing from p1
+
+class IndexView:
+    """
+    This class holds one generation of the index along with what the queries derive from it. A query reads the view once when it starts
+    and is evaluated on it to the end, so it never mixes two generations (see Searcher.pin()).
+    """
+
+    def __init__(self, index, epoch):
+        self.epoch = epoch # counts the views of a searcher, the caches are tagged with it since it only goes up, even if the index is deleted and created again
+        self.index = index # the memory mapped index segments, the postings of a term are only decoded when a query uses it
+        self.generation = index.generation # goes up every time the index is rebuilt or updated
+        self.docIDs = index.docIDs # needed by the NOT operator
+        self.space = DocSpace(self.docIDs) # gives every live document a bit, for the postings lists kept as bitmaps
+        self.length_stats = None # the shortest and average document lengths, needed by the ranked queries and computed by the first one
+        self.users = 0 # the number of queries running on the view
+
+def pinned(method):
+    """
+    This decorator runs a method of Searcher on a single generation of the index, see Searcher.pin().
+    """
+
+    @wraps(method)
+    def run(self, *args, **kwargs):
+        with self.pin():
+            return method(self, *args, **kwargs)
+    return run
+
+class Searcher:
+    """
+    This class holds everything a query needs: the index, the stopwords and the docIDs. Query words are normalized by normalizer.py, the same module that normalized the documents.
+
+    The index files are opened once when the searcher is created, and only the postings of the terms a query uses are decoded.
+    A single searcher is meant to be created once and then reused for every query.
+
+    The results of whole queries, and of every sub-expression of a query, are kept in LRU caches keyed on the canonical form of the query tree.
+    The caches are tied to the generation of the index (through the epoch of the view, see IndexView), so they are emptied when the index is rebuilt or updated.
+
+    A wildcard ('retriev*', '*ization') is expanded to the terms of the index that match it, at most max_expansions of them.
+
+    The text of the most recently shown documents is kept in an LRU cache too, for the snippets of result pages (see snippets()).
+
+    The searcher can be shared by several threads. Every query is pinned to the generation of the index that is current when it starts
+    (see pin()), so a refresh by another thread does not change the index, the bitmaps or the cache tags of a query that is running.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR, max_expansions=MAX_EXPANSIONS):
+        self.index_dir = index_dir
+        self.max_expansions = max_expansions
+        self.manifest_mtime = os.stat(os.path.join(index_dir, MANIFEST)).st_mtime_ns # used to notice when the index changes
+        self.lock = threading.RLock() # guards the switch to a new generation and the number of queries running on every view
+        self.local = threading.local() # the view the query running on this thread is pinned to
+        self.view = None
+        self.open_index()
+        self.stopwords = stopwords() # a frozenset, shared with the index creation
+        self.result_cache = LRUCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES)
+        self.subexpression_cache = LRUCache(SUBEXPRESSION_CACHE_ENTRIES, SUBEXPRESSION_CACHE_BYTES)
+        self.expansion_cache = LRUCache(EXPANSION_CACHE_ENTRIES, EXPANSION_CACHE_BYTES, size=lambda terms: 56 + 64 * len(terms)) # the terms of every wildcard
+        self.document_cache = LRUCache(DOCUMENT_CACHE_ENTRIES, DOCUMENT_CACHE_BYTES, size=document_size) # the text and spans of the hot documents
+        self.trace = threading.local() # the frames of the query being explained by this thread, see explain()
+
+    def open_index(self):
+        """
+        This function opens the current generation of the index, along with what the queries derive from it.
+
+        The generation the searcher used before is given up once the last query running on it has finished (see retire()).
+        """
+
+        with self.lock:
+            old = self.view
+            self.view = IndexView(SegmentedIndex(self.index_dir), old.epoch + 1 if old is not None else 0)
+            if old is not None and old.users == 0:
+                self.retire(old)
+
+    def retire(self, view):
+        """
+        This function gives up an old generation of the index. Its files are removed once no other searcher holds it either.
+        """
+
+        view.index.release()
+        try:
+            collect_garbage(self.index_dir)
+        except OSError: # e.g. the searcher may not write to the index directory, the next index update collects it
+            pass
+
+    def refresh(self):
+        """
+        This function reopens the index if it has been rebuilt or updated since it was opened. The caches notice the new generation and empty themselves.
+        """
+
+        with self.lock:
+            mtime = os.stat(os.path.join(self.index_dir, MANIFEST)).st_mtime_ns
+            if mtime == self.manifest_mtime: # checking the modification time is much cheaper than reading the manifest on every query
+                return
+            self.manifest_mtime = mtime
+            if load_manifest(self.index_dir)['generation'] != self.view.generation:
+                self.open_index()
+
+    @contextmanager
+    def pin(self):
+        """
+        This function pins the queries of the current thread to the current generation of the index, refreshing it first.
+
+        Within the pin, index, generation, docIDs and space are those of the pinned view, so a query evaluates every node and tags every
+        cache entry with the same generation even if another thread refreshes the searcher meanwhile. Pins nest, the outermost one counts.
+        """
+
+        if getattr(self.local, 'view', None) is not None: # already pinned by a method further up the stack
+            yield self.local.view
+            return
+        self.refresh()
+        with self.lock:
+            view = self.view
+            view.users += 1
+        self.local.view = view
+        try:
+            yield view
+        finally:
+            self.local.view = None
+            with self.lock:
+                view.users -= 1
+                if view.users == 0 and view is not self.view: # the last query on an old generation
+                    self.retire(view)
+
+    def current_view(self):
+        """
+        This function returns the view pinned by the current thread, or the current one outside of a query.
+        """
+
+        return getattr(self.local, 'view', None) or self.view
+
+    @property
+    def index(self):
+        return self.current_view().index
+
+    @property
+    def generation(self):
+        return self.current_view().generation
+
+    @property
+    def epoch(self):
+        return self.current_view().epoch
+
+    @property
+    def docIDs(self):
+        return self.current_view().docIDs
+
+    @property
+    def space(self):
+        return self.current_view().space
+
+    def cache_stats(self):
+        """
+        This function returns the hit and miss counters of the caches, to help size them.
+
+        Returns:
+            stats (dict): The counters of the result, sub-expression, wildcard expansion and document caches (see LRUCache.stats()).
+        """
+
+        return {'results': self.result_cache.stats(), 'subexpressions': self.subexpression_cache.stats(), 'expansions': self.expansion_cache.stats(),
+                'documents': self.document_cache.stats()}
+
+    def stem(self, word):
+        """
+        This function normalizes a query word the same way the words were normalized while creating the indexes.
+
+        Args:
+            word (str): The word to be normalized.
+
+        Returns:
+            terms (list): The terms to look up in the index (see query_word_terms()).
+        """
+
+        return query_word_terms(word)
+
+    @pinned
+    def expand(self, pattern):
+        """
+        This function finds the terms of the index that match a wildcard pattern, remembering them for the next query that uses it.
+
+        Args:
+            pattern (str): The pattern, with '*' matching any number of characters.
+
+        Returns:
+            terms (list): The sorted matching terms.
+
+        Raises:
+            ValueError: If the pattern matches more than max_expansions terms.
+        """
+
+        terms = self.expansion_cache.get(pattern, self.epoch)
+        if terms is None:
+            terms = self.index.expand(pattern, self.max_expansions)
+            self.expansion_cache.put(pattern, terms, self.epoch)
+        return terms
+
+    def boolean_query(self, query):
+        """
+        This function processes a boolean query and returns the matching docIDs.
+
+        The query is parsed into a tree (NOT binds tighter than AND, which binds tighter than OR, and parentheses group as usual) and the tree is evaluated directly on the postings lists.
+        Phrases ('"a b c"') and proximity clauses ('a b /k' in any order, 'a b +k' in the given order) can be used like terms.
+
+        Args:
+            query (str): The boolean query to be processed.
+
+        Returns:
+            result (list): A sorted list of docIDs that satisfy the query.
+
+        Raises:
+            ValueError: If the query is not a valid boolean query.
+        """
+
+        with instrumentation.stage('query'), self.pin():
+            instrumentation.inc('queries_total', help='Boolean, phrase and proximity queries answered')
+            with instrumentation.stage('query_parse'):
+                node = parse_query(query, self.stem) # every term is stemmed once while parsing
+            if node is None: # the query is empty
+                return []
+
+            return list(self.cached_result(canonical(node), node)) # a copy, so the caller can not change the cached list
+
+    @pinned
+    def cached_result(self, key, node):
+        """
+        This function returns the result of a whole query from the result cache, evaluating it first if it is not cached.
+
+        Args:
+            key (str): The canonical form of the query tree. Queries that only differ in case, word forms or operand order share an entry.
+            node: The root of the tree.
+
+        Returns:
+            result (list): A sorted list of docIDs, shared with the cache.
+        """
+
+        result = self.result_cache.get(key, self.epoch)
+        if result is None:
+            with instrumentation.stage('query_evaluate'):
+                result = to_list(self.evaluate(node)) # the caller gets docIDs even if the evaluation ended on a bitmap
+            self.result_cache.put(key, result, self.epoch)
+        return result
+
+    @pinned
+    def explain(self, query, use_cache=False):
+        """
+        This function evaluates a query and reports how it was evaluated (like EXPLAIN ANALYZE in a database).
+
+        Every node of the query tree is reported with its operator, the size estimated from the document frequencies, the number of docIDs
+        it actually matched, whether that was a bitmap or a list, and its wall time including its children. Phrases and proximity clauses
+        also report how many documents had every term and had their positions checked, and wildcards how many terms they expanded to.
+
+        Args:
+            query (str): The query.
+            use_cache (bool): Whether cached sub-expressions may be used. By default everything is evaluated from the index, so the times are those of a cold query.
+
+        Returns:
+            plan (dict): The query, its canonical form, the time spent parsing (including stemming) and evaluating it, the number of docIDs
+            it matched, and the tree of nodes (see format_plan()).
+
+        Raises:
+            ValueError: If the query is not a valid boolean query.
+        """
+
+        start = time.perf_counter()
+        node = parse_query(query, self.stem)
+        parsed = time.perf_counter()
+        plan = {'query': query, 'canonical': None, 'parse_ms': (parsed - start) * 1000, 'evaluate_ms': 0.0, 'count': 0, 'tree': None}
+        if node is None:
+            return plan
+
+        root = {'children': []}
+        self.trace.frames = [root]
+        self.trace.use_cache = use_cache
+        try:
+            result = to_list(self.evaluate(node))
+        finally:
+            self.trace.frames = None
+        plan.update(canonical=canonical(node), evaluate_ms=(time.perf_counter() - parsed) * 1000, count=len(result), tree=root['children'][0])
+        return plan
+
+    def note(self, key, value):
+        """
+        This function adds a detail to the node being evaluated, if the query is being explained.
+        """
+
+        frames = getattr(self.trace, 'frames', None)
+        if frames is not None:
+            frames[-1][key] = value
+
+    def evaluate_traced(self, node, frames):
+        """
+        This function evaluates a node of a query that is being explained, recording it in the tree of frames.
+        """
+
+        frame = {'operator': type(node).__name__.upper(), 'node': repr(node), 'estimate': self.estimate(node), 'children': []}
+        frames[-1]['children'].append(frame)
+        frames.append(frame)
+        start = time.perf_counter()
+        try:
+            key = canonical(node)
+            result = self.subexpression_cache.get(key, self.epoch) if self.trace.use_cache else None
+            frame['cached'] = result is not None
+            if result is None:
+                result = self.evaluate_uncached(node)
+                if self.trace.use_cache:
+                    self.subexpression_cache.put(key, result, self.epoch)
+        finally:
+            frames.pop()
+        frame['time_ms'] = (time.perf_counter() - start) * 1000
+        frame['size'] = len(result)
+        frame['representation'] = 'bitmap' if isinstance(result, Bitmap) else 'list'
+        if not frame['children']:
+            del frame['children']
+        return result
+
+    @pinned
+    def batch_query(self, queries):
+        """
+        This function answers a batch of queries, sharing the work they have in common.
+
+        Every query is parsed first, and queries with the same canonical form are evaluated only once. The postings list of every term
+        used in the batch is then fetched once into the sub-expression cache, so the terms and sub-expressions that several queries share
+        are not decoded or computed again for each of them.
+
+        Args:
+            queries (list): The queries.
+
+        Returns:
+            results (list): For every query, in order, a dict with the query, its sorted docIDs and their count, or with the error if the query is not valid.
+        """
+
+        parsed = [] # (query, key, node, error) for every query
+        distinct = {} # the canonical form of every distinct valid query to its tree
+        for query in queries:
+            try:
+                node = parse_query(query, self.stem)
+            except ValueError as e:
+                parsed.append((query, None, None, str(e)))
+                continue
+            key = canonical(node) if node is not None else None
+            if node is not None:
+                distinct.setdefault(key, node)
+            parsed.append((query, key, node, None))
+
+        terms = set()
+        for node in distinct.values():
+            terms.update(query_terms(node))
+        for term in sorted(terms): # fetch every postings list once, the queries then find them in the cache
+            self.evaluate(Term(term))
+        answers = {key: self.cached_result(key, node) for key, node in distinct.items()}
+
+        results = []
+        for query, key, node, error in parsed:
+            if error is not None:
+                results.append({'query': query, 'error': error})
+            else:
+                docs = list(answers[key]) if node is not None else [] # an empty query matches nothing
+                results.append({'query': query, 'docs': docs, 'count': len(docs)})
+        return results
+
+    @pinned
+    def ranked_query(self, query, k=10, free_text=False):
+        """
+        This function returns the k documents that match a query best, ranked by their BM25 scores.
+
+        A boolean query is evaluated as usual, and the documents that match it are ranked on the terms that are not negated. A free text
+        query is a list of words, and any document that has one of them can be returned. Only the best k documents are ever kept, and the
+        documents that can not make it into the top k are skipped without being scored (see ranking.top_k()).
+
+        Args:
+            query (str): The query.
+            k (int): The number of documents to be returned.
+            free_text (bool): Whether the query is a list of words rather than a boolean query.
+
+        Returns:
+            results (list): (docID, score) pairs, from the best match to the worst.
+
+        Raises:
+            ValueError: If the query is not a valid boolean query.
+        """
+
+        instrumentation.inc('ranked_queries_total', help='Ranked queries answered')
+        if free_text:
+            terms = {term for word in query.split() for term in self.stem(word)}
+            matches = None
+        else:
+            node = parse_query(query, self.stem)
+            if node is None: # the query is empty
+                return []
+            matches = self.cached_result(canonical(node), node)
+            if not matches:
+                return []
+            terms = query_terms(node, negated=False)
+            for pattern in query_patterns(node, negated=False): # a wildcard is ranked on the terms it matched
+                terms.update(self.expand(pattern))
+
+        view = self.current_view()
+        if view.length_stats is None:
+            view.length_stats = length_stats(self.index.doc_lengths)
+        min_length, average_length = view.length_stats
+        scorers = []
+        for term in sorted(terms):
+            docs, tfs = self.index.frequencies(term)
+            if docs:
+                scorers.append(TermScorer(docs, tfs, idf(len(self.docIDs), len(docs)), self.index.max_tf(term), min_length, average_length))
+        results = top_k(scorers, self.index.doc_lengths, k, None if matches is None else set(matches).__contains__)
+
+        if matches is not None and len(results) < k: # documents that only match through a NOT have no term to be scored on
+            found = {doc for doc, _ in results}
+            results += [(doc, 0.0) for doc in matches if doc not in found][:k - len(results)]
+        return results
+
+    @pinned
+    def document(self, doc):
+        """
+        This function returns the text of a document and the span of every one of its positions, from the document cache or the document store.
+
+        Args:
+            doc (int): The docID.
+
+        Returns:
+            document (tuple): The text in utf-8 bytes (None if the index has no document store), the starts and the lengths of the positions (see SegmentedIndex.document()).
+        """
+
+        document = self.document_cache.get(doc, self.epoch)
+        if document is None:
+            document = self.index.document(doc)
+            self.document_cache.put(doc, document, self.epoch)
+        return document
+
+    @pinned
+    def snippets(self, query, docs, free_text=False, radius=SNIPPET_RADIUS):
+        """
+        This function returns a snippet of every document of a result page, with the query terms highlighted.
+
+        The positions of the query terms come from the positional index and their text from the document store, so no document is read
+        from its file or tokenized again. The snippet is cut around the first position of any query term in the document.
+
+        Args:
+            query (str): The query the documents were found with.
+            docs (list): The docIDs of the documents.
+            free_text (bool): Whether the query is a list of words rather than a boolean query.
+            radius (int): The number of bytes of text shown on each side of the first match.
+
+        Returns:
+            snippets (list): A {'doc', 'snippet'} dict for every document, in order. The snippet is None if the document has no stored text.
+
+        Raises:
+            ValueError: If the query is not a valid boolean query.
+        """
+
+        if free_text:
+            terms = {term for word in query.split() for term in self.stem(word)}
+        else:
+            node = parse_query(query, self.stem)
+            terms = query_terms(node, negated=False) if node is not None else set()
+            for pattern in (query_patterns(node, negated=False) if node is not None else []):
+                terms.update(self.expand(pattern))
+
+        wanted = sorted(set(docs))
+        hits = {doc: [] for doc in wanted} # the positions of every query term in every document of the page
+        for term in terms:
+            for doc, positions in self.index.positions(term, wanted).items(): # only the documents of the page are decoded
+                hits[doc].extend(positions)
+
+        results = []
+        for doc in docs:
+            text, starts, lengths = self.document(doc)
+            results.append({'doc': doc, 'snippet': None if text is None else snippet(text, starts, lengths, sorted(hits[doc]), radius)})
+        return results
+
+    def estimate(self, node):
+        """
+        This function estimates how many docIDs a query tree will match, from the document frequencies stored in the lexicon and without decoding any postings.
+
+        Args:
+            node: The root of the tree.
+
+        Returns:
+            size (int): The estimated number of docIDs.
+        """
+
+        if isinstance(node, Term):
+            return self.index.df(node.term)
+        if isinstance(node, Wildcard):
+            return min(len(self.docIDs), sum(self.index.df(t) for t in self.expand(node.pattern)))
+        if isinstance(node, (Phrase, Near)):
+            return min(self.index.df(t) for t in node.terms) # can not match more docIDs than its rarest term
+        if isinstance(node, Not):
+            return len(self.docIDs) - self.estimate(node.child)
+        if isinstance(node, And):
+            return min(self.estimate(c) for c in node.children) # an AND can not match more docIDs than its smallest operand
+        return min(len(self.docIDs), sum(self.estimate(c) for c in node.children)) # an OR can not match more docIDs than all its operands together
+
+    def evaluate(self, node):
+        """
+        This function evaluates a query tree, reusing the cached result of any sub-expression that was evaluated before on the same generation of the index.
+
+        Args:
+            node: The root of the tree.
+
+        Returns:
+            result (list or Bitmap): The matching docIDs, as a sorted list or a bitmap (see bitmaps.py). It may be shared with the cache, so it must not be modified.
+        """
+
+        frames = getattr(self.trace, 'frames', None)
+        if frames is not None: # the query is being explained
+            return self.evaluate_traced(node, frames)
+
+        key = canonical(node)
+        result = self.subexpression_cache.get(key, self.epoch)
+        if result is None:
+            result = self.evaluate_uncached(node)
+            self.subexpression_cache.put(key, result, self.epoch)
+        return result
+
+    def evaluate_uncached(self, node):
+        """
+        This function evaluates a query tree on the postings lists.
+
+        The operands of an AND are intersected from the smallest to the largest, and evaluation stops as soon as the result is empty.
+        Negated operands of an AND ('a AND NOT b') are removed from the result with a difference, so the complement over every document is only built for a NOT that stands alone.
+        The postings of common terms are read as bitmaps, so the operators on them are bitwise operations instead of list merges.
+
+        Args:
+            node: The root of the tree.
+
+        Returns:
+            result (list or Bitmap): The matching docIDs.
+        """
+
+        if isinstance(node, Term):
+            with instrumentation.stage('postings_fetch'):
+                if self.space.is_dense(self.index.df(node.term)): # a common term is read as a bitmap, without decoding its postings to a list
+                    return read_bitmap(self.index.encoded_postings(node.term), self.space)
+                return self.index.postings(node.term) # get the postings list for the term from the index (an empty list if the term is not found)
+        if isinstance(node, Wildcard):
+            return self.evaluate_wildcard(node)
+        if isinstance(node, (Phrase, Near)):
+            return self.evaluate_positional(node)
+        if isinstance(node, Not):
+            return hybrid_complement(self.evaluate(node.child), self.space) # the complement is taken over the live docIDs of the index
+        if isinstance(node, Or):
+            result = []
+            for child in sorted(node.children, key=self.estimate): # merging the small lists first keeps the intermediate results small
+                result = hybrid_union(result, self.evaluate(child))
+            return result
+
+        positives = [c for c in node.children if not isinstance(c, Not)]
+        negatives = [c.child for c in node.children if isinstance(c, Not)]
+        if not positives: # NOT a AND NOT b is NOT (a OR b)
+            return hybrid_complement(self.evaluate(Or(negatives)), self.space)
+
+        result = None
+        for child in sorted(positives, key=self.estimate): # intersect the operands from the rarest to the most common
+            p = self.evaluate(child)
+            result = p if result is None else hybrid_intersect(result, p)
+            if not result: # nothing can be added back once the result is empty, so the remaining operands are not evaluated
+                self.note('short_circuit', True)
+                return []
+        for child in sorted(negatives, key=self.estimate):
+            result = hybrid_difference(result, self.evaluate(child))
+            if not result:
+                return []
+        return result
+
+    def evaluate_wildcard(self, node):
+        """
+        This function returns the documents of every term a wildcard matches.
+
+        The postings lists are merged all at once: as a bitmap if together they cover a large part of the documents, or else as a sorted list.
+
+        Args:
+            node (Wildcard): The wildcard.
+
+        Returns:
+            result (list or Bitmap): The matching docIDs.
+        """
+
+        terms = self.expand(node.pattern)
+        self.note('expansions', len(terms))
+        if self.space.is_dense(sum(self.index.df(t) for t in terms)):
+            return read_bitmap([part for t in terms for part in self.index.encoded_postings(t)], self.space) # every docID sets its bit, so the duplicates cost nothing
+        lists = [self.index.postings(t) for t in terms]
+        return union_many(lists) if lists else []
+
+    def proximity_query(self, query):
+        """
+        This function processes a proximity query, e.g. 'term1 term2 /distance'.
+
+        Proximity clauses are part of the boolean query language (see query_parser.py), so this is the same as boolean_query().
+
+        Args:
+            query (str): The proximity query to be processed.
+
+        Returns:
+            result (list): A sorted list of docIDs that satisfy the proximity query.
+        """
+
+        return self.boolean_query(query)
+
+    def evaluate_positional(self, node):
+        """
+        This function evaluates a phrase or a proximity clause on the positional index.
+
+        Only the documents that have every term (the intersection of their postings lists) are checked, and in each of them the positions
+        are matched in a single forward pass that stops at the first match (see proximity.py). Only the positions of those documents are decoded. The postings lists of the terms come from the
+        sub-expression cache, so they are shared with the other queries that use the same terms.
+
+        Args:
+            node (Phrase or Near): The phrase or proximity clause.
+
+        Returns:
+            result (list): A sorted list of docIDs.
+        """
+
+        terms = node.terms
+        if isinstance(node, Near) and not node.ordered:
+            terms = list(dict.fromkeys(terms)) # in an unordered window a repeated term is matched by a single occurrence
+        docs = None
+        for t in sorted(set(terms), key=self.index.df): # intersect from the rarest term to the most common
+            p = self.evaluate(Term(t))
+            docs = p if docs is None else hybrid_intersect(docs, p)
+        docs = to_list(docs)
+        if not docs:
+            return []
+
+        self.note('candidates', len(docs)) # the documents whose positions are checked
+        with instrumentation.stage('positions_match'):
+            positions = {t: self.index.positions(t, docs) for t in set(terms)} # only the positions of the candidates are decoded
+            if isinstance(node, Phrase):
+                match = phrase_match
+            elif node.ordered:
+                match = lambda lists: ordered_window_match(lists, node.k)
+            else:
+                match = lambda lists: unordered_window_match(lists, node.k)
+            return [doc for doc in docs if match([positions[t][doc] for t in terms])]
+
+_searcher = None # the searcher shared by every query, created on first use
+
+def get_searcher():
+    """
+    This function returns the shared searcher, creating it (and so loading the indexes) the first time it is called.
+
+    Returns:
+        searcher (Searcher): The shared searcher.
+    """
+
+    global _searcher
+    if _searcher is None:
+        _searcher = Searcher()
+    return _searcher
+
+def format_plan(plan):
+    """
+    This function formats the result of Searcher.explain() as an indented tree, one node per line.
+
+    Args:
+        plan (dict): The result of explain().
+
+    Returns:
+        text (str): The formatted plan.
+    """
+
+    lines = ['{}  ->  {} docs  (parse {:.3f} ms, evaluate {:.3f} ms)'.format(plan['query'], plan['count'], plan['parse_ms'], plan['evaluate_ms'])]
+
+    def add(frame, depth):
+        details = ''.join(', {} {}'.format(key, frame[key]) for key in ('candidates', 'expansions', 'short_circuit') if key in frame)
+        lines.append('{}{} {}  estimate {}, size {} ({}), {:.3f} ms{}{}'.format(
+            '  ' * depth, frame['operator'], frame['node'], frame['estimate'], frame['size'], frame['representation'], frame['time_ms'],
+            ', cached' if frame['cached'] else '', details))
+        for child in frame.get('children', []):
+            add(child, depth + 1)
+
+    if plan['tree'] is not None:
+        add(plan['tree'], 1)
+    return '\n'.join(lines)
+
+def BoolQueryProcessing(query):
+    """
+    This function processes the query and returns the result based on the type of query.
+
+    Args:
+        query (str): The query to be processed.
+
+    Returns:
+        result (str): The docIDs that satisfy the query, separated by spaces.
+    """
+
+    result = get_searcher().boolean_query(query)
+    result = ''.join([str(c) + ' ' for c in result]) # convert the result to a string
+    return result
+
+def ProxQueryProcessing(query):
+    """
+    This function processes a proximity query.
+
+    Parameters:
+    query (str): The proximity query to be processed.
+
+    Returns:
+    str: A string of document IDs that satisfy the proximity query.
+    """
+
+    result = get_searcher().proximity_query(query)
+    result = ''.join([str(c) + ' ' for c in result]) # convert the result to a string
+    return result
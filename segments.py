@@ -0,0 +1,576 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from itertools import groupby
+from doc_store import DocStore
+from index_format import IndexReader
+from postings import difference, union
+from wildcards import MAX_EXPANSIONS, expand
+
+try:
+    import fcntl
+except ImportError: # not available on Windows, where the readers hold no leases and the files of an open segment can not be removed anyway
+    fcntl = None
+
+INDEX_DIR = 'index' # the directory the index segments and the manifest are saved in
+MANIFEST = 'manifest.json'
+GENERATIONS_DIR = 'generations' # the snapshot and the lease file of every generation that may still have readers
+WRITER_LOCK = 'writer.lock' # the lock file held by the process that is changing the index, see writer_lock()
+_writer_threads = {} # the directory of every index this process has written to its threading lock, see writer_lock()
+if hasattr(os, 'register_at_fork'): # a forked child starts without the writers of its parent, not with copies of their held locks
+    os.register_at_fork(after_in_child=_writer_threads.clear)
+SEGMENT_FILE = re.compile(r'segment(\d+)\.(?:lex|post|kgram|docs)$')
+
+# the delta segments are merged into the base segment once their postings take this fraction of the size of the base postings, or once there are more than MAX_SEGMENTS segments
+MERGE_RATIO = 0.25
+MAX_SEGMENTS = 8
+
+# The index is made of segments, each one an index in the binary format saved as '<INDEX_DIR>/<name>.lex' and '<INDEX_DIR>/<name>.post',
+# along with the k-gram file '<INDEX_DIR>/<name>.kgram' used by wildcard queries and the document store '<INDEX_DIR>/<name>.docs' used by snippets.
+# The first segment is the base, and every update that adds or changes documents appends a delta segment with just those documents.
+# 'manifest.json' lists the segments in the order they were added. Each entry has the docIDs deleted from that segment (its tombstones),
+# because the document was removed, or because it was changed and its new version is in a later segment.
+# The manifest also holds the fingerprint of every indexed document and the generation of the index, which goes up by one on every change.
+#
+# Segment files are never changed once written, so a generation is fully described by its list of segments and their tombstones. Every
+# time the manifest is saved, that list is also saved as the snapshot 'generations/<generation>.json', next to an empty lease file
+# 'generations/<generation>.lock'. A SegmentedIndex reads its segments from the snapshot and holds a shared lock on the lease file until
+# it is closed, so it keeps its generation while newer ones are published. collect_garbage() removes the snapshots of the old generations
+# that no reader holds, and then the segment files no remaining generation uses.
+# Only one process changes the index at a time: a rebuild, an update or a merge holds the writer lock (see writer_lock()) from reading the
+# manifest to saving the next one.
+
+def empty_manifest():
+    """
+    This function returns the manifest of an index that has no segments yet.
+
+    Returns:
+        manifest (dict): The manifest.
+    """
+
+    return {'generation': 0, 'next_segment': 1, 'segments': [], 'documents': {}}
+
+def load_manifest(index_dir=INDEX_DIR):
+    """
+    This function reads the manifest of an index.
+
+    Args:
+        index_dir (str): The directory of the index.
+
+    Returns:
+        manifest (dict): The manifest, or None if the index has not been created yet.
+    """
+
+    try:
+        with open(os.path.join(index_dir, MANIFEST), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_manifest(manifest, index_dir=INDEX_DIR):
+    """
+    This function saves the manifest of an index. It is written to a temporary file that then replaces the old manifest, so a reader sees either the old or the new manifest and never half of one.
+
+    Args:
+        manifest (dict): The manifest.
+        index_dir (str): The directory of the index.
+    """
+
+    os.makedirs(os.path.join(index_dir, GENERATIONS_DIR), exist_ok=True)
+    snapshot = generation_path(manifest['generation'], index_dir)
+    with open(snapshot + '.tmp', 'w') as f: # the snapshot is saved before the manifest, so the current generation always has one
+        json.dump({'generation': manifest['generation'], 'segments': manifest['segments']}, f)
+    os.replace(snapshot + '.tmp', snapshot + '.json')
+    open(snapshot + '.lock', 'a').close()
+
+    path = os.path.join(index_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+@contextmanager
+def writer_lock(index_dir=INDEX_DIR):
+    """
+    This function holds the exclusive writer lock of an index while the body of a with statement runs, waiting while another writer holds it.
+
+    Every function that saves a new manifest (a rebuild, an update or a merge) holds the lock from reading the manifest to saving the new
+    one, so two writers never start from the same manifest, where the manifest saved last would drop the changes of the other, and never
+    reserve the same segment name. Between processes the lock is a POSIX lock on the file WRITER_LOCK in the index directory, which, unlike
+    flock(), is not inherited by the processes forked while it is held (e.g. the build workers). A POSIX lock does not exclude the other
+    threads of the same process, so they wait on a threading lock first. Without fcntl (on Windows) only the threading lock is taken.
+
+    Args:
+        index_dir (str): The directory of the index.
+    """
+
+    os.makedirs(index_dir, exist_ok=True)
+    with _writer_threads.setdefault(os.path.abspath(index_dir), threading.Lock()):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(index_dir, WRITER_LOCK), 'a') as f:
+            fcntl.lockf(f.fileno(), fcntl.LOCK_EX) # released when the file is closed
+            yield
+
+def generation_path(generation, index_dir=INDEX_DIR):
+    """
+    This function returns the path of the snapshot and the lease file of a generation, without their extension.
+    """
+
+    return os.path.join(index_dir, GENERATIONS_DIR, str(generation))
+
+def open_snapshot(index_dir=INDEX_DIR):
+    """
+    This function reads the segments of the current generation of an index and takes a lease on it, so it is not removed while it is read.
+
+    The lease is a shared lock on the lease file of the generation. If the generation was collected between reading the manifest and
+    locking it, the snapshot is gone by the time the lock is held, and the newer manifest is read again.
+
+    Args:
+        index_dir (str): The directory of the index.
+
+    Returns:
+        snapshot (dict): The 'generation' and the 'segments' of the index, or None if the index has not been created yet.
+        lease (file): The locked lease file, to be closed when the generation is no longer read, or None if there is no lease to hold.
+    """
+
+    while True:
+        manifest = load_manifest(index_dir)
+        if manifest is None:
+            return None, None
+        path = generation_path(manifest['generation'], index_dir)
+        lease = None
+        if fcntl is not None and os.path.exists(path + '.lock'):
+            try:
+                lease = open(path + '.lock', 'rb')
+                fcntl.flock(lease.fileno(), fcntl.LOCK_SH) # waits while collect_garbage() is removing the generation
+            except FileNotFoundError: # removed in the meantime
+                lease = None
+        try:
+            with open(path + '.json', 'r') as f:
+                return json.load(f), lease
+        except FileNotFoundError:
+            if lease is not None:
+                lease.close()
+        current = load_manifest(index_dir)
+        if current is not None and current['generation'] == manifest['generation']: # an index saved before snapshots were kept
+            return manifest, None
+
+def drop_generation(path):
+    """
+    This function removes the snapshot and the lease file of an old generation, unless a reader holds its lease.
+
+    Args:
+        path (str): The path of the generation, see generation_path().
+
+    Returns:
+        dropped (bool): True if the generation was removed.
+    """
+
+    lease = None
+    try:
+        if fcntl is not None:
+            try:
+                lease = open(path + '.lock', 'rb')
+                fcntl.flock(lease.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB) # fails at once if any reader holds a shared lock
+            except FileNotFoundError:
+                lease = None
+            except OSError:
+                return False
+        for extension in ('.json', '.lock'):
+            try:
+                os.remove(path + extension)
+            except FileNotFoundError:
+                pass
+        return True
+    finally:
+        if lease is not None:
+            lease.close()
+
+def collect_garbage(index_dir=INDEX_DIR):
+    """
+    This function removes the old generations of an index that no reader holds, and the segment files that are not used by any generation left.
+
+    Only segments numbered below the next_segment of the saved manifest are removed, so a segment that is still being written (its name
+    is reserved in a manifest that has not been saved yet) is never removed.
+
+    Args:
+        index_dir (str): The directory of the index.
+    """
+
+    manifest = load_manifest(index_dir)
+    if manifest is None:
+        return
+    directory = os.path.join(index_dir, GENERATIONS_DIR)
+    kept = {segment['name'] for segment in manifest['segments']} # the segments of every generation that is kept
+    for name in (os.listdir(directory) if os.path.isdir(directory) else []):
+        if not name.endswith('.json'):
+            continue
+        generation = int(name[:-len('.json')])
+        path = os.path.join(directory, str(generation))
+        if generation < manifest['generation'] and drop_generation(path):
+            continue
+        try:
+            with open(path + '.json', 'r') as f:
+                kept.update(segment['name'] for segment in json.load(f)['segments'])
+        except FileNotFoundError: # collected by another process in the meantime
+            pass
+
+    removed = set()
+    for name in os.listdir(index_dir):
+        match = SEGMENT_FILE.match(name)
+        if match and int(match.group(1)) < manifest['next_segment'] and 'segment' + match.group(1) not in kept:
+            removed.add('segment' + match.group(1))
+    for name in removed:
+        remove_segment(name, index_dir)
+
+def new_segment(manifest, index_dir=INDEX_DIR):
+    """
+    This function reserves the name of a new segment in the manifest.
+
+    Args:
+        manifest (dict): The manifest.
+        index_dir (str): The directory of the index.
+
+    Returns:
+        name (str): The name of the segment.
+        prefix (str): The prefix the segment has to be saved under.
+    """
+
+    name = 'segment{}'.format(manifest['next_segment'])
+    manifest['next_segment'] += 1
+    return name, os.path.join(index_dir, name)
+
+def remove_segment(name, index_dir=INDEX_DIR):
+    """
+    This function deletes the files of a segment that is no longer in the manifest.
+
+    Args:
+        name (str): The name of the segment.
+        index_dir (str): The directory of the index.
+    """
+
+    for extension in ('.lex', '.post', '.kgram', '.docs'):
+        try:
+            os.remove(os.path.join(index_dir, name + extension))
+        except OSError: # already gone, or still open by a reader on a system that does not allow removing open files
+            pass
+
+def segment_size(name, index_dir=INDEX_DIR):
+    """
+    This function returns the size of the postings file of a segment, in bytes.
+    """
+
+    return os.path.getsize(os.path.join(index_dir, name + '.post'))
+
+def needs_merge(manifest, index_dir=INDEX_DIR):
+    """
+    This function decides whether the delta segments of an index have grown enough to be merged into the base segment.
+
+    Args:
+        manifest (dict): The manifest.
+        index_dir (str): The directory of the index.
+
+    Returns:
+        merge (bool): True if the segments should be merged.
+    """
+
+    segments = manifest['segments']
+    if len(segments) < 2:
+        return False
+    if len(segments) > MAX_SEGMENTS:
+        return True
+    base = segment_size(segments[0]['name'], index_dir)
+    deltas = sum(segment_size(s['name'], index_dir) for s in segments[1:])
+    return deltas >= MERGE_RATIO * base
+
+def fingerprint(path, previous=None):
+    """
+    This function returns the fingerprint of a document: its modification time, its size and the SHA-1 hash of its contents.
+
+    If the document has the same modification time and size as its previous fingerprint, it is taken to be unchanged and is not read again.
+
+    Args:
+        path (str): The path of the document.
+        previous (dict): The fingerprint the document had when it was last indexed, if any.
+
+    Returns:
+        fingerprint (dict): The 'mtime', 'size' and 'sha1' of the document.
+    """
+
+    stat = os.stat(path)
+    if previous is not None and previous['mtime'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+        return previous
+    with open(path, 'rb') as f:
+        sha1 = hashlib.sha1(f.read()).hexdigest()
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': sha1}
+
+class SegmentedIndex:
+    """
+    This class reads an index made of a base segment and delta segments as if it was a single index.
+
+    It has the same methods as IndexReader. The postings of a term are read from every segment, the docIDs deleted from a segment are removed, and the rest are merged.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        manifest, self.lease = open_snapshot(index_dir) # the generation is kept until close() or release()
+        if manifest is None:
+            raise FileNotFoundError("No index found in '{}', run index_creation.py first".format(index_dir))
+
+        self.generation = manifest['generation']
+        self.segments = [] # (reader, sorted deleted docIDs) pairs
+        for segment in manifest['segments']:
+            self.segments.append((IndexReader(os.path.join(index_dir, segment['name'])), segment['deleted']))
+        self._prefixes = [os.path.join(index_dir, segment['name']) for segment in manifest['segments']]
+        self._stores = None # the document stores, opened by the first snippet
+
+        docIDs = []
+        for reader, deleted in self.segments:
+            docIDs = union(docIDs, difference(reader.docIDs, deleted))
+        self.docIDs = docIDs # the sorted docIDs of every live document
+        self._doc_lengths = None # only ranked queries need them, so they are gathered on first use
+
+    @property
+    def doc_lengths(self):
+        """
+        The number of terms indexed in every live document, as a dictionary of docID to length.
+        """
+
+        if self._doc_lengths is None:
+            doc_lengths = {}
+            for reader, deleted in self.segments:
+                deleted = set(deleted)
+                doc_lengths.update((doc, length) for doc, length in zip(reader.docIDs, reader.doc_lengths) if doc not in deleted)
+            self._doc_lengths = doc_lengths
+        return self._doc_lengths
+
+    def close(self):
+        """
+        This function closes every segment and gives up the lease on the generation.
+        """
+
+        for reader, _ in self.segments:
+            reader.close()
+        for store in self._stores or []:
+            if store is not None:
+                store.close()
+        self.release()
+
+    def release(self):
+        """
+        This function gives up the lease on the generation without closing the segments, so its files can be removed by collect_garbage().
+
+        The segments are memory mapped, so queries that are still running on them can finish even once their files are removed.
+        """
+
+        if self.lease is not None:
+            self.lease.close()
+            self.lease = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, term):
+        return any(term in reader for reader, _ in self.segments)
+
+    def df(self, term):
+        """
+        This function returns the document frequency of a term, without decoding its postings.
+
+        Documents deleted from a segment are still counted until the segments are merged, so this is an upper bound meant for estimates.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            df (int): The number of documents the term appears in.
+        """
+
+        return sum(reader.df(term) for reader, _ in self.segments)
+
+    def max_tf(self, term):
+        """
+        This function returns the largest number of times a term appears in a single document, without decoding its postings.
+
+        Documents deleted from a segment are still counted until the segments are merged, so this is an upper bound meant for pruning.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            max_tf (int): The largest frequency of the term in a document.
+        """
+
+        return max((reader.max_tf(term) for reader, _ in self.segments), default=0)
+
+    def frequencies(self, term):
+        """
+        This function returns the postings list of a term across every segment, along with the number of times the term appears in each document.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            postings (list): The sorted docIDs of the live documents the term appears in.
+            frequencies (list): The frequency of the term in each of those documents.
+        """
+
+        if len(self.segments) == 1 and not self.segments[0][1]: # a single segment with nothing deleted needs no merging
+            return self.segments[0][0].frequencies(term)
+        merged = {}
+        for reader, deleted in self.segments:
+            deleted = set(deleted)
+            for doc, tf in zip(*reader.frequencies(term)):
+                if doc not in deleted:
+                    merged[doc] = tf
+        docs = sorted(merged)
+        return docs, [merged[doc] for doc in docs]
+
+    def doc_stores(self):
+        """
+        This function returns the document store of every segment, opening them the first time it is called.
+
+        Returns:
+            stores (list): (DocStore, sorted deleted docIDs) pairs, in the order of the segments. The store is None for a segment built before document stores were saved.
+        """
+
+        if self._stores is None:
+            self._stores = [DocStore(prefix + '.docs') if os.path.exists(prefix + '.docs') else None for prefix in self._prefixes]
+        return list(zip(self._stores, (deleted for _, deleted in self.segments)))
+
+    def document(self, doc):
+        """
+        This function returns the text of a live document and the span of every one of its positions, from the segment that holds it.
+
+        Args:
+            doc (int): The docID.
+
+        Returns:
+            text (bytes): The text of the document in utf-8, or None if it is not in any document store.
+            starts (list): Where the term of every position starts in the text, in bytes.
+            lengths (list): The length of the term of every position, in bytes.
+        """
+
+        for store, deleted in reversed(self.doc_stores()): # a changed document is in a later segment than its old version
+            if store is not None and doc in store and doc not in deleted:
+                return store.document(doc)
+        return None, [], []
+
+    def expand(self, pattern, limit=MAX_EXPANSIONS):
+        """
+        This function finds the terms of every segment that match a wildcard pattern (see wildcards.py).
+
+        Args:
+            pattern (str): The pattern, with '*' matching any number of characters.
+            limit (int): The most terms the pattern may expand to.
+
+        Returns:
+            terms (list): The sorted matching terms.
+
+        Raises:
+            ValueError: If the pattern matches more than limit terms.
+        """
+
+        return expand([reader for reader, _ in self.segments], pattern, limit)
+
+    def postings(self, term):
+        """
+        This function returns the postings list of a term across every segment.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            postings (list): The sorted docIDs of the live documents the term appears in.
+        """
+
+        result = []
+        for reader, deleted in self.segments:
+            p = reader.postings(term)
+            if deleted:
+                p = difference(p, deleted)
+            result = union(result, p) if result else p
+        return result
+
+    def encoded_postings(self, term):
+        """
+        This function returns the docs section of a term in every segment, without decoding it (see IndexReader.encoded_postings()).
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            parts (list): (docs section, sorted deleted docIDs) pairs, one for every segment.
+        """
+
+        return [(reader.encoded_postings(term), deleted) for reader, deleted in self.segments]
+
+    def positions(self, term, docs=None):
+        """
+        This function returns the positions of a term in every live document it appears in, across every segment, or only in some of them.
+
+        Args:
+            term (str): The term.
+            docs (list): The sorted docIDs whose positions are wanted, or None for every document (see IndexReader.positions()).
+
+        Returns:
+            positions (dict): A dictionary of docID to the sorted positions of the term in that document, in docID order.
+        """
+
+        if len(self.segments) == 1 and not self.segments[0][1]: # a single segment with nothing deleted needs no merging
+            return self.segments[0][0].positions(term, docs)
+        return merge_positions([(reader.positions(term, docs), deleted) for reader, deleted in self.segments])
+
+    def items(self):
+        """
+        This function iterates over every term of the index in sorted order, merging its postings across the segments.
+
+        Yields:
+            term (str): The term.
+            positions (dict): A dictionary of docID to the positions of the term in that document, in docID order.
+        """
+
+        streams = [tag_items(reader, deleted) for reader, deleted in self.segments]
+        for term, group in groupby(heapq.merge(*streams, key=lambda item: item[0]), key=lambda item: item[0]):
+            positions = merge_positions([(p, deleted) for _, p, deleted in group])
+            if positions: # every document of the term may have been deleted
+                yield term, positions
+
+def tag_items(reader, deleted):
+    """
+    This function iterates over every term of a segment, along with the docIDs deleted from the segment.
+
+    Yields:
+        term (str): The term.
+        positions (dict): A dictionary of docID to the positions of the term in that document.
+        deleted (list): The docIDs deleted from the segment.
+    """
+
+    for term, positions in reader.items():
+        yield term, positions, deleted
+
+def merge_positions(parts):
+    """
+    This function merges the positions of a term read from several segments, leaving out the deleted documents.
+
+    Args:
+        parts (list): (positions, deleted docIDs) pairs, one for every segment.
+
+    Returns:
+        positions (dict): A dictionary of docID to positions, in docID order.
+    """
+
+    merged = {}
+    for positions, deleted in parts:
+        deleted = set(deleted)
+        for doc, pos in positions.items():
+            if doc not in deleted:
+                merged[doc] = pos
+    return {doc: merged[doc] for doc in sorted(merged)}
@@ -0,0 +1,283 @@
+"""
+Splits the corpus into shards of contiguous docID ranges, each with its own independent index, and answers queries across them.
+
+    python sharding.py --build 4 --workers 4
+    python sharding.py --query "heart AND NOT attack" --query '"neural network"'
+
+Every shard is a complete index directory (segments and manifest, see segments.py) under 'shards/', and 'shards/shards.json' lists the
+shards with the first and last docID of each. The docIDs are the global ones, taken from the names of the files, so a shard never has to
+translate them.
+
+A ShardedSearcher is the coordinator: it starts one worker process per shard, each with its own Searcher over its shard, and talks to them
+over pipes. A query is parsed once by the coordinator and the parsed tree is sent to every shard, which evaluate it at the same time on
+their own cores. The shards hold disjoint docID ranges, so NOT only has to complement within a shard, and every other operator gives the
+same documents it would on a single index. The sorted results of the shards are then gathered in docID order. A wildcard is expanded by every shard against its own
+terms, so its expansion limit applies to each shard.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import traceback
+from itertools import chain
+from index_creation import MEMORY_BUDGET_MB, build_indexes, get_docIDs, replace_index
+from normalizer import query_word_terms
+from query_parser import canonical, parse_query
+from search_engine import Searcher
+
+SHARD_DIR = 'shards' # the directory the shard index directories and the shard list are saved in
+SHARDS_FILE = 'shards.json'
+
+def split_ranges(docIDs, num_shards):
+    """
+    This function splits the sorted docIDs into contiguous ranges of about the same number of documents.
+
+    Args:
+        docIDs (list): The sorted docIDs of every document.
+        num_shards (int): The number of ranges.
+
+    Returns:
+        ranges (list): The sorted docIDs of every range, in docID order. There are fewer ranges than asked for if there are fewer documents.
+    """
+
+    size = max(1, -(-len(docIDs) // num_shards)) # the number of docs per range, rounded up
+    return [docIDs[i:i + size] for i in range(0, len(docIDs), size)]
+
+def load_shards(shard_dir=SHARD_DIR):
+    """
+    This function reads the list of shards.
+
+    Args:
+        shard_dir (str): The directory of the shards.
+
+    Returns:
+        shards (list): A dict for every shard, in docID order, with its 'name' (the directory of its index under shard_dir) and the 'first' and 'last' docIDs of its range.
+    """
+
+    try:
+        with open(os.path.join(shard_dir, SHARDS_FILE), 'r') as f:
+            return json.load(f)['shards']
+    except FileNotFoundError:
+        raise FileNotFoundError("No shards found in '{}', run sharding.py --build first".format(shard_dir)) from None
+
+def build_shards(num_shards, workers=1, memory_mb=MEMORY_BUDGET_MB, shard_dir=SHARD_DIR):
+    """
+    This function builds the index of every shard, replacing the shards built before.
+
+    The shards are built one after the other, each one on every worker (see build_indexes()), and the shard list is only replaced once
+    every shard has been built. The shards of the old list that are not in the new one are left on disk.
+
+    Args:
+        num_shards (int): The number of shards.
+        workers (int): The number of processes used to build every shard.
+        memory_mb (int): The number of megabytes the in-memory blocks may take, across all the workers.
+        shard_dir (str): The directory of the shards.
+
+    Returns:
+        shards (list): The new shard list (see load_shards()).
+    """
+
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = []
+    for i, docIDs in enumerate(split_ranges(get_docIDs(), num_shards)):
+        name = 'shard{}'.format(i)
+        replace_index(lambda prefix: build_indexes(docIDs, prefix, workers, memory_mb), os.path.join(shard_dir, name), docIDs)
+        shards.append({'name': name, 'first': docIDs[0], 'last': docIDs[-1]})
+        print("Shard {} created: docIDs {} to {}".format(name, docIDs[0], docIDs[-1]))
+
+    path = os.path.join(shard_dir, SHARDS_FILE)
+    with open(path + '.tmp', 'w') as f: # replaced in one step, like the manifest of an index
+        json.dump({'shards': shards}, f)
+    os.replace(path + '.tmp', path)
+    return shards
+
+def shard_worker(conn, index_dir):
+    """
+    This function is run by the worker process of a shard. It opens the index of the shard and answers the parsed queries it is sent until it is sent None.
+
+    Every message is a list of (key, node) pairs, the canonical form and the tree of a query, and is answered with a list with, for every
+    query, ('ok', sorted docIDs) or ('error', message). If the index can not be opened, the worker answers ('error', message) once and stops.
+
+    Args:
+        conn (Connection): The end of the pipe the worker reads and answers on.
+        index_dir (str): The index directory of the shard.
+    """
+
+    try:
+        searcher = Searcher(index_dir)
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+    conn.send(('ok', searcher.generation))
+
+    while True:
+        queries = conn.recv()
+        if queries is None:
+            break
+        searcher.refresh() # the shard may have been rebuilt since the last message
+        answers = []
+        for key, node in queries:
+            try:
+                answers.append(('ok', searcher.cached_result(key, node)))
+            except ValueError as e: # e.g. a wildcard that matches too many terms
+                answers.append(('error', str(e)))
+            except Exception:
+                answers.append(('error', traceback.format_exc()))
+        conn.send(answers)
+    conn.close()
+
+class ShardedSearcher:
+    """
+    This class answers boolean, phrase and proximity queries across every shard, with one worker process per shard (see shard_worker()).
+
+    It has the same boolean_query(), proximity_query() and batch_query() methods as Searcher. A lock makes sure the queries of different
+    threads do not interleave on the pipes, so a query uses every core of the shards while it runs and the next one waits.
+    """
+
+    def __init__(self, shard_dir=SHARD_DIR):
+        self.shards = load_shards(shard_dir)
+        self.lock = threading.Lock()
+        self.workers = [] # (process, connection) pairs, in docID order
+        for shard in self.shards:
+            conn, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=shard_worker, args=(child, os.path.join(shard_dir, shard['name'])), daemon=True)
+            process.start()
+            child.close() # only the worker uses its end
+            self.workers.append((process, conn))
+
+        for shard, (_, conn) in zip(self.shards, self.workers): # every worker opens its shard at the same time, then says whether it could
+            status, message = conn.recv()
+            if status != 'ok':
+                self.close()
+                raise FileNotFoundError("Shard '{}' could not be opened: {}".format(shard['name'], message))
+
+    def close(self):
+        """
+        This function stops every worker process.
+        """
+
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+                conn.close()
+            except OSError: # the worker already stopped
+                pass
+        for process, _ in self.workers:
+            process.join()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scatter_gather(self, queries):
+        """
+        This function sends parsed queries to every shard and gathers their results.
+
+        Every shard evaluates the queries at the same time, and the results are read back in docID order. The docID ranges of the shards
+        are contiguous and in order, so the sorted results of the shards joined one after the other are the sorted global result.
+
+        Args:
+            queries (list): (key, node) pairs, the canonical form and the tree of every query.
+
+        Returns:
+            results (list): For every query, its sorted docIDs, or the ValueError it raised on a shard.
+        """
+
+        with self.lock:
+            for _, conn in self.workers:
+                conn.send(queries)
+            answers = [conn.recv() for _, conn in self.workers]
+
+        results = []
+        for i in range(len(queries)):
+            parts = [shard_answers[i] for shard_answers in answers]
+            errors = [result for status, result in parts if status != 'ok']
+            results.append(ValueError(errors[0]) if errors else list(chain.from_iterable(result for _, result in parts)))
+        return results
+
+    def boolean_query(self, query):
+        """
+        This function processes a boolean query on every shard and returns the matching docIDs.
+
+        Args:
+            query (str): The boolean query to be processed, in the syntax of Searcher.boolean_query().
+
+        Returns:
+            result (list): A sorted list of docIDs that satisfy the query.
+
+        Raises:
+            ValueError: If the query is not a valid boolean query.
+        """
+
+        node = parse_query(query, query_word_terms) # parsed once here, rather than once by every shard
+        if node is None: # the query is empty
+            return []
+        result = self.scatter_gather([(canonical(node), node)])[0]
+        if isinstance(result, ValueError):
+            raise result
+        return result
+
+    def proximity_query(self, query):
+        """
+        This function processes a proximity query. Proximity clauses are part of the boolean query language, so this is the same as boolean_query().
+        """
+
+        return self.boolean_query(query)
+
+    def batch_query(self, queries):
+        """
+        This function answers several queries with a single message to every shard.
+
+        Args:
+            queries (list): The queries.
+
+        Returns:
+            results (list): A dict for every query, in order: {'query', 'docs', 'count'}, or {'query', 'error'} if the query is not valid.
+        """
+
+        results = [None] * len(queries)
+        parsed = [] # the (key, node) pairs of the valid, non empty queries
+        positions = [] # the position of each of them among the queries
+        for i, query in enumerate(queries):
+            try:
+                node = parse_query(query, query_word_terms)
+            except ValueError as e:
+                results[i] = {'query': query, 'error': str(e)}
+                continue
+            if node is None:
+                results[i] = {'query': query, 'docs': [], 'count': 0}
+                continue
+            parsed.append((canonical(node), node))
+            positions.append(i)
+
+        for i, docs in zip(positions, self.scatter_gather(parsed) if parsed else []):
+            if isinstance(docs, ValueError):
+                results[i] = {'query': queries[i], 'error': str(docs)}
+            else:
+                results[i] = {'query': queries[i], 'docs': docs, 'count': len(docs)}
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the index as shards of docID ranges, or answer queries across the shards.')
+    parser.add_argument('--build', type=int, metavar='SHARDS', help='split the documents of the ResearchPapers directory into this many shards and index each one')
+    parser.add_argument('--workers', type=int, default=1, help='the number of processes used to build every shard')
+    parser.add_argument('--memory-mb', type=int, default=MEMORY_BUDGET_MB, help='the number of megabytes of postings kept in memory while building')
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help='the directory the shards are saved in')
+    parser.add_argument('--query', action='append', default=[], help='a query to answer across the shards, can be given more than once')
+    args = parser.parse_args()
+
+    if args.build is not None:
+        build_shards(args.build, args.workers, args.memory_mb, args.shard_dir)
+        print("Shards saved")
+    if args.query:
+        with ShardedSearcher(args.shard_dir) as searcher:
+            for result in searcher.batch_query(args.query):
+                print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
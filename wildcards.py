@@ -0,0 +1,85 @@
+import re
+from index_format import K
+
+MAX_EXPANSIONS = 1000 # the most terms a wildcard may expand to, so a pattern like 'a*' can not make a query union a large part of the index
+
+def pattern_kgrams(pattern):
+    """
+    This function returns the k-grams every term matching a wildcard pattern must contain.
+
+    The pattern is marked with '$' at both ends like the terms are, and the k-grams are taken from the pieces between the '*'s, so
+    '*ization' gives the k-grams of 'ization$' and 're*al' gives those of '$re' and 'al$'.
+
+    Args:
+        pattern (str): The pattern, e.g. '*ization'.
+
+    Returns:
+        grams (set): The k-grams (empty if no piece is long enough to hold one).
+    """
+
+    grams = set()
+    for piece in ('$' + pattern + '$').split('*'):
+        grams.update(piece[i:i + K] for i in range(len(piece) - K + 1))
+    return grams
+
+def pattern_regex(pattern):
+    """
+    This function compiles a wildcard pattern into a regular expression, where '*' matches any number of characters.
+
+    The k-grams only narrow the terms down (e.g. '$re' and 'al$' are both in 'real' but so are they in 'reversal'), so every candidate is checked against it.
+    """
+
+    return re.compile('.*'.join(re.escape(piece) for piece in pattern.split('*')))
+
+def expand_segment(reader, pattern):
+    """
+    This function finds the terms of one segment that match a wildcard pattern.
+
+    A prefix pattern ('retriev*') is looked up as a range of the sorted lexicon, which holds every term with the same prefix next to each
+    other. Any other pattern is looked up in the k-gram file, since its k-grams narrow the terms down more than a short prefix does. A
+    pattern without a piece long enough for a k-gram, e.g. '*a*', is matched against the terms with its prefix, or if it has none, against every term.
+
+    Args:
+        reader (IndexReader): The segment.
+        pattern (str): The pattern.
+
+    Yields:
+        term (str): A matching term, in sorted order.
+    """
+
+    regex = pattern_regex(pattern)
+    head = pattern.split('*')[0]
+    grams = pattern_kgrams(pattern)
+    if head and pattern.endswith('*') and pattern.count('*') == 1:
+        candidates = reader.prefix_terms(head)
+    elif grams and reader.has_kgrams():
+        candidates = reader.kgram_terms(grams)
+    else:
+        candidates = reader.prefix_terms(head) if head else reader.terms()
+    for term in candidates:
+        if regex.fullmatch(term):
+            yield term
+
+def expand(readers, pattern, limit=MAX_EXPANSIONS):
+    """
+    This function finds the terms of an index that match a wildcard pattern.
+
+    Args:
+        readers (list): The IndexReader of every segment.
+        pattern (str): The pattern, with '*' matching any number of characters.
+        limit (int): The most terms the pattern may expand to.
+
+    Returns:
+        terms (list): The sorted terms that match the pattern in any segment.
+
+    Raises:
+        ValueError: If the pattern matches more than limit terms.
+    """
+
+    terms = set()
+    for reader in readers:
+        for term in expand_segment(reader, pattern):
+            terms.add(term)
+            if len(terms) > limit:
+                raise ValueError("'{}' matches more than {} terms".format(pattern, limit))
+    return sorted(terms)